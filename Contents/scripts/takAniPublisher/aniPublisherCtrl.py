@@ -1,14 +1,25 @@
-import maya.cmds as cmds
-import pymel.core as pm
-
 from . import aniPublisherModels as apMdl
-from . import aniPublisherUI as apUI
 
 from . import utils
+from . import sceneIndex
+from . import tracer
+
+
+def reloadModules():
+    """Pick up code changes without restarting maya, only done in dev mode."""
+    if not utils.isDevMode():
+        return
 
-reload(apMdl)
-reload(apUI)
-reload(utils)
+    from . import constants, fileUtils, fbxEditor, settingsStore, exportProfiles, publishEvents, thumbnailService
+    from . import fbxIndex, fbxPatcher, fbxCurves, fbxBinary, fbxSplitter, fbxClipper, fbxStitcher, fbxPruner, fbxVerifier, keyReducer
+    from . import postProcessor, batchPublish, chunkedExport, publishCache, publishJournal, fileTransfer, settingsUI
+    from . import aniPublisherUI as apUI
+
+    utils.reloadModules([
+        constants, fileUtils, fbxEditor, tracer, settingsStore, exportProfiles, utils, publishEvents, sceneIndex, thumbnailService,
+        fbxIndex, fbxPatcher, fbxCurves, fbxBinary, fbxSplitter, fbxClipper, fbxStitcher, fbxPruner, fbxVerifier, keyReducer,
+        postProcessor, batchPublish, chunkedExport, publishCache, publishJournal, fileTransfer, apMdl, settingsUI, apUI,
+    ])
 
 
 class AniPublisherCtrl(object):
@@ -17,46 +28,31 @@ class AniPublisherCtrl(object):
         self.aniPubUI = None
         self.settings = utils.getSettings()
 
-        self.__validRefNodes = []
-        self.__rigRefNodes = []
-
     def showUI(self):
-        self.__getValidRefNodes()
-        self.__getRigRefNodes()
+        reloadModules()
+        from . import aniPublisherUI as apUI  # Qt is only loaded with the ui, batch workers use the publisher alone
 
-        self.aniPub = apMdl.AniPublisher()
+        if self.settings.get('tracing'):  # Trace is saved with the publish
+            tracer.getTracer().enable()
 
-        for refNode in self.__rigRefNodes:
-            pubItem = apMdl.PublishItem(refNode)
-            self.aniPub.addItem(pubItem)
+        self.aniPub = self.createPublisher()
 
         self.aniPubUI = apUI.AniPublisherUI(self.aniPub)
 
         self.aniPubUI.show()
 
-    def __getRigRefNodes(self):
-        rigRefNodes = []
-
-        for refNode in self.__validRefNodes:
-            refNamespace = cmds.referenceQuery(refNode, namespace=True)
-            if cmds.objExists('{0}:{1}'.format(refNamespace,  self.settings['exportSetName'])):
-                rigRefNodes.append(refNode)
-
-        self.__rigRefNodes = rigRefNodes
-
-    def __getValidRefNodes(self):
-        validRefNodes = []
-
-        refNodes = cmds.ls(type='reference')
-        for refNode in refNodes:
-            try:  # Empty reference node
-                cmds.referenceQuery(refNode, filename=True)
-            except:
-                continue
+    def createPublisher(self):
+        self.settings = utils.getSettings()
+        with tracer.getTracer().span('sceneIndex'):
+            sceneIdx = sceneIndex.SceneIndex(self.settings['exportSetName'])
 
-            if not cmds.referenceQuery(refNode, isLoaded=True):  # Not loaded refrence node
-                continue
+        aniPub = apMdl.AniPublisher()
 
-            validRefNodes.append(refNode)
+        # Values derived from the rig file are computed once for all instances of the rig
+        exportDirectories = {}
+        for record in sceneIdx.getRigRecords():
+            pubItem = apMdl.PublishItem(record, exportDirectory=exportDirectories.get(record.rigFile, ''))
+            exportDirectories.setdefault(record.rigFile, pubItem.exportDirectory)
+            aniPub.addItem(pubItem)
 
-        self.__validRefNodes = validRefNodes
+        return aniPub
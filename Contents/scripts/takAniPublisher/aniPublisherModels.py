@@ -5,17 +5,36 @@ Description: Exports skeleton joints and blendshapes animation data.
 """
 
 import maya.OpenMaya as om
-import pymel.core as pm
 import maya.cmds as cmds
 import maya.mel as mel
 
 import os
-import glob
 import re
+import sys
+import glob
+import time
+import tempfile
+import functools
+import threading
+import traceback
+import collections
 
 from . import utils
-
-reload(utils)
+from . import constants
+from . import settingsStore
+from . import tracer
+from . import publishEvents
+from . import exportProfiles
+from . import chunkedExport
+from . import postProcessor
+from . import publishCache
+from . import publishJournal
+from . import fileUtils
+from . import fileTransfer
+from . import fbxSplitter
+from . import keyReducer
+from . import fbxPruner
+from . import fbxVerifier
 
 
 class AniPublisher(object):
@@ -26,8 +45,20 @@ class AniPublisher(object):
     def __init__(self):
         super(AniPublisher, self).__init__()
         self.publishItems = []
-        self._minTime = pm.env.minTime
-        self._maxTime = pm.env.maxTime
+        self.results = []
+        self.settings = utils.getSettings()
+        self.traceFile = None
+        self.transferPool = None
+        self.cancelled = False
+        self._listeners = []
+        self._cancelRequested = False
+        self._resultLock = threading.Lock()  # Outputs of one item can be verified by different transfer threads
+        settingsStore.getStore().addListener(self.onSettingsChanged)
+        self._minTime = cmds.playbackOptions(q=True, minTime=True)
+        self._maxTime = cmds.playbackOptions(q=True, maxTime=True)
+
+    def onSettingsChanged(self, settings):
+        self.settings = settings
 
     def addItem(self, pubItem):
         if not isinstance(pubItem, PublishItem):
@@ -37,97 +68,515 @@ class AniPublisher(object):
     def setItems(self, pubItems):
         self.publishItems = pubItems
 
-    def publish(self):
+    def addListener(self, callback):
+        """Callbacks are called on the main thread with every publishEvents event dictionary of the following publishes."""
+        self._listeners.append(callback)
+
+    def removeListener(self, callback):
+        self._listeners = [listener for listener in self._listeners if listener != callback]
+
+    def cancel(self):
+        """Stop the publish before its next stage, stages that have started are finished so no half written files are left."""
+        self._cancelRequested = True
+
+    def publish(self, postProcess=True, resume=None, wait=False):
+        """
+        Publish enabled items, resume continues an interrupted publish of the scene and defaults to the resumePublish setting.
+        With local staging this returns once the files are queued for transfer, use wait or waitForTransfers to wait for them.
+        """
+        self.waitForTransfers()  # Files of the previous publish may still be on their way
+
+        publishTracer = tracer.getTracer()
+        isTracing = self.settings.get('tracing') or self.traceFile
+        if isTracing:
+            publishTracer.enable()
+
+        self.cancelled = False
+        self._cancelRequested = False
+        startTime = time.time()
+        self._emit(publishEvents.PUBLISH_STARTED, numItems=len([pubItem for pubItem in self.publishItems if pubItem.enable]))
+        try:
+            with publishTracer.span('publish', numItems=len(self.publishItems)):
+                self._publish(postProcess, resume)
+        finally:
+            if isTracing:
+                self._saveTrace(publishTracer)
+            numFailed = len([result for result in self.results if result.get('error')])
+            self._emit(publishEvents.PUBLISH_FINISHED, numItems=len(self.results), numFailed=numFailed, cancelled=self.cancelled, duration=time.time() - startTime)
+
+        if self.cancelled:
+            om.MGlobal.displayWarning('Publish has been cancelled, remaining items can be resumed with the next publish.')
+
+        if wait:
+            self.waitForTransfers()
+
+        return not self.cancelled
+
+    def waitForTransfers(self, onWait=None):
+        """
+        Block until queued transfers are done, onWait is called meanwhile so a ui can process its events.
+        Events of transfer threads are deferred to the main thread, they are sent before this returns.
+        """
+        if self.transferPool:
+            with tracer.getTracer().span('waitTransfers'):
+                self.transferPool.wait(onWait)
+            utils.processDeferred()
+        return self.results
+
+    def getJournal(self):
+        """Journal of the current scene, None when journaling is disabled or the scene has never been saved."""
+        sceneFile = cmds.file(q=True, sceneName=True)
+        if not self.settings.get('publishJournal', False) or not sceneFile:
+            return None
+        return publishJournal.PublishJournal(publishJournal.getJournalFile(sceneFile))
+
+    def hasInterruptedPublish(self):
+        journal = self.getJournal()
+        return bool(journal and journal.exists() and not journal.isComplete())
+
+    def _emit(self, eventType, **data):
+        event = publishEvents.createEvent(eventType, **data)
+        if threading.current_thread().name != 'MainThread':  # Listeners update the ui, events of transfer threads are sent from the main thread
+            utils.executeDeferred(self._notify, event)
+            return
+        self._notify(event)
+
+    def _notify(self, event):
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                sys.stderr.write(traceback.format_exc())
+
+    def _saveTrace(self, publishTracer):
+        traceFile = self.traceFile or os.path.join(constants.TRACE_DIR, 'publish_{0}.json'.format(time.strftime('%Y%m%d_%H%M%S')))
+        publishTracer.save(traceFile)
+        om.MGlobal.displayInfo('Publish trace has saved to "{0}".\n{1}'.format(traceFile, tracer.formatSummary(publishTracer.getSummary())))
+        publishTracer.clear()
+        publishTracer.disable()
+
+    def _publish(self, postProcess, resume):
+        publishTracer = tracer.getTracer()
+        self.results = []
+
+        postProcessPool = None
+        if self.settings.get('pipelinedPublish'):
+            if postProcessor.canSpawnWorkers():
+                postProcessPool = postProcessor.PostProcessPool(self.settings.get('postProcessWorkers', 2))
+            else:
+                om.MGlobal.displayWarning('Post processing workers can not be spawned on this platform, items are post processed in this session.')
+
+        utils.loadFBXPlugin()
+        exportProfile = exportProfiles.getProfile(self.settings)
+        exportOptionsState = exportProfiles.ExportOptionsState()
+
+        chunkedExporter = None
+        if self.settings.get('chunkedExport'):
+            if chunkedExport.canExportChunked():
+                chunkedExporter = chunkedExport.ChunkedExporter(self.settings.get('chunkSize', 500), self.settings.get('chunkWorkers', 4))
+            else:
+                om.MGlobal.displayWarning('Save the scene to use chunked export, items are exported in this session.')
+
+        pubCache = None
+        if self.settings.get('incrementalPublish'):
+            pubCache = publishCache.PublishCache()
+
+        stagingDir = None
+        self.transferPool = None
+        if self.settings.get('localStaging'):
+            stagingDir = self.settings.get('stagingDirectory') or fileTransfer.getDefaultStagingDirectory()
+            if not os.path.exists(stagingDir):
+                os.makedirs(stagingDir)
+            self.transferPool = fileTransfer.TransferPool(self.settings.get('transferWorkers', 2))
+
+        journal = self.getJournal()
+        if resume is None:
+            resume = self.settings.get('resumePublish', True)
+        if journal and not resume:
+            journal.remove()
+        elif journal:  # Interrupted items left out of this publish are not resumed
+            for entry in journal.retainItems([self._getPublishFile(pubItem) for pubItem in self.publishItems if pubItem.enable]):
+                self._removeStagingFiles(entry)
+
+        fingerprints = {}
+        stagingFiles = {}
+        pendingItems = []
         for pubItem in self.publishItems:
             if not pubItem.enable:
                 continue
 
-            self._setPlaybackRange(pubItem)
+            with publishTracer.span('checkItem', namespace=pubItem.namespace):
+                fullPathFilename = self._getPublishFile(pubItem)
+                exportFile, processedFile = publishJournal.getStagingFiles(fullPathFilename, stagingDir)
+                if pubItem.clips and not postProcess:
+                    om.MGlobal.displayWarning('"{0}" clips are split in post processing, the whole range is exported.'.format(pubItem.namespace))
+                outputs = self._getOutputs(pubItem, fullPathFilename, processedFile, stagingDir, postProcess)
+                outputFiles = [finalFile for _, finalFile in outputs]
+
+                if pubCache or journal:
+                    with publishTracer.span('fingerprint'):
+                        fingerprints[fullPathFilename] = publishCache.getFingerprint(pubItem, AniPublisher.VERSION)
+
+                if pubCache:
+                    with publishTracer.span('cacheCheck'):
+                        isUpToDate = all(pubCache.isUpToDate(finalFile, fingerprints[fullPathFilename]) for finalFile in outputFiles)
+                    if isUpToDate:
+                        self.results.append({'fbxFile': fullPathFilename, 'outputFiles': outputFiles, 'namespace': pubItem.namespace, 'skipped': True, 'error': None})
+                        om.MGlobal.displayInfo('"{0}" animation is up to date, skipped.'.format(pubItem.namespace))
+                        self._emit(publishEvents.ITEM_SKIPPED, namespace=pubItem.namespace, fbxFile=fullPathFilename)
+                        continue
+                    for finalFile in outputFiles:
+                        pubCache.remove(finalFile)
+
+                state = None
+                if journal:
+                    with publishTracer.span('journalCheck'):
+                        state = journal.getResumeState(fullPathFilename, fingerprints[fullPathFilename])
+                    if state == publishJournal.VERIFIED:
+                        self.results.append({'fbxFile': fullPathFilename, 'outputFiles': outputFiles, 'namespace': pubItem.namespace, 'skipped': True, 'resumed': True, 'error': None})
+                        om.MGlobal.displayInfo('"{0}" animation has been published before the interruption, skipped.'.format(pubItem.namespace))
+                        self._emit(publishEvents.ITEM_SKIPPED, namespace=pubItem.namespace, fbxFile=fullPathFilename)
+                        continue
+                    if state is None:
+                        journal.begin(fullPathFilename, pubItem.namespace, fingerprints[fullPathFilename], exportFile, processedFile, outputs)
+                    else:
+                        exportFile, processedFile, outputs = journal.getPaths(fullPathFilename)
+                        om.MGlobal.displayInfo('"{0}" animation is resumed from the {1} state.'.format(pubItem.namespace, state))
+
+                pendingItems.append((pubItem, fullPathFilename, exportFile, processedFile, outputs, state))
+
+        sharedExportTimes = {}
+        if self.settings.get('sharedBake') and not self._cancelRequested:
+            sharedItems = [(pubItem, exportFile) for pubItem, _, exportFile, _, _, state in pendingItems if state is None and not (chunkedExporter and chunkedExporter.isChunked(pubItem))]
+            sharedExportTimes = self._exportShared(sharedItems, exportProfile, exportOptionsState)
+
+        for pubItem, fullPathFilename, exportFile, processedFile, outputs, state in pendingItems:
+            if self._cancelRequested:
+                self.cancelled = True
+                break
+
+            outputFiles = [finalFile for _, finalFile in outputs]
+            itemStartTime = time.time()
+            numResults = len(self.results)
+            self._emit(publishEvents.ITEM_STARTED, namespace=pubItem.namespace, fbxFile=fullPathFilename)
+
+            try:
+                with publishTracer.span('item', namespace=pubItem.namespace):
+                    exportTime = 0.0
+                    if state is None:
+                        self._emit(publishEvents.STAGE_STARTED, namespace=pubItem.namespace, stage=publishEvents.EXPORT_STAGE)
+                        if pubItem.namespace in sharedExportTimes:
+                            exportTime = sharedExportTimes[pubItem.namespace]
+                        else:
+                            startTime = time.time()
+                            if chunkedExporter and chunkedExporter.isChunked(pubItem):
+                                with publishTracer.span('chunkedExport'):
+                                    chunkedExporter.export(pubItem, exportFile)
+                            else:
+                                startFrame, endFrame = pubItem.getExportRange()
+                                self._setPlaybackRange(startFrame, endFrame)
+
+                                cmds.refresh(suspend=True)
+
+                                with publishTracer.span('select'):
+                                    cmds.select(pubItem.exportNodes, r=True)
+                                with publishTracer.span('exportOptions'):
+                                    exportOptionsState.apply(exportProfiles.getItemOptions(exportProfile, startFrame, endFrame, pubItem.exportBlendshape), mel.eval)
+                                with publishTracer.span('fbxExport', frames=float(endFrame) - float(startFrame) + 1):
+                                    mel.eval('FBXExport -f "{0}" -s'.format(exportFile))
+
+                                cmds.refresh(suspend=False)
+                            exportTime = time.time() - startTime
+                        self._emit(publishEvents.STAGE_FINISHED, namespace=pubItem.namespace, stage=publishEvents.EXPORT_STAGE, numBytes=os.path.getsize(exportFile), duration=exportTime)
+
+                        if journal:
+                            with publishTracer.span('journalWrite'):
+                                journal.setState(fullPathFilename, publishJournal.EXPORTED, exportFile)
+
+                    if self._cancelRequested:  # Exported item is left to the journal so a resumed publish continues from here
+                        self.cancelled = True
+                        if not journal and os.path.exists(exportFile):
+                            os.remove(exportFile)
+                        break
+
+                    if not postProcess:
+                        result = {'fbxFile': fullPathFilename, 'outputFiles': outputFiles, 'namespace': pubItem.namespace, 'numBytes': 0, 'duration': 0.0, 'error': None, 'exportTime': exportTime}
+                        self.results.append(result)
+                        self._finalizeItem(journal, fullPathFilename, exportFile, fullPathFilename, publishJournal.EXPORTED, result)
+                        self._emit(publishEvents.ITEM_FINISHED, namespace=pubItem.namespace, fbxFile=fullPathFilename, duration=time.time() - itemStartTime)
+                        continue
+
+                    if state == publishJournal.POST_PROCESSED:
+                        result = {'fbxFile': fullPathFilename, 'outputFiles': outputFiles, 'namespace': pubItem.namespace, 'numBytes': 0, 'duration': 0.0, 'error': None, 'exportTime': exportTime}
+                        self.results.append(result)
+                        self._finalizeOutputs(journal, fullPathFilename, outputs, result, exportFile, recordState=False)
+                        om.MGlobal.displayInfo('"{0}" animation has exported successfully.'.format(pubItem.namespace))
+                        self._emit(publishEvents.ITEM_FINISHED, namespace=pubItem.namespace, fbxFile=fullPathFilename, duration=time.time() - itemStartTime)
+                        continue
+
+                    self._emit(publishEvents.STAGE_STARTED, namespace=pubItem.namespace, stage=publishEvents.POST_PROCESS_STAGE)
+                    if postProcessPool:
+                        with publishTracer.span('submitPostProcess'):
+                            postProcessPool.submit(self._getEditJob(exportFile, pubItem, processedFile, outputs))
+                        stagingFiles[fullPathFilename] = (exportFile, outputs)
+                        self.results.append({'fbxFile': fullPathFilename, 'outputFiles': outputFiles, 'namespace': pubItem.namespace, 'exportTime': exportTime, 'pending': True})
+                        continue
+
+                    result = self._editFBX(exportFile, pubItem, processedFile, outputs)
+                    result.update({'fbxFile': fullPathFilename, 'outputFiles': outputFiles, 'exportTime': exportTime})
+                    self.results.append(result)
+                    self._emit(publishEvents.STAGE_FINISHED, namespace=pubItem.namespace, stage=publishEvents.POST_PROCESS_STAGE, numBytes=result['numBytes'], duration=result['duration'])
+                    self._finalizeOutputs(journal, fullPathFilename, outputs, result, exportFile)
+                    om.MGlobal.displayInfo('"{0}" animation has exported successfully.'.format(pubItem.namespace))
+                    self._emit(publishEvents.ITEM_FINISHED, namespace=pubItem.namespace, fbxFile=fullPathFilename, duration=time.time() - itemStartTime)
+            except Exception:  # One broken item does not stop the others, the journal keeps it for the next publish
+                cmds.refresh(suspend=False)
+                del self.results[numResults:]
+                self._failItem(pubItem.namespace, fullPathFilename, outputFiles, traceback.format_exc(), time.time() - itemStartTime)
+
+        if postProcessPool:
+            pendingResults = [result for result in self.results if result.pop('pending', False)]
+            with publishTracer.span('waitPostProcess'):
+                poolResults = postProcessPool.join()
+            for itemResult, result in zip(pendingResults, poolResults):
+                fbxFile = itemResult['fbxFile']
+                itemResult.update(result)
+                itemResult['fbxFile'] = fbxFile
+                itemDuration = itemResult['exportTime'] + result['duration']
+                if result['error']:
+                    self._emit(publishEvents.ITEM_FAILED, namespace=result['namespace'], fbxFile=fbxFile, error=result['error'], duration=itemDuration)
+                    om.MGlobal.displayError('"{0}" animation has failed to post process.\n{1}'.format(result['namespace'], result['error']))
+                    continue
+
+                self._emit(publishEvents.STAGE_FINISHED, namespace=result['namespace'], stage=publishEvents.POST_PROCESS_STAGE, numBytes=result['numBytes'], duration=result['duration'])
+                exportFile, outputs = stagingFiles[fbxFile]
+                try:
+                    self._finalizeOutputs(journal, fbxFile, outputs, itemResult, exportFile)
+                except Exception:
+                    self.results.remove(itemResult)
+                    self._failItem(result['namespace'], fbxFile, itemResult['outputFiles'], traceback.format_exc(), itemDuration)
+                    continue
+                om.MGlobal.displayInfo('"{0}" animation has exported successfully.'.format(result['namespace']))
+                self._emit(publishEvents.ITEM_FINISHED, namespace=result['namespace'], fbxFile=fbxFile, duration=itemDuration)
+
+        if exportOptionsState.numApplied:
+            om.MGlobal.displayInfo(exportOptionsState.getReport())
 
-            cmds.refresh(suspend=True)
+        self._recoverScenePlaybackRange()
 
-            cmds.select(pubItem.exportNodes, r=True)
-            utils.setFBXExportOptions(pubItem.startFrame, pubItem.endFrame, pubItem.exportBlendshape)
-            fullPathFilename = os.path.join(pubItem.exportDirectory, pubItem.filename).replace('\\', '/') + '.fbx'
-            mel.eval('FBXExport -f "{0}" -s'.format(fullPathFilename))
+        if self.transferPool:
+            self.transferPool.finish(functools.partial(self._onTransfersFinished, pubCache, fingerprints, journal))
+            om.MGlobal.displayInfo('Published files are being transferred to export directories in background.')
+        else:
+            self._completePublish(pubCache, fingerprints, journal)
+
+    def _getPublishFile(self, pubItem):
+        return os.path.join(pubItem.exportDirectory, pubItem.filename).replace('\\', '/') + '.fbx'
+
+    def _removeStagingFiles(self, entry):
+        for stagingFile in [entry['exportFile'], entry['processedFile']] + [processedFile for processedFile, _ in entry['outputs']]:
+            if stagingFile and os.path.exists(stagingFile):
+                os.remove(stagingFile)
+
+    def _failItem(self, namespace, fbxFile, outputFiles, error, duration):
+        self.results.append({'fbxFile': fbxFile, 'outputFiles': outputFiles, 'namespace': namespace, 'numBytes': 0, 'duration': duration, 'error': error})
+        om.MGlobal.displayError('"{0}" animation has failed to publish.\n{1}'.format(namespace, error))
+        self._emit(publishEvents.ITEM_FAILED, namespace=namespace, fbxFile=fbxFile, error=error, duration=duration)
+
+    def _completePublish(self, pubCache, fingerprints, journal):
+        """Bookkeeping after all files have arrived, it runs on the transfer thread with local staging so no maya calls here."""
+        if pubCache:
+            for result in self.results:
+                if (not result.get('skipped') or result.get('resumed')) and not result['error']:
+                    for finalFile in result['outputFiles']:
+                        pubCache.update(finalFile, fingerprints[result['fbxFile']])
+            pubCache.save()
+
+        if journal and journal.isComplete():  # Failed items keep the journal for the next publish to resume
+            journal.remove()
+
+    def _finalizeOutputs(self, journal, fbxFile, outputs, result, exportFile, recordState=True):
+        """Finalize the post processed files of an item, the raw export is removed once all of them have arrived."""
+        if journal and recordState:
+            for processedFile, _ in outputs:
+                journal.setState(fbxFile, publishJournal.POST_PROCESSED, processedFile)
+        for processedFile, finalFile in outputs:
+            self._finalizeItem(journal, fbxFile, processedFile, finalFile, publishJournal.POST_PROCESSED, result, exportFile)
+
+    def _finalizeItem(self, journal, fbxFile, stagingFile, finalFile, state, result, exportFile=None):
+        """Replace finalFile with the finished staging file and check it arrived intact before the raw export is removed."""
+        if self.transferPool:
+            checksum = journal.getChecksum(fbxFile, state, stagingFile) if journal else None
+            self.transferPool.submit(stagingFile, finalFile, checksum, functools.partial(self._onTransferred, journal, fbxFile, finalFile, result, exportFile))
+            return
+
+        with tracer.getTracer().span('finalize'):
+            checksum = journal.getChecksum(fbxFile, state, stagingFile) if journal else None
+            if os.path.dirname(os.path.abspath(stagingFile)) == os.path.dirname(os.path.abspath(finalFile)):
+                fileUtils.replaceFile(stagingFile, finalFile)
+            else:  # Resumed from files staged by an earlier publish with local staging
+                checksum = fileTransfer.transferFile(stagingFile, finalFile, checksum)
+
+            if journal:
+                journal.setState(fbxFile, publishJournal.VERIFIED, finalFile, checksum)
+
+            self._onOutputVerified(result, finalFile, exportFile)
+
+    def _onTransferred(self, journal, fbxFile, finalFile, result, exportFile, transferResult):
+        result['transferTime'] = result.get('transferTime', 0.0) + transferResult['duration']
+        self._emit(publishEvents.STAGE_FINISHED, namespace=result['namespace'], stage=publishEvents.TRANSFER_STAGE, fbxFile=finalFile, numBytes=transferResult['numBytes'], duration=transferResult['duration'], error=transferResult['error'])
+        if transferResult['error']:
+            result['error'] = transferResult['error']
+            utils.executeDeferred(om.MGlobal.displayError, '"{0}" animation has failed to transfer to "{1}".\n{2}'.format(result['namespace'], finalFile, transferResult['error']))
+            return
+
+        if journal:
+            journal.setState(fbxFile, publishJournal.VERIFIED, finalFile, transferResult['checksum'])
+        self._onOutputVerified(result, finalFile, exportFile)
+
+    def _onOutputVerified(self, result, finalFile, exportFile):
+        with self._resultLock:
+            result.setdefault('verifiedFiles', []).append(finalFile)
+            if len(result['verifiedFiles']) < len(result['outputFiles']):
+                return
+        if exportFile and os.path.exists(exportFile):
+            os.remove(exportFile)
+
+    def _onTransfersFinished(self, pubCache, fingerprints, journal, transferResults):
+        self._completePublish(pubCache, fingerprints, journal)
+
+        numFailed = len([transferResult for transferResult in transferResults if transferResult['error']])
+        message = '{0} of {1} published files have transferred to export directories.'.format(len(transferResults) - numFailed, len(transferResults))
+        utils.executeDeferred(om.MGlobal.displayWarning if numFailed else om.MGlobal.displayInfo, message)
+
+    def _exportShared(self, items, exportProfile, exportOptionsState):
+        """
+        Export items with the same range and options in one bake and split it to export files of the items.
+        items are (pubItem, exportFile) pairs, return export time of each shared item by namespace.
+        """
+        publishTracer = tracer.getTracer()
+
+        groups = collections.OrderedDict()
+        for pubItem, exportFile in items:
+            startFrame, endFrame = pubItem.getExportRange()
+            groups.setdefault((float(startFrame), float(endFrame), pubItem.exportBlendshape), []).append((pubItem, exportFile))
+
+        exportTimes = {}
+        for (startFrame, endFrame, exportBlendshape), groupItems in groups.items():
+            if len(groupItems) < 2 or self._cancelRequested:
+                continue
 
-            cmds.refresh(suspend=False)
+            startTime = time.time()
+            with publishTracer.span('sharedExport', items=len(groupItems)):
+                fd, sharedFile = tempfile.mkstemp(suffix='.fbx', prefix='sharedBake_', dir=os.path.dirname(groupItems[0][1]))
+                os.close(fd)
+                try:
+                    self._setPlaybackRange(startFrame, endFrame)
 
-            self._editFBX(fullPathFilename, pubItem)
-            om.MGlobal.displayInfo('"{0}" animation has exported successfully.'.format(pubItem.namespace))
+                    cmds.refresh(suspend=True)
 
-        self._recoverScenePlaybackRange()
+                    with publishTracer.span('select'):
+                        cmds.select([node for pubItem, _ in groupItems for node in pubItem.exportNodes], r=True)
+                    with publishTracer.span('exportOptions'):
+                        exportOptionsState.apply(exportProfiles.getItemOptions(exportProfile, startFrame, endFrame, exportBlendshape), mel.eval)
+                    with publishTracer.span('fbxExport', frames=endFrame - startFrame + 1):
+                        mel.eval('FBXExport -f "{0}" -s'.format(sharedFile))
 
-        return True
+                    cmds.refresh(suspend=False)
 
-    def _setPlaybackRange(self, pubItem):
-        pm.env.setMinTime(pubItem.startFrame)
-        pm.env.setMaxTime(pubItem.endFrame)
+                    with publishTracer.span('splitSharedBake'):
+                        fbxSplitter.splitFile(sharedFile, dict((pubItem.fullNamespace, exportFile) for pubItem, exportFile in groupItems))
+                except Exception:  # Items of the group are exported one by one instead
+                    cmds.refresh(suspend=False)
+                    om.MGlobal.displayWarning('Shared bake has failed, animations are exported one by one.\n{0}'.format(traceback.format_exc()))
+                    continue
+                finally:
+                    if os.path.exists(sharedFile):
+                        os.remove(sharedFile)
 
-    def _recoverScenePlaybackRange(self):
-        pm.env.setMinTime(self._minTime)
-        pm.env.setMaxTime(self._maxTime)
+            exportTime = (time.time() - startTime) / len(groupItems)
+            for pubItem, _ in groupItems:
+                exportTimes[pubItem.namespace] = exportTime
+            om.MGlobal.displayInfo('{0} animations have been baked together from {1:g} to {2:g}.'.format(len(groupItems), startFrame, endFrame))
+
+        return exportTimes
+
+    def _setPlaybackRange(self, startFrame, endFrame):
+        cmds.playbackOptions(minTime=startFrame, maxTime=endFrame)
 
-    def _editFBX(self, fbxFile, pubItem):
+    def _recoverScenePlaybackRange(self):
+        cmds.playbackOptions(minTime=self._minTime, maxTime=self._maxTime)
+
+    def _getOutputs(self, pubItem, fbxFile, processedFile, stagingDir=None, postProcess=True):
+        """Return (processedFile, finalFile) of each file the item is published to, one per clip when the item has clips."""
+        if not pubItem.clips or not postProcess:
+            return [(processedFile, fbxFile)]
+
+        outputs = []
+        for clip in pubItem.clips:
+            clipFile = '{0}_{1}.fbx'.format(fbxFile[:-4], clip['name'])
+            outputs.append((publishJournal.getStagingFiles(clipFile, stagingDir)[1], clipFile))
+        return outputs
+
+    def _getEditJob(self, fbxFile, pubItem, outFile=None, outputs=None):
+        rootJnt = [item for item in pubItem.exportNodes if cmds.nodeType(item) == 'joint'][0]
+        keyReduction = None
+        if pubItem.settings.get('keyReduction', False):
+            keyReduction = {
+                'tolerance': pubItem.settings.get('keyReductionTolerance', keyReducer.DEFAULT_TOLERANCE),
+                'precision': pubItem.settings.get('keyPrecision'),
+            }
+        pruning = None
+        if pubItem.settings.get('pruneStaticChannels', False):
+            pruning = {
+                'tolerance': pubItem.settings.get('staticChannelTolerance', fbxPruner.DEFAULT_TOLERANCE),
+                'keepChannels': pubItem.settings.get('keepChannels', []),
+            }
+        clips = None
+        if pubItem.clips and outputs:
+            clips = [{'startFrame': clip['startFrame'], 'endFrame': clip['endFrame'], 'outFile': clipOutFile} for clip, (clipOutFile, _) in zip(pubItem.clips, outputs)]
+        verify = None
+        if pubItem.settings.get('verifyPublish', True):
+            verify = self._getVerifyArgs(pubItem, keyReduction is None, outputs or [(outFile, fbxFile)], clips)
+        return postProcessor.createEditJob(fbxFile, rootJnt, pubItem.namespace, pubItem.bakeSpace, pubItem.settings.get('fbxEditMode', 'stream'), pubItem.exportBinary, keyReduction, outFile, clips, pruning, verify)
+
+    def _getVerifyArgs(self, pubItem, isBakedKeys, outputs, clips=None):
+        """Verifier arguments of each output, every frame has a key unless keys are reduced by the exporter or in post processing."""
+        profile = exportProfiles.getProfile(pubItem.settings)
+        exactKeyCount = isBakedKeys and profile['FBXExportBakeComplexAnimation'] and profile['FBXExportBakeComplexStep'] == 1 and not profile['FBXExportApplyConstantKeyReducer']
+        ranges = [(clip['startFrame'], clip['endFrame']) for clip in clips] if clips else [pubItem.getExportRange()]
+
+        verifyArgs = []
+        for (startFrame, endFrame), (_, finalFile) in zip(ranges, outputs):
+            verifyArgs.append({
+                'startFrame': startFrame,
+                'endFrame': endFrame,
+                'exactKeyCount': exactKeyCount,
+                'reportFile': fbxVerifier.getReportFile(finalFile),
+                'publishFile': finalFile,
+            })
+        return verifyArgs
+
+    def _editFBX(self, fbxFile, pubItem, outFile=None, outputs=None):
         performChecker = utils.PerformanceChecker()
 
-        with open(fbxFile, 'r') as f:
-            contents = f.read()
-
-        # Show joints
-        performChecker.start('Show Joint')
-        subStrs = ''
-        pattern = re.compile(r'\tModel:.*?"LimbNode" {.*?}.*?}\n', re.DOTALL)
-        finds = pattern.findall(contents)
-        if finds:
-            for find in finds:
-                subStr = re.sub(r'(\tP: "Show".*?),\d', r'\1,1', find)
-                subStrs += subStr
-        contents = contents.replace(''.join(finds), subStrs)
-        performChecker.end()
-
-        # Parent root joint to the world
-        performChecker.start('Parent Root Joint to World')
-        rootJnt = [item for item in pubItem.exportNodes if pm.nodeType(item) == 'joint'][0]
-        contents = re.sub(r'(\t;Model.*?{0}, Model::).*?(\n\tC: "OO",\d+),\d+\n'.format(rootJnt), r'\1RootNode\2,0\n', contents)
-        performChecker.end()
-
-        # If bake space is local space, set root joint to default state
-        if pubItem.bakeSpace == 'local':
-            # Set default root joint state
-            newRootJntProperties = '''
-                        P: "PreRotation", "Vector3D", "Vector", "",-90,0,0
-                        P: "RotationActive", "bool", "", "",1
-                        P: "InheritType", "enum", "", "",1
-                        P: "ScalingMax", "Vector3D", "Vector", "",0,0,0
-                        P: "Show", "bool", "", "",1
-                        P: "DefaultAttributeIndex", "int", "Integer", "",0
-                        P: "Lcl Translation", "Lcl Translation", "", "A",0,0,0
-                        P: "Lcl Rotation", "Lcl Rotation", "", "A+",0,0,0
-            '''
-            oldRootJntBlock = re.search(r'\tModel:.*?"Model::.*?%s", "LimbNode" {.*?{(.*?)\t\t}.*?}\n' % (rootJnt), contents, re.DOTALL)
-            oldRootJntProperties = oldRootJntBlock.group(1)
-            newRootJntBlock = oldRootJntBlock.group().replace(oldRootJntProperties, newRootJntProperties)
-            contents = contents.replace(oldRootJntBlock.group(), newRootJntBlock)
-
-            contents = re.sub(r'\t;AnimCurveNode::.*?Model::.*?%s\n\tC: "OP".*?\n' %(rootJnt), '', contents)  # Remove root joint anim curves
-
-        # Remove namespace
-        performChecker.start('Remove Namespace')
-        contents = contents.replace(':'+pubItem.namespace, '')
-        performChecker.end()
-
-        with open(fbxFile, 'w') as f:
-            f.write(contents)
+        performChecker.start('postProcess')
+        editJob = self._getEditJob(fbxFile, pubItem, outFile, outputs)
+        numBytes = postProcessor.editFBX(editJob)
+        performChecker.end(numBytes)
+
+        return {'fbxFile': fbxFile, 'namespace': pubItem.namespace, 'numBytes': numBytes, 'duration': performChecker.duration, 'error': None}
 
 
 class PublishItem(object):
     BAKE_SPACES = ['world', 'local']
     DEFAULT_IMAGE = ':noPreview.png'
     IMAGE_EXT = 'jpg'
+    CLIP_PATTERN = re.compile(r'^\s*(\w+)\s*:\s*(-?[\d.]+)\s*-\s*(-?[\d.]+)\s*$')
 
-    def __init__(self, refNode=None, exportDirectory='', filename='', enable=True, bakeSpace='world', startFrame=0, endFrame=1, exportSkeleton=True, exportBlendshape=False):
-        self.refNode = refNode
+    def __init__(self, record, exportDirectory='', filename='', enable=True, bakeSpace='world', startFrame=0, endFrame=1, exportSkeleton=True, exportBlendshape=False, exportBinary=None, clips=None):
+        """record is the reference record of a SceneIndex, one index of the scene is shared by all items."""
+        self.refNode = record.refNode
         self.exportDirectory = exportDirectory
         self.filename = filename
         self.enable = enable
@@ -136,25 +585,70 @@ class PublishItem(object):
         self.endFrame = endFrame
         self.exportSkeleton = exportSkeleton
         self.exportBlendshape = exportBlendshape
+        self.exportBinary = exportBinary
+        self.clips = clips or []  # Dictionaries with name, startFrame and endFrame, all clips are split from one bake
 
         self.refFile = None
+        self.rigFile = None
         self.image = None
         self.namespace = None
+        self.fullNamespace = None
         self.exportNodes = None
 
         self.settings = utils.getSettings()
+        if self.exportBinary is None:
+            self.exportBinary = self.settings.get('exportBinaryFBX', False)
+
+        self.__getReferenceInfo(record)
 
-        self.__getReferenceInfo()
+        settingsStore.getStore().addListener(self.onSettingsChanged)
 
-    def __getReferenceInfo(self):
-        self.refFile = cmds.referenceQuery(self.refNode, filename=True)
-        self.image = PublishItem.getImage(self.refFile)
-        self.namespace = cmds.referenceQuery(self.refNode, namespace=True).split(':')[-1]
-        self.exportNodes = cmds.sets('{0}:{1}'.format(self.namespace, self.settings['exportSetName']), q=True)
-        self.exportDirectory = self.getExportDirectory(self.refFile)
+    def onSettingsChanged(self, settings):
+        defaultExportDirectory = self.getExportDirectory(self.refFile)
+        self.settings = settings
+
+        if self.exportDirectory == defaultExportDirectory:  # Follow the new default unless user has changed it
+            self.exportDirectory = self.getExportDirectory(self.refFile)
+
+    def __getReferenceInfo(self, record):
+        self.refFile = record.refFile
+        self.rigFile = record.rigFile
+        self.image = PublishItem.DEFAULT_IMAGE  # Real image is looked up by the ui in background
+        self.namespace = record.namespace
+        self.fullNamespace = record.fullNamespace.lstrip(':')  # Names in exported files have the whole namespace path
+        self.exportNodes = list(record.exportNodes)
+        self.exportDirectory = self.exportDirectory or self.getExportDirectory(self.refFile)
         self.filename = self.namespace
-        self.startFrame = cmds.playbackOptions(q=True, min=True)
-        self.endFrame = cmds.playbackOptions(q=True, max=True)
+        self.startFrame = record.startFrame
+        self.endFrame = record.endFrame
+
+    def getExportRange(self):
+        """Range to bake, the union of the clip ranges when the item has clips."""
+        if not self.clips:
+            return self.startFrame, self.endFrame
+        return min(clip['startFrame'] for clip in self.clips), max(clip['endFrame'] for clip in self.clips)
+
+    @staticmethod
+    def parseClips(text):
+        """Parse clips written as "idle:1-30, loop:31-90", raise ValueError when text is not valid."""
+        clips = []
+        for token in text.split(','):
+            if not token.strip():
+                continue
+            match = PublishItem.CLIP_PATTERN.match(token)
+            if not match:
+                raise ValueError('"{0}" is not a clip, clips are written as name:start-end.'.format(token.strip()))
+            name, startFrame, endFrame = match.group(1), float(match.group(2)), float(match.group(3))
+            if startFrame > endFrame:
+                raise ValueError('"{0}" clip ends before it starts.'.format(name))
+            if name in [clip['name'] for clip in clips]:
+                raise ValueError('"{0}" clip is defined more than once.'.format(name))
+            clips.append({'name': name, 'startFrame': startFrame, 'endFrame': endFrame})
+        return clips
+
+    @staticmethod
+    def formatClips(clips):
+        return ', '.join('{0}:{1:g}-{2:g}'.format(clip['name'], clip['startFrame'], clip['endFrame']) for clip in clips)
 
     @staticmethod
     def getImage(refFile):
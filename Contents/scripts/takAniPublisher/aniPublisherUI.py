@@ -16,11 +16,15 @@ import maya.OpenMayaUI as omui
 import maya.cmds as cmds
 
 import os
+import time
 from shiboken2 import wrapInstance
 from PySide2 import QtWidgets, QtCore, QtGui
 
+from . import settingsStore
 from . import settingsUI
-reload(settingsUI)
+from . import tracer
+from . import thumbnailService
+from . import publishEvents
 
 
 def getMayaMainWin():
@@ -33,20 +37,25 @@ def getMayaMainWin():
 
 
 class AniPublisherUI(QtWidgets.QDialog):
-    def __init__(self, aniPublisher=None, parent=getMayaMainWin()):
-        super(AniPublisherUI, self).__init__(parent)
+    MASTER_EDIT_DELAY = 300  # Milliseconds to wait for typing to stop before master edits are applied to items
+
+    def __init__(self, aniPublisher=None, parent=None):
+        super(AniPublisherUI, self).__init__(parent or getMayaMainWin())
 
         self.aniPubObj = aniPublisher
-        self.publishItemWidgets = []
+        self.isPublishing = False
 
         self.setWindowTitle('{0} - {1}'.format(self.aniPubObj.NAME, self.aniPubObj.VERSION))
         self.setWindowIcon(QtGui.QIcon(':out_timeEditorAnimSource.png'))
         self.resize(1000, 1000)
 
-        self.createWidgets()
-        self.createLayouts()
-        self.createConnections()
-        self.setInitialState()
+        with tracer.getTracer().span('buildUI', category='ui', numItems=len(self.aniPubObj.publishItems)):
+            self.createWidgets()
+            self.createLayouts()
+            self.createConnections()
+            self.setInitialState()
+
+        settingsStore.getStore().addListener(self.onSettingsChanged)
 
     def createWidgets(self):
         self.menuBar = QtWidgets.QMenuBar()
@@ -60,8 +69,17 @@ class AniPublisherUI(QtWidgets.QDialog):
         self.itemMasterStartFrameLe = QtWidgets.QLineEdit()
         self.itemMasterEndFrameLe = QtWidgets.QLineEdit()
 
-        for item in self.aniPubObj.publishItems:
-            self.publishItemWidgets.append(PublishItemWidget(item))
+        self.masterEditTimer = QtCore.QTimer(self)
+        self.masterEditTimer.setSingleShot(True)
+        self.masterEditTimer.setInterval(AniPublisherUI.MASTER_EDIT_DELAY)
+        self._pendingMasterEdits = {}
+
+        self.itemModel = PublishItemTableModel(self.aniPubObj.publishItems, parent=self)
+        self.itemView = QtWidgets.QTableView()
+        self.itemView.setModel(self.itemModel)
+        self.itemView.setItemDelegate(PublishItemDelegate(self.itemView))
+
+        self.progressPanel = PublishProgressPanel()
 
         self.publishBtn = QtWidgets.QPushButton('Publish Animation')
 
@@ -84,20 +102,9 @@ class AniPublisherUI(QtWidgets.QDialog):
         itemMasterLayout.addWidget(masterFrameWdg)
         mainLayout.addLayout(itemMasterLayout)
 
-        scrollArea = QtWidgets.QScrollArea()
-        scrollArea.setWidgetResizable(True)
-        scrollWidget = QtWidgets.QWidget()
-        scrollWidget.setSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Maximum)
-        scrollLayout = QtWidgets.QVBoxLayout()
-
-        for publishItemWidget in self.publishItemWidgets:
-            scrollLayout.addWidget(publishItemWidget)
-            AniPublisherUI.addSeparator(scrollLayout)
-
-        scrollWidget.setLayout(scrollLayout)
-        scrollArea.setWidget(scrollWidget)
-        mainLayout.addWidget(scrollArea)
+        mainLayout.addWidget(self.itemView)
 
+        mainLayout.addWidget(self.progressPanel)
         mainLayout.addWidget(self.publishBtn)
 
     def createConnections(self):
@@ -109,37 +116,69 @@ class AniPublisherUI(QtWidgets.QDialog):
         self.itemMasterExportDirLe.textChanged.connect(self.setItemWidgetsExportDir)
         self.itemMasterStartFrameLe.textChanged.connect(self.setItemWidgetsStartFrame)
         self.itemMasterEndFrameLe.textChanged.connect(self.setItemWidgetsEndFrame)
+        self.masterEditTimer.timeout.connect(self.applyMasterEdits)
         self.publishBtn.clicked.connect(self.publishAnimation)
+        self.progressPanel.cancelRequested.connect(self.aniPubObj.cancel)
 
     def showSettingsUI(self):
         setUI = settingsUI.SettingsUI(self)
         setUI.show()
 
+    def onSettingsChanged(self, settings):
+        self.itemModel.refreshColumn('exportDirectory')
+
     def setInitialState(self):
         self.itemMasterChkBox.setCheckState(QtCore.Qt.Checked)
         self.itemMasterBakeSpaceCb.addItems(['world', 'local'])
         self.itemMasterGetDirectoryBtn.setIcon(QtGui.QIcon(':fileOpen.png'))
 
+        self.itemView.setIconSize(QtCore.QSize(PublishItemTableModel.THUMBNAIL_SIZE, PublishItemTableModel.THUMBNAIL_SIZE))
+        self.itemView.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked | QtWidgets.QAbstractItemView.SelectedClicked | QtWidgets.QAbstractItemView.EditKeyPressed)
+        self.itemView.verticalHeader().hide()
+        self.itemView.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)  # No per row size hint calculation
+        self.itemView.verticalHeader().setDefaultSectionSize(PublishItemTableModel.THUMBNAIL_SIZE + 10)
+        self.itemView.horizontalHeader().setSectionResizeMode(PublishItemTableModel.COLUMNS.index('exportDirectory'), QtWidgets.QHeaderView.Stretch)
+
+        self.progressPanel.hide()
+
     def setItemWidgetsBakeSapce(self, space):
-        for itemWidget in self.publishItemWidgets:
-            if itemWidget.publishItem.enable:
-                itemWidget.bakeSpaceCb.setCurrentText(space)
+        self.itemModel.setColumnData('bakeSpace', space)
 
     def setItemWidgetsEnable(self, val):
-        for itemWidget in self.publishItemWidgets:
-            if val == QtCore.Qt.Checked:
-                itemWidget.enableChkBox.setCheckState(QtCore.Qt.Checked)
-            else:
-                itemWidget.enableChkBox.setCheckState(QtCore.Qt.Unchecked)
+        self.itemModel.setColumnData('enable', val == QtCore.Qt.Checked, enabledOnly=False)
 
-    def publishAnimation(self):
-        pubItems = []
-        for pubItemWidget in self.publishItemWidgets:
-            pubItems.append(pubItemWidget.publishItem)
-        self.aniPubObj.setItems(pubItems)
-        jobDone = self.aniPubObj.publish()
+    def setPublishing(self, isPublishing):
+        """Lock everything that changes items or settings, qt events are processed while the publish runs."""
+        self.isPublishing = isPublishing
+        widgets = [self.menuBar, self.itemMasterChkBox, self.itemMasterBakeSpaceCb, self.itemMasterExportDirLe, self.itemMasterGetDirectoryBtn,
+                   self.itemMasterStartFrameLe, self.itemMasterEndFrameLe, self.itemView, self.publishBtn]
+        widgets.extend(self.findChildren(settingsUI.SettingsUI))
+        for widget in widgets:
+            widget.setEnabled(not isPublishing)
 
-        if jobDone:
+    def publishAnimation(self):
+        if self.masterEditTimer.isActive():  # Typed master edits are applied before the items are published
+            self.masterEditTimer.stop()
+            self.applyMasterEdits()
+        self.aniPubObj.setItems(self.itemModel.publishItems)
+
+        resume = None
+        if self.aniPubObj.settings.get('resumePublish', True) and self.aniPubObj.hasInterruptedPublish():
+            answer = QtWidgets.QMessageBox.question(self, 'Resume Publish', 'Previous publish of this scene has been interrupted.\nResume it and skip items that have finished?')
+            resume = answer == QtWidgets.QMessageBox.Yes
+
+        self.setPublishing(True)
+        self.progressPanel.show()
+        self.aniPubObj.addListener(self.progressPanel.onEvent)
+        try:
+            jobDone = self.aniPubObj.publish(resume=resume)
+            self.aniPubObj.waitForTransfers(onWait=QtWidgets.QApplication.processEvents)  # Keep listening until staged files have transferred
+        finally:
+            self.aniPubObj.removeListener(self.progressPanel.onEvent)
+            self.setPublishing(False)
+
+        tracker = self.progressPanel.tracker
+        if jobDone and not tracker.numFailed and not tracker.numFailedTransfers:  # Keep the panel open to show what has failed or been cancelled
             self.close()
 
     def setDirectoryPath(self, widget):
@@ -151,188 +190,387 @@ class AniPublisherUI(QtWidgets.QDialog):
         widget.setText(dirPath)
 
     def setItemWidgetsExportDir(self, text):
-        for itemWidget in self.publishItemWidgets:
-            if itemWidget.publishItem.enable:
-                itemWidget.exportDirectoryLe.setText(text)
+        self._pendingMasterEdits['exportDirectory'] = text
+        self.masterEditTimer.start()
 
     def setItemWidgetsStartFrame(self, text):
-        for itemWidget in self.publishItemWidgets:
-            if itemWidget.publishItem.enable:
-                itemWidget.startFrameLe.setText(text)
+        self._pendingMasterEdits['startFrame'] = text
+        self.masterEditTimer.start()
 
     def setItemWidgetsEndFrame(self, text):
-        for itemWidget in self.publishItemWidgets:
-            if itemWidget.publishItem.enable:
-                itemWidget.endFrameLe.setText(text)
-
-    def closeEvent(self, event):
-        super(AniPublisherUI, self).closeEvent(event)
-
-        for item in self.children():
-            try:
-                item.close()
-            except:
-                pass
-
-    @staticmethod
-    def addSeparator(layout):
-        separator = QtWidgets.QFrame()
-        separator.setFrameShape(QtWidgets.QFrame.HLine)
-        separator.setFrameShadow(QtWidgets.QFrame.Sunken)
-        layout.addWidget(separator)
-
-
-class PublishItemWidget(QtWidgets.QWidget):
-    def __init__(self, publishItem):
-        super(PublishItemWidget, self).__init__()
-
-        self.publishItem = publishItem
-
-        self.createWidgets()
-        self.createLayouts()
-        self.createConnections()
-        self.initializeWidgets()
-
-    def createWidgets(self):
-        self.enableChkBox = QtWidgets.QCheckBox()
+        self._pendingMasterEdits['endFrame'] = text
+        self.masterEditTimer.start()
 
-        self.imageLabel = QtWidgets.QLabel()
-        self.imageLabelText = QtWidgets.QLabel()
+    def applyMasterEdits(self):
+        pendingMasterEdits = self._pendingMasterEdits
+        self._pendingMasterEdits = {}
 
-        self.bakeSpaceLabel = QtWidgets.QLabel('Bake Space:')
-        self.bakeSpaceCb = QtWidgets.QComboBox()
-
-        self.exportDirectoryLabel = QtWidgets.QLabel('Export Directory:')
-        self.exportDirectoryLe = QtWidgets.QLineEdit()
-        self.getDirectoryBtn = QtWidgets.QPushButton()
+        for attr, value in pendingMasterEdits.items():
+            if attr == 'exportDirectory':
+                self.itemModel.pathChecker.request(value, self._applyMasterExportDirectory)
+            else:
+                self.itemModel.setColumnData(attr, value)
 
-        self.filenameLabel = QtWidgets.QLabel('Filename:')
-        self.filenameLe = QtWidgets.QLineEdit()
+    def _applyMasterExportDirectory(self, path, exists):
+        if path != self.itemMasterExportDirLe.text():  # Ignore results of outdated text
+            return
 
-        self.frameRangeLabel = QtWidgets.QLabel('Frame Range:')
-        self.startFrameLe = QtWidgets.QLineEdit()
-        self.endFrameLe = QtWidgets.QLineEdit()
+        self.itemMasterExportDirLe.setStyleSheet('' if exists or not path else 'color: red;')
+        if exists:
+            self.itemModel.setColumnData('exportDirectory', path)
+        elif path:
+            cmds.warning('Export directory "{0}" does not exist, it is not applied to the items.'.format(path))
 
-        self.exportOptionLabel = QtWidgets.QLabel('Export Options:')
-        self.exportSkeletonChkBox = QtWidgets.QCheckBox('Skeleton')
-        self.exportBlendshapeChkBox = QtWidgets.QCheckBox('Blendshape')
+    def cancelPublish(self):
+        if self.progressPanel.cancelBtn.isEnabled():
+            self.progressPanel.requestCancel()
 
-    def createLayouts(self):
-        mainLayout = QtWidgets.QHBoxLayout(self)
-
-        mainLayout.addWidget(self.enableChkBox)
-        PublishItemWidget.addSeparator(mainLayout)
-
-        imageLayout = QtWidgets.QVBoxLayout()
-        imageLayout.addWidget(self.imageLabel, 1, QtCore.Qt.AlignCenter)
-        imageLayout.addWidget(self.imageLabelText, 1, QtCore.Qt.AlignCenter)
-        mainLayout.addLayout(imageLayout)
-        PublishItemWidget.addSeparator(mainLayout)
-
-        publishOptionLayout = QtWidgets.QGridLayout()
-        publishOptionLayout.addWidget(self.bakeSpaceLabel, 0, 0, QtCore.Qt.AlignRight)
-        publishOptionLayout.addWidget(self.bakeSpaceCb, 0, 1)
-
-        publishOptionLayout.addWidget(self.exportDirectoryLabel, 1, 0, QtCore.Qt.AlignRight)
-        publishOptionLayout.addWidget(self.exportDirectoryLe, 1, 1)
-        publishOptionLayout.addWidget(self.getDirectoryBtn, 1, 2)
-
-        publishOptionLayout.addWidget(self.filenameLabel, 2, 0, QtCore.Qt.AlignRight)
-        publishOptionLayout.addWidget(self.filenameLe, 2, 1)
-
-        publishOptionLayout.addWidget(self.frameRangeLabel, 3, 0, QtCore.Qt.AlignRight)
-        frameWdg = QtWidgets.QWidget()
-        frameWdg.setFixedWidth(200)
-        frameLo = QtWidgets.QHBoxLayout(frameWdg)
-        frameLo.addWidget(self.startFrameLe)
-        waveSign = QtWidgets.QLabel('~')
-        frameLo.addWidget(waveSign)
-        frameLo.addWidget(self.endFrameLe)
-        publishOptionLayout.addWidget(frameWdg, 3, 1)
-
-        publishOptionLayout.addWidget(self.exportOptionLabel, 4, 0, QtCore.Qt.AlignRight)
-        exportOptionWidget = QtWidgets.QWidget()
-        exportOptionWidget.setFixedWidth(250)
-        exportOptionLayout = QtWidgets.QHBoxLayout(exportOptionWidget)
-        exportOptionLayout.addWidget(self.exportSkeletonChkBox)
-        exportOptionLayout.addWidget(self.exportBlendshapeChkBox)
-        publishOptionLayout.addWidget(exportOptionWidget, 4, 1)
-
-        mainLayout.addLayout(publishOptionLayout)
+    def reject(self):
+        if self.isPublishing:  # Escape key
+            self.cancelPublish()
+            return
+        super(AniPublisherUI, self).reject()
 
-    def createConnections(self):
-        self.enableChkBox.stateChanged.connect(self.setPublishItemEnable)
-        self.bakeSpaceCb.currentTextChanged.connect(self.setPublishItemBakeSapce)
-        self.getDirectoryBtn.clicked.connect(lambda : self.setDirectoryPath(self.exportDirectoryLe))
-        self.exportDirectoryLe.textChanged.connect(self.setPublishItemExportDirectory)
-        self.filenameLe.textChanged.connect(self.setPublishItemFilename)
-        self.startFrameLe.textChanged.connect(self.setStartFrame)
-        self.endFrameLe.textChanged.connect(self.setEndFrame)
-        self.exportSkeletonChkBox.stateChanged.connect(self.setPublishItemExportSkeleton)
-        self.exportBlendshapeChkBox.stateChanged.connect(self.setPublishItemExportBlendshape)
+    def closeEvent(self, event):
+        if self.isPublishing:  # Closing during a publish cancels it, the window can be closed once it has stopped
+            event.ignore()
+            self.cancelPublish()
+            return
 
-    def initializeWidgets(self):
-        self.enableChkBox.setCheckState(QtCore.Qt.Checked)
+        super(AniPublisherUI, self).closeEvent(event)
 
-        pixmap = QtGui.QPixmap(self.publishItem.image)
-        self.imageLabel.setPixmap(pixmap.scaled(100, 100, QtCore.Qt.KeepAspectRatio))
+        settingsStore.getStore().removeListener(self.onSettingsChanged)
 
-        self.imageLabelText.setText(self.publishItem.namespace)
-        self.bakeSpaceCb.addItems(self.publishItem.BAKE_SPACES)
-        self.getDirectoryBtn.setIcon(QtGui.QIcon(':fileOpen.png'))
-        self.exportDirectoryLe.setText(self.publishItem.exportDirectory)
-        self.filenameLe.setText(self.publishItem.filename)
+        for item in self.children():
+            try:
+                item.close()
+            except:
+                pass
 
-        self.startFrameLe.setText(str(self.publishItem.startFrame))
-        self.endFrameLe.setText(str(self.publishItem.endFrame))
 
-        self.exportSkeletonChkBox.setChecked(True)
-        self.exportBlendshapeChkBox.setChecked(False)
+class PublishProgressPanel(QtWidgets.QWidget):
+    """
+    Shows publish events while the publish runs in the main thread.
+    Qt events are processed on each publish event so the panel repaints and the cancel button can be clicked.
+    """
+    cancelRequested = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super(PublishProgressPanel, self).__init__(parent)
+        self.tracker = publishEvents.ProgressTracker()
+
+        self.progressBar = QtWidgets.QProgressBar()
+        self.statusLabel = QtWidgets.QLabel()
+        self.statsLabel = QtWidgets.QLabel()
+        self.cancelBtn = QtWidgets.QPushButton('Cancel')
+
+        layout = QtWidgets.QGridLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.progressBar, 0, 0)
+        layout.addWidget(self.cancelBtn, 0, 1)
+        layout.addWidget(self.statusLabel, 1, 0, 1, 2)
+        layout.addWidget(self.statsLabel, 2, 0, 1, 2)
+
+        self.cancelBtn.clicked.connect(self.requestCancel)
+
+    def requestCancel(self):
+        self.cancelBtn.setEnabled(False)
+        self.statusLabel.setText('Cancelling after the current stage...')
+        self.cancelRequested.emit()
+
+    def onEvent(self, event):
+        self.tracker.onEvent(event)
+
+        if event['type'] == publishEvents.PUBLISH_STARTED:
+            self.progressBar.setRange(0, max(1, self.tracker.numItems))
+            self.cancelBtn.setEnabled(True)
+        self.progressBar.setValue(self.tracker.numDone)
+
+        if event['type'] == publishEvents.PUBLISH_FINISHED:
+            self.cancelBtn.setEnabled(False)
+            status = 'Cancelled' if self.tracker.cancelled else 'Finished'
+            self.statusLabel.setText('{0}, {1} of {2} items published, {3} failed.'.format(status, self.tracker.numDone - self.tracker.numFailed, self.tracker.numItems, self.tracker.numFailed))
+        elif event['type'] == publishEvents.ITEM_FAILED:
+            self.statusLabel.setText('"{0}" has failed, see the script editor for details.'.format(event['namespace']))
+        elif event['type'] == publishEvents.STAGE_FINISHED and event['stage'] == publishEvents.TRANSFER_STAGE and self.tracker.endTime:
+            self.statusLabel.setText('{0} files transferred, {1} failed.'.format(self.tracker.numTransfers - self.tracker.numFailedTransfers, self.tracker.numFailedTransfers))
+        elif self.tracker.currentItem and self.cancelBtn.isEnabled():
+            self.statusLabel.setText('{0}: {1}'.format(self.tracker.currentItem, self.tracker.currentStage or 'starting'))
+
+        self.statsLabel.setText('{0} / {1} items    {2}/s    elapsed {3}    remaining {4}'.format(
+            self.tracker.numDone,
+            self.tracker.numItems,
+            publishEvents.formatBytes(self.tracker.getThroughput()),
+            publishEvents.formatDuration(self.tracker.getElapsed()),
+            publishEvents.formatDuration(self.tracker.getRemainingTime()),
+        ))
+
+        QtWidgets.QApplication.processEvents()
+
+
+class PublishItemTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model over publish items, views only ask data of visible rows so editors and thumbnails are created on demand.
+    """
+    COLUMNS = ['enable', 'image', 'bakeSpace', 'exportDirectory', 'filename', 'startFrame', 'endFrame', 'clips', 'exportSkeleton', 'exportBlendshape', 'exportBinary']
+    HEADERS = ['', 'Item', 'Bake Space', 'Export Directory', 'Filename', 'Start', 'End', 'Clips', 'Skeleton', 'Blendshape', 'Binary']
+    CHECK_COLUMNS = ['enable', 'exportSkeleton', 'exportBlendshape', 'exportBinary']
+    THUMBNAIL_SIZE = 100
+
+    def __init__(self, publishItems, pathChecker=None, parent=None):
+        super(PublishItemTableModel, self).__init__(parent)
+        self.publishItems = publishItems
+        self.pathChecker = pathChecker or PathExistsChecker(self)
+
+        self._thumbnails = {}
+        self._defaultThumbnail = None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.publishItems)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(PublishItemTableModel.COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return PublishItemTableModel.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+
+        attr = PublishItemTableModel.COLUMNS[index.column()]
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if attr in PublishItemTableModel.CHECK_COLUMNS:
+            flags |= QtCore.Qt.ItemIsUserCheckable
+        elif attr != 'image':
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        pubItem = self.publishItems[index.row()]
+        attr = PublishItemTableModel.COLUMNS[index.column()]
+
+        if attr in PublishItemTableModel.CHECK_COLUMNS:
+            if role == QtCore.Qt.CheckStateRole:
+                return QtCore.Qt.Checked if getattr(pubItem, attr) else QtCore.Qt.Unchecked
+            return None
+
+        if attr == 'image':
+            if role == QtCore.Qt.DisplayRole:
+                return pubItem.namespace
+            if role == QtCore.Qt.DecorationRole:
+                return self._getThumbnail(pubItem)
+            if role == QtCore.Qt.ToolTipRole:
+                return pubItem.refFile
+            return None
+
+        if attr == 'clips' and role == QtCore.Qt.ToolTipRole:
+            return 'Clips split from one bake of the item, written as "idle:1-30, loop:31-90".'
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            value = getattr(pubItem, attr)
+            if attr == 'clips':
+                return pubItem.formatClips(value)
+            return str(value) if attr in ('startFrame', 'endFrame') else value
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid():
+            return False
+
+        pubItem = self.publishItems[index.row()]
+        attr = PublishItemTableModel.COLUMNS[index.column()]
+
+        if attr in PublishItemTableModel.CHECK_COLUMNS:
+            if role != QtCore.Qt.CheckStateRole:
+                return False
+            value = value == QtCore.Qt.Checked
+        elif role == QtCore.Qt.EditRole:
+            value = self.validate(pubItem, attr, value)
+            if value is None:
+                return False
+            if attr == 'exportDirectory':  # Set once the directory is found to exist, network paths can take long to check
+                self.pathChecker.request(value, lambda path, exists: self._setCheckedDirectory(pubItem, path, exists))
+                return True
+        else:
+            return False
+
+        setattr(pubItem, attr, value)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def setColumnData(self, attr, value, enabledOnly=True):
+        """Set value to the column of all items it is valid for with one change notification, export directories have to be checked before."""
+        if not self.publishItems:
+            return
 
-    def setPublishItemEnable(self, state):
-        self.publishItem.enable = bool(state)
+        for pubItem in self.publishItems:
+            if enabledOnly and not pubItem.enable:
+                continue
+            itemValue = value if attr in PublishItemTableModel.CHECK_COLUMNS else self.validate(pubItem, attr, value)
+            if itemValue is not None:
+                setattr(pubItem, attr, itemValue)
 
-    def setPublishItemBakeSapce(self, text):
-        self.publishItem.bakeSpace = text
+        self.refreshColumn(attr)
 
-    def setDirectoryPath(self, widget):
-        curDir = widget.text()
-        dirPath = QtWidgets.QFileDialog.getExistingDirectory(self, 'Select Export Directory', curDir)
-        if not dirPath:
+    def refreshColumn(self, attr):
+        if not self.publishItems:
             return
+        column = PublishItemTableModel.COLUMNS.index(attr)
+        self.dataChanged.emit(self.index(0, column), self.index(len(self.publishItems) - 1, column))
 
-        widget.setText(dirPath)
-        self.publishItem.exportDirectory = dirPath
+    def validate(self, pubItem, attr, value):
+        """Return value converted for the publish item attribute or None when it is not valid, export directories are checked with pathChecker."""
+        if attr in ('startFrame', 'endFrame'):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+        if attr == 'bakeSpace':
+            return value if value in pubItem.BAKE_SPACES else None
+        if attr in ('exportDirectory', 'filename'):
+            return value or None
+        if attr == 'clips':
+            try:
+                return pubItem.parseClips(value)
+            except ValueError:
+                return None
+        return value
 
-    def setPublishItemExportDirectory(self, exportDir):
-        if not os.path.exists(exportDir):
-            self.exportDirectoryLe.setText(self.publishItem.exportDirectory)
+    def _setCheckedDirectory(self, pubItem, path, exists):
+        if pubItem not in self.publishItems:
             return
 
-        self.publishItem.exportDirectory = exportDir
-
-    def setPublishItemFilename(self, filename):
-        self.publishItem.filename = filename
-
-    def setStartFrame(self, frame):
-        self.publishItem.startFrame = frame
-
-    def setEndFrame(self, frame):
-        self.publishItem.endFrame = frame
+        if exists:
+            pubItem.exportDirectory = path
+        else:  # Cell shows the directory of the item again
+            cmds.warning('Export directory "{0}" does not exist, "{1}" keeps "{2}".'.format(path, pubItem.namespace, pubItem.exportDirectory))
+        row = self.publishItems.index(pubItem)
+        column = PublishItemTableModel.COLUMNS.index('exportDirectory')
+        self.dataChanged.emit(self.index(row, column), self.index(row, column))
+
+    def _getThumbnail(self, pubItem):
+        rigFile = pubItem.rigFile
+        if rigFile not in self._thumbnails:
+            if self._defaultThumbnail is None:
+                size = PublishItemTableModel.THUMBNAIL_SIZE
+                self._defaultThumbnail = QtGui.QPixmap(pubItem.DEFAULT_IMAGE).scaled(size, size, QtCore.Qt.KeepAspectRatio)
+            self._thumbnails[rigFile] = self._defaultThumbnail
+            thumbnailService.getService().request(rigFile, pubItem.getImage, lambda imageFile, image: self._setThumbnail(rigFile, imageFile, image))
+        return self._thumbnails[rigFile]
+
+    def _setThumbnail(self, rigFile, imageFile, image):
+        self._thumbnails[rigFile] = QtGui.QPixmap.fromImage(image)
+
+        column = PublishItemTableModel.COLUMNS.index('image')
+        for row, pubItem in enumerate(self.publishItems):
+            if pubItem.rigFile == rigFile:
+                pubItem.image = imageFile
+                self.dataChanged.emit(self.index(row, column), self.index(row, column))
+
+
+class PathExistsTask(QtCore.QRunnable):
+    def __init__(self, path, signal):
+        super(PathExistsTask, self).__init__()
+        self.path = path
+        self.signal = signal
+
+    def run(self):
+        self.signal.emit(self.path, os.path.exists(self.path))
+
+
+class PathExistsChecker(QtCore.QObject):
+    """Checks paths in background threads and remembers recent results, os.path.exists can take long on network paths."""
+    checked = QtCore.Signal(str, bool)
+
+    CACHE_SECONDS = 10.0
+    MAX_CACHE_SIZE = 256
+
+    def __init__(self, parent=None):
+        super(PathExistsChecker, self).__init__(parent)
+        self.threadPool = QtCore.QThreadPool(self)
+        self.threadPool.setMaxThreadCount(2)
+
+        self._cache = {}
+        self._callbacks = {}
+
+        self.checked.connect(self._onChecked)
+
+    def request(self, path, callback):
+        """Check path in a background thread, callback is called on the main thread with (path, exists)."""
+        exists = self._getCached(path)
+        if exists is not None:
+            callback(path, exists)
+            return
 
-    def setPublishItemExportSkeleton(self, state):
-        self.publishItem.exportSkeleton = bool(state)
+        if path in self._callbacks:
+            self._callbacks[path].append(callback)
+            return
 
-    def setPublishItemExportBlendshape(self, state):
-        self.publishItem.exportBlendshape = bool(state)
+        self._callbacks[path] = [callback]
+        self.threadPool.start(PathExistsTask(path, self.checked))
+
+    def _onChecked(self, path, exists):
+        self._setCached(path, exists)
+        for callback in self._callbacks.pop(path, []):
+            callback(path, exists)
+
+    def _getCached(self, path):
+        cached = self._cache.get(path)
+        if cached is None or time.time() - cached[1] > PathExistsChecker.CACHE_SECONDS:
+            return None
+        return cached[0]
+
+    def _setCached(self, path, exists):
+        if len(self._cache) >= PathExistsChecker.MAX_CACHE_SIZE:
+            self._cache = {}
+        self._cache[path] = (exists, time.time())
+
+
+class PublishItemDelegate(QtWidgets.QStyledItemDelegate):
+    def createEditor(self, parent, option, index):
+        attr = PublishItemTableModel.COLUMNS[index.column()]
+
+        if attr == 'bakeSpace':
+            editor = QtWidgets.QComboBox(parent)
+            editor.addItems(index.model().publishItems[index.row()].BAKE_SPACES)
+            editor.currentIndexChanged.connect(lambda *args: self.commitData.emit(editor))
+            return editor
+
+        editor = QtWidgets.QLineEdit(parent)
+        if attr in ('startFrame', 'endFrame'):
+            editor.setValidator(QtGui.QDoubleValidator(editor))
+        elif attr == 'exportDirectory':
+            browseAction = editor.addAction(QtGui.QIcon(':fileOpen.png'), QtWidgets.QLineEdit.TrailingPosition)
+            persistentIndex = QtCore.QPersistentModelIndex(index)
+            browseAction.triggered.connect(lambda: PublishItemDelegate.setDirectoryPath(editor.window(), editor.text(), persistentIndex))
+        return editor
+
+    def setEditorData(self, editor, index):
+        value = index.data(QtCore.Qt.EditRole)
+        if isinstance(editor, QtWidgets.QComboBox):
+            editor.blockSignals(True)
+            editor.setCurrentText(value)
+            editor.blockSignals(False)
+        else:
+            editor.setText(value)
+
+    def setModelData(self, editor, model, index):
+        if isinstance(editor, QtWidgets.QComboBox):
+            model.setData(index, editor.currentText(), QtCore.Qt.EditRole)
+        else:
+            model.setData(index, editor.text(), QtCore.Qt.EditRole)
 
     @staticmethod
-    def addSeparator(layout):
-        separator = QtWidgets.QFrame()
-        separator.setFrameShape(QtWidgets.QFrame.VLine)
-        separator.setFixedWidth(1)
-        separator.setFixedHeight(75)
-
-        separator.setStyleSheet('background-color: rgb(100, 100, 100);')
+    def setDirectoryPath(parent, curDir, index):
+        # Editor may be closed while the dialog has focus so the value goes to the model directly
+        dirPath = QtWidgets.QFileDialog.getExistingDirectory(parent, 'Select Export Directory', curDir)
+        if not dirPath or not index.isValid():
+            return
 
-        layout.addWidget(separator)
\ No newline at end of file
+        index.model().setData(index.model().index(index.row(), index.column()), dirPath, QtCore.Qt.EditRole)
@@ -0,0 +1,191 @@
+"""
+Description: Publishes animation of many scene files with a pool of headless mayapy workers.
+
+Usage:
+    mayapy -m takAniPublisher.batchPublish shot010.ma shot020.ma --workers 4 --report report.json
+    mayapy -m takAniPublisher.batchPublish jobs.json
+    mayapy -m takAniPublisher.batchPublish jobs.json --trace-dir D:/traces
+
+Job spec file:
+    {
+        "workers": 4,
+        "jobs": [
+            {"scene": "D:/shots/shot010.ma", "namespaces": ["heroA"], "bakeSpace": "local"},
+            {"scene": "D:/shots/shot020.ma", "exportDirectory": "D:/Animations"}
+        ]
+    }
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from multiprocessing.pool import ThreadPool
+
+from . import tracer
+
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_MODULE = 'takAniPublisher.batchWorker'
+
+
+def loadJobs(paths):
+    jobs = []
+    numWorkers = None
+
+    for path in paths:
+        if not path.lower().endswith('.json'):
+            jobs.append({'scene': path})
+            continue
+
+        with open(path, 'r') as f:
+            jobSpec = json.load(f)
+        if isinstance(jobSpec, dict):
+            numWorkers = jobSpec.get('workers', numWorkers)
+            jobSpec = jobSpec.get('jobs', [])
+        jobs.extend(jobSpec)
+
+    return jobs, numWorkers
+
+
+def getDefaultInterpreter():
+    mayaLocation = os.environ.get('MAYA_LOCATION')
+    if mayaLocation:
+        mayapy = os.path.join(mayaLocation, 'bin', 'mayapy.exe' if sys.platform == 'win32' else 'mayapy')
+        if os.path.exists(mayapy):
+            return mayapy
+    return sys.executable
+
+
+class SubprocessLauncher(object):
+    """Runs one job per interpreter process, the job and its result are exchanged through json files."""
+    def __init__(self, interpreter=None, workerModule=WORKER_MODULE, timeout=None):
+        super(SubprocessLauncher, self).__init__()
+        self.interpreter = interpreter or getDefaultInterpreter()
+        self.workerModule = workerModule
+        self.timeout = timeout
+
+    def launch(self, job):
+        result = {'scene': job.get('scene'), 'status': 'failed', 'items': [], 'error': None, 'duration': 0.0}
+
+        jobFd, jobFile = tempfile.mkstemp(suffix='.json', prefix='takAniPublisherJob_')
+        resultFile = jobFile.replace('.json', '_result.json')
+        with os.fdopen(jobFd, 'w') as f:
+            json.dump(job, f)
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([SCRIPTS_DIR, env.get('PYTHONPATH', '')]).rstrip(os.pathsep)
+
+        startTime = time.time()
+        try:
+            process = subprocess.Popen(
+                [self.interpreter, '-m', self.workerModule, jobFile, resultFile],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=env
+            )
+            output = self._communicate(process)
+
+            if os.path.exists(resultFile):
+                with open(resultFile, 'r') as f:
+                    result.update(json.load(f))
+            elif process.returncode:
+                result['error'] = 'Worker exited with code {0}.\n{1}'.format(process.returncode, output[-4000:])
+            else:
+                result['error'] = 'Worker did not write a result.\n{0}'.format(output[-4000:])
+        except Exception as e:
+            result['error'] = str(e)
+        finally:
+            for tempFile in [jobFile, resultFile]:
+                if os.path.exists(tempFile):
+                    os.remove(tempFile)
+        result['duration'] = time.time() - startTime
+
+        return result
+
+    def _communicate(self, process):
+        if self.timeout is None:
+            output = process.communicate()[0]
+        else:
+            try:
+                output = process.communicate(timeout=self.timeout)[0]
+            except TypeError:  # Python 2 has no timeout argument
+                output = process.communicate()[0]
+            except subprocess.TimeoutExpired:
+                process.kill()
+                output = process.communicate()[0] + b'\nWorker timed out.'
+        return output.decode('utf-8', 'replace')
+
+
+class BatchPublisher(object):
+    def __init__(self, launcher=None, numWorkers=2, log=None):
+        super(BatchPublisher, self).__init__()
+        self.launcher = launcher or SubprocessLauncher()
+        self.numWorkers = max(1, numWorkers)
+        self.log = log or (lambda message: sys.stdout.write(message + '\n'))
+
+    def run(self, jobs):
+        startTime = time.time()
+
+        pool = ThreadPool(min(self.numWorkers, len(jobs)) or 1)
+        try:
+            results = []
+            for result in pool.imap(self.launcher.launch, jobs):
+                self.log('[{0}/{1}] {2}: {3} ({4}s)'.format(len(results) + 1, len(jobs), result['scene'], result['status'], round(result['duration'], 2)))
+                results.append(result)
+        finally:
+            pool.close()
+            pool.join()
+
+        return BatchPublisher.createReport(results, time.time() - startTime)
+
+    @staticmethod
+    def createReport(results, duration):
+        failed = [result for result in results if result['status'] != 'succeeded']
+        return {
+            'numJobs': len(results),
+            'numSucceeded': len(results) - len(failed),
+            'numFailed': len(failed),
+            'numItems': sum(len(result['items']) for result in results),
+            'duration': duration,
+            'jobs': results,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Publish animation of scene files with headless maya workers.')
+    parser.add_argument('inputs', nargs='+', help='Scene files or job spec json files.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of concurrent workers.')
+    parser.add_argument('--mayapy', default=None, help='Interpreter used to run workers.')
+    parser.add_argument('--timeout', type=float, default=None, help='Seconds before a worker is killed.')
+    parser.add_argument('--report', default=None, help='Summary report json file.')
+    parser.add_argument('--trace-dir', default=None, help='Directory to save a chrome trace of each job to.')
+    args = parser.parse_args(argv)
+
+    jobs, numWorkers = loadJobs(args.inputs)
+    numWorkers = args.workers or numWorkers or 2
+
+    if args.trace_dir:
+        for i, job in enumerate(jobs):
+            job.setdefault('traceFile', os.path.join(os.path.abspath(args.trace_dir), 'job_{0:03d}.json'.format(i)))
+
+    batchPublisher = BatchPublisher(SubprocessLauncher(args.mayapy, timeout=args.timeout), numWorkers)
+    report = batchPublisher.run(jobs)
+
+    sys.stdout.write('{0} of {1} scenes published in {2}s.\n'.format(report['numSucceeded'], report['numJobs'], round(report['duration'], 2)))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    traceFiles = [job['traceFile'] for job in jobs if job.get('traceFile') and os.path.exists(job['traceFile'])]
+    if traceFiles:
+        sys.stdout.write(tracer.formatSummary(tracer.summarizeFiles(traceFiles)) + '\n')
+
+    return 1 if report['numFailed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
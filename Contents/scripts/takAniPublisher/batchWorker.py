@@ -0,0 +1,81 @@
+"""
+Description: Publishes one job of batchPublish inside a headless mayapy process.
+
+Usage:
+    mayapy -m takAniPublisher.batchWorker job.json result.json
+"""
+
+import sys
+import json
+import traceback
+
+
+ITEM_OVERRIDES = ['exportDirectory', 'filename', 'bakeSpace', 'startFrame', 'endFrame', 'exportBlendshape', 'exportBinary', 'clips']
+SINGLE_ITEM_OVERRIDES = ['filename']  # Items given the same file would overwrite each other
+
+
+def applyOverrides(pubItems, job):
+    """Enable items of the job namespaces and set the item attributes given by the job."""
+    namespaces = job.get('namespaces')
+    for pubItem in pubItems:
+        pubItem.settings.update(job.get('settings', {}))
+        pubItem.enable = not namespaces or pubItem.namespace in namespaces
+
+    enabledItems = [pubItem for pubItem in pubItems if pubItem.enable]
+    for attr in SINGLE_ITEM_OVERRIDES:
+        if attr in job and len(enabledItems) != 1:
+            raise RuntimeError('"{0}" can only be set for one item, {1} items are enabled. Set namespaces to publish one item.'.format(attr, len(enabledItems)))
+
+    for pubItem in enabledItems:
+        for attr in ITEM_OVERRIDES:
+            if attr in job:
+                setattr(pubItem, attr, job[attr])
+
+
+def publishScene(job):
+    import maya.cmds as cmds
+
+    from . import aniPublisherCtrl as apCtrl
+
+    cmds.file(job['scene'], open=True, force=True)
+
+    aniPubCtrl = apCtrl.AniPublisherCtrl()
+    aniPub = aniPubCtrl.createPublisher()
+    aniPub.settings.update(job.get('settings', {}))
+
+    applyOverrides(aniPub.publishItems, job)
+
+    aniPub.traceFile = job.get('traceFile')
+    aniPub.publish(postProcess=job.get('postProcess', True), wait=True)
+
+    return aniPub.results
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    jobFile, resultFile = argv
+
+    with open(jobFile, 'r') as f:
+        job = json.load(f)
+
+    result = {'scene': job.get('scene'), 'status': 'failed', 'items': [], 'error': None}
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    try:
+        result['items'] = publishScene(job)
+        failedItems = [item for item in result['items'] if item.get('error')]
+        result['status'] = 'failed' if failedItems else 'succeeded'
+    except Exception:
+        result['error'] = traceback.format_exc()
+
+    with open(resultFile, 'w') as f:
+        json.dump(result, f, indent=4)
+
+    maya.standalone.uninitialize()
+
+    return 0 if result['status'] == 'succeeded' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Description: Exports long frame ranges of a publish item as segments baked concurrently by headless mayapy workers.
+Segments share their boundary frame and are stitched back into one ascii fbx file before post processing.
+Each segment is a separate bake. Dynamics and simulations restart at its first frame, so items that use them should not be chunked.
+Keys that do not match at a boundary are reported as warnings.
+"""
+
+import maya.cmds as cmds
+import maya.OpenMaya as om
+
+import os
+import shutil
+import tempfile
+
+from . import batchPublish
+from . import postProcessor
+from . import fbxStitcher
+
+
+# Settings for the worker sessions, segments are plain exports that are post processed after stitching
+WORKER_SETTINGS = {
+    'chunkedExport': False,
+    'pipelinedPublish': False,
+    'incrementalPublish': False,
+    'publishJournal': False,
+    'localStaging': False,
+    'sharedBake': False,
+}
+
+
+def getSegments(startFrame, endFrame, chunkSize):
+    """Split frame range to (start, end) ranges of at most chunkSize frames, each range starts at the end frame of the previous one."""
+    segments = []
+    start = startFrame
+    while True:
+        end = min(start + chunkSize, endFrame)
+        segments.append((start, end))
+        if end >= endFrame:
+            break
+        start = end
+    return segments
+
+
+def canExportChunked():
+    """Workers open the scene file so the scene has to be saved without pending changes."""
+    return bool(cmds.file(q=True, sceneName=True)) and not cmds.file(q=True, modified=True)
+
+
+class ChunkedExporter(object):
+    def __init__(self, chunkSize=500, numWorkers=4, interpreter=None):
+        super(ChunkedExporter, self).__init__()
+        self.chunkSize = chunkSize
+        self.numWorkers = numWorkers
+        self.interpreter = interpreter or postProcessor.getPythonExecutable()
+
+    def isChunked(self, pubItem):
+        startFrame, endFrame = pubItem.getExportRange()
+        return float(endFrame) - float(startFrame) > self.chunkSize
+
+    def export(self, pubItem, fbxFile):
+        sceneFile = cmds.file(q=True, sceneName=True)
+        startFrame, endFrame = pubItem.getExportRange()
+        segments = getSegments(float(startFrame), float(endFrame), self.chunkSize)
+        tempDir = tempfile.mkdtemp(prefix='takAniPublisherChunks_')
+
+        jobs = []
+        for i, (startFrame, endFrame) in enumerate(segments):
+            jobs.append({
+                'scene': sceneFile,
+                'namespaces': [pubItem.namespace],
+                'exportDirectory': tempDir,
+                'filename': '{0}_{1:03d}'.format(pubItem.filename, i),
+                'startFrame': startFrame,
+                'endFrame': endFrame,
+                'bakeSpace': pubItem.bakeSpace,
+                'exportBlendshape': pubItem.exportBlendshape,
+                'postProcess': False,
+                'settings': WORKER_SETTINGS,
+            })
+
+        try:
+            batchPublisher = batchPublish.BatchPublisher(batchPublish.SubprocessLauncher(self.interpreter), self.numWorkers, log=om.MGlobal.displayInfo)
+            report = batchPublisher.run(jobs)
+            if report['numFailed']:
+                errors = [job['error'] or 'Segment {0} failed.'.format(job['scene']) for job in report['jobs'] if job['status'] != 'succeeded']
+                raise RuntimeError('"{0}" chunked export has failed.\n{1}'.format(pubItem.namespace, '\n'.join(errors)))
+
+            segmentFiles = [os.path.join(tempDir, job['filename'] + '.fbx') for job in jobs]
+            stitcher = fbxStitcher.stitchFiles(segmentFiles, fbxFile)
+            if stitcher.discontinuities:
+                om.MGlobal.displayWarning('"{0}" has {1} curves that do not match where chunks meet.\n{2}'.format(pubItem.namespace, len(stitcher.discontinuities), fbxStitcher.formatDiscontinuities(stitcher.discontinuities)))
+        finally:
+            shutil.rmtree(tempDir, ignore_errors=True)
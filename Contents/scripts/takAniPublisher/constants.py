@@ -5,3 +5,9 @@ USER_DOCUMENTS_DIR = os.path.expanduser('~')
 APP_PREFERENCE_DIR = os.path.join(USER_DOCUMENTS_DIR, 'takAniPublisher')
 DEFAULT_SETTING_FILE = os.path.join(CONTENTS_DIR, 'config', 'settings.json')
 USER_SETTING_FILE = os.path.join(APP_PREFERENCE_DIR, 'settings_user.json')
+PUBLISH_CACHE_FILE = os.path.join(APP_PREFERENCE_DIR, 'publish_cache.json')
+THUMBNAIL_CACHE_DIR = os.path.join(APP_PREFERENCE_DIR, 'thumbnails')
+TRACE_DIR = os.path.join(APP_PREFERENCE_DIR, 'traces')
+JOURNAL_DIR = os.path.join(APP_PREFERENCE_DIR, 'journals')
+VERIFY_REPORT_DIR = os.path.join(APP_PREFERENCE_DIR, 'verify_reports')
+DEV_MODE_VARIABLE = 'TAK_ANI_PUBLISHER_DEV'  # Set to 1 to reload modules on every launch while working on the tool
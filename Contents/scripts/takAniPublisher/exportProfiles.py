@@ -0,0 +1,126 @@
+"""
+Description: Fbx export options as named profiles.
+Options are applied as one mel script and only options that differ from the last applied state are sent after the first item.
+"""
+
+import collections
+import time
+
+
+DEFAULT_PROFILE_NAME = 'default'
+DEFAULT_OPTIONS = [
+    ('FBXExportSmoothingGroups', False),
+    ('FBXExportTangents', False),
+    ('FBXExportSmoothMesh', False),
+    ('FBXExportTriangulate', False),
+
+    ('FBXExportAnimationOnly', False),
+    ('FBXExportAxisConversionMethod', 'convertAnimation'),
+    ('FBXExportBakeComplexAnimation', True),
+    ('FBXExportBakeComplexStart', 0),
+    ('FBXExportBakeComplexEnd', 1),
+    ('FBXExportBakeComplexStep', 1),
+    ('FBXExportQuaternion', 'resample'),
+    ('FBXExportBakeResampleAnimation', False),
+    ('FBXExportApplyConstantKeyReducer', False),
+
+    ('FBXExportSkins', True),
+    ('FBXExportShapes', True),
+
+    ('FBXExportLights', False),
+    ('FBXExportCameras', False),
+    ('FBXExportInstances', False),
+    ('FBXExportCacheFile', False),
+    ('FBXExportEmbeddedTextures', False),
+
+    ('FBXExportColladaSingleMatrix', True),
+    ('FBXExportColladaTriangulate', False),
+
+    ('FBXExportConstraints', False),
+    ('FBXExportInputConnections', True),
+    ('FBXExportSkeletonDefinitions', False),
+
+    ('FBXExportUpAxis', 'y'),
+    ('FBXExportScaleFactor', 1.0),
+    ('FBXExportConvertUnitString', 'cm'),
+
+    ('FBXExportInAscii', True),
+    ('FBXExportReferencedAssetsContent', True),
+    ('FBXExportUseSceneName', False),
+    ('FBXExportFileVersion', 'FBX201800'),
+]
+NO_FLAG_COMMANDS = set([
+    'FBXExportAxisConversionMethod',
+    'FBXExportColladaSingleMatrix',
+    'FBXExportColladaTriangulate',
+    'FBXExportUpAxis',
+    'FBXExportScaleFactor',
+    'FBXExportConvertUnitString',
+])
+
+
+def getProfile(settings, name=None):
+    """Default options overridden by the options of the named profile in settings."""
+    name = name or settings.get('exportProfile', DEFAULT_PROFILE_NAME)
+    profiles = settings.get('exportProfiles', {})
+    if name != DEFAULT_PROFILE_NAME and name not in profiles:
+        raise RuntimeError('Export profile "{0}" does not exist.'.format(name))
+
+    options = collections.OrderedDict(DEFAULT_OPTIONS)
+    for command in sorted(profiles.get(name, {})):
+        options[command] = profiles[name][command]
+    return options
+
+
+def getItemOptions(profile, startFrame, endFrame, shapes):
+    options = collections.OrderedDict(profile)
+    options['FBXExportBakeComplexStart'] = startFrame
+    options['FBXExportBakeComplexEnd'] = endFrame
+    if not shapes:
+        options['FBXExportShapes'] = False
+    options['FBXExportInAscii'] = True  # Post processing edits ascii files, binary is converted after it
+    return options
+
+
+def formatOption(command, value):
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    if command in NO_FLAG_COMMANDS:
+        return '{0} {1};'.format(command, value)
+    return '{0} -v {1};'.format(command, value)
+
+
+class ExportOptionsState(object):
+    """Last applied export options, reset it whenever options may have been changed outside of the publisher."""
+    def __init__(self):
+        super(ExportOptionsState, self).__init__()
+        self.options = None
+
+        self.numApplied = 0
+        self.numCommands = 0
+        self.duration = 0.0
+
+    def reset(self):
+        self.options = None
+
+    def getMelScript(self, options):
+        if self.options is None:
+            commands = ['FBXResetExport;'] + [formatOption(command, value) for command, value in options.items()]
+        else:
+            commands = [formatOption(command, value) for command, value in options.items() if command not in self.options or self.options[command] != value]
+        return ''.join(commands)
+
+    def apply(self, options, evalFunc):
+        startTime = time.time()
+
+        melScript = self.getMelScript(options)
+        if melScript:
+            evalFunc(melScript)
+        self.options = collections.OrderedDict(options)
+
+        self.numApplied += 1
+        self.numCommands += melScript.count(';')
+        self.duration += time.time() - startTime
+
+    def getReport(self):
+        return 'Export options applied {0} times with {1} commands in {2}s.'.format(self.numApplied, self.numCommands, round(self.duration, 4))
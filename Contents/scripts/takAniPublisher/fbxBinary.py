@@ -0,0 +1,338 @@
+"""
+Description: Converts ascii fbx files to binary fbx (7.x node record format) without the fbx sdk.
+The ascii file is read line by line and node records are written as they close, so only one array is held in memory at a time.
+"""
+
+import io
+import os
+import re
+import struct
+import zlib
+
+from . import fileUtils
+
+
+HEAD_MAGIC = b'Kaydara FBX Binary  \x00\x1a\x00'
+FOOT_MAGIC = b'\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b'
+FOOT_ID = b'\xfa\xbc\xab\x09\xd0\xc8\xd4\x66\xb1\x76\xfb\x83\x1c\xf7\x26\x7e'
+FILE_ID = b'\x28\xb3\x2a\xeb\xb6\x24\xcc\xc2\xbf\xc8\xb0\x2a\xa9\x2b\xfc\xf1'
+CREATION_TIME = b'1970-01-01 10:00:00:000'
+DEFAULT_VERSION = 7500
+ARRAY_COMPRESS_MIN_BYTES = 128
+
+TOKEN_PATTERN = re.compile(r'\s*("[^"]*"|[^,]*?)\s*(?:,|$)')
+NODE_PATTERN = re.compile(r'\s*([\w|]+):\s?(.*)$')
+NUMBER_PATTERN = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$|^[-+]?(nan|inf|1\.#\w+)$', re.IGNORECASE)
+
+STRUCT_FORMATS = {'Y': 'h', 'C': 'B', 'I': 'i', 'F': 'f', 'D': 'd', 'L': 'q', 'i': 'i', 'l': 'q', 'f': 'f', 'd': 'd', 'b': 'B'}
+ID_NODE_PARENTS = set(['Objects', 'Documents'])
+BIT_PATTERN_ARRAYS = set(['KeyAttrDataFloat'])  # Ascii stores packed tangent data of these float arrays as integers
+GENERATED_NODES = set(['FileId', 'CreationTime'])  # Written after FBXHeaderExtension, ascii FileId is text while binary needs raw bytes
+
+INT32_MAX = 2 ** 31 - 1
+INT32_MIN = -2 ** 31
+
+INT64_NODES = set(['C', 'LocalTime', 'ReferenceTime', 'Node', 'RootNode'])
+DOUBLE_NODES = set(['Default', 'DeformPercent', 'Link_DeformAcuracy', 'Weight'])
+BOOL_WORDS = {'T': 1, 'Y': 1, 'F': 0, 'N': 0}
+
+INT_PROPERTY_TYPES = set(['bool', 'Bool', 'int', 'Integer', 'enum', 'Enum', 'Visibility Inheritance', 'ReferenceInt'])
+INT64_PROPERTY_TYPES = set(['KTime', 'ULongLong', 'LongLong'])
+FLOAT_PROPERTY_TYPES = set(['float', 'Float'])
+
+ARRAY_TYPES = {
+    'KeyTime': 'l',
+    'KeyValueFloat': 'f',
+    'KeyAttrDataFloat': 'f',
+    'KeyAttrFlags': 'i',
+    'KeyAttrRefCount': 'i',
+    'PolygonVertexIndex': 'i',
+    'Edges': 'i',
+    'Materials': 'i',
+    'Smoothing': 'i',
+    'UVIndex': 'i',
+    'NormalsIndex': 'i',
+    'ColorIndex': 'i',
+    'Indexes': 'i',
+    'Vertices': 'd',
+    'Normals': 'd',
+    'NormalsW': 'd',
+    'Binormals': 'd',
+    'Tangents': 'd',
+    'UV': 'd',
+    'Colors': 'd',
+    'Weights': 'd',
+    'FullWeights': 'd',
+    'Transform': 'd',
+    'TransformLink': 'd',
+    'TransformAssociateModel': 'd',
+    'Matrix': 'd',
+}
+
+
+def parseNumber(token):
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return float('nan')
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN_PATTERN.match(text, pos)
+        tokens.append(match.group(1))
+        pos = match.end()
+        if match.end() == match.start():
+            break
+    return tokens
+
+
+def toBinaryName(value):
+    # Binary fbx stores "Class::Name" as "Name\x00\x01Class"
+    if '::' not in value:
+        return value.encode('utf-8')
+    className, name = value.split('::', 1)
+    return name.encode('utf-8') + b'\x00\x01' + className.encode('utf-8')
+
+
+def packString(value):
+    return b'S' + struct.pack('<I', len(value)) + value
+
+
+def packProperty(typeCode, value):
+    if typeCode == 'S':
+        return packString(value)
+    if typeCode == 'R':
+        return b'R' + struct.pack('<I', len(value)) + value
+    return typeCode.encode('ascii') + struct.pack('<' + STRUCT_FORMATS[typeCode], value)
+
+
+def packArray(typeCode, tokens, nodeName=None):
+    if typeCode == 'f' and nodeName in BIT_PATTERN_ARRAYS:
+        data = b''.join(struct.pack('<i', int(token)) if token.lstrip('-').isdigit() else struct.pack('<f', parseNumber(token)) for token in tokens)
+    else:
+        values = [parseNumber(token) for token in tokens]
+        data = struct.pack('<{0}{1}'.format(len(values), STRUCT_FORMATS[typeCode]), *values)
+
+    encoding = 0
+    if len(data) >= ARRAY_COMPRESS_MIN_BYTES:
+        data = zlib.compress(data)
+        encoding = 1
+
+    return typeCode.encode('ascii') + struct.pack('<III', len(tokens), encoding, len(data)) + data
+
+
+def getArrayType(nodeName, tokens):
+    if nodeName in ARRAY_TYPES:
+        return ARRAY_TYPES[nodeName]
+
+    isInt = all(token.lstrip('-').isdigit() for token in tokens)
+    if not isInt:
+        return 'd'
+    if any(not INT32_MIN <= int(token) <= INT32_MAX for token in tokens):
+        return 'l'
+    return 'i'
+
+
+class FBXBinaryWriter(object):
+    def __init__(self, f, version=DEFAULT_VERSION):
+        super(FBXBinaryWriter, self).__init__()
+        self.f = f
+        self.version = version
+        self.isWide = version >= 7500
+
+        self._nodeStack = []
+
+    @property
+    def sentinel(self):
+        return b'\x00' * (25 if self.isWide else 13)
+
+    def writeHeader(self):
+        self.f.write(HEAD_MAGIC)
+        self.f.write(struct.pack('<I', self.version))
+
+    def openNode(self, name, properties):
+        propertyData = b''.join(properties)
+        start = self.f.tell()
+        if self.isWide:
+            self.f.write(struct.pack('<QQQ', 0, len(properties), len(propertyData)))
+        else:
+            self.f.write(struct.pack('<III', 0, len(properties), len(propertyData)))
+        nameData = name.encode('utf-8')
+        self.f.write(struct.pack('<B', len(nameData)))
+        self.f.write(nameData)
+        self.f.write(propertyData)
+        self._nodeStack.append(start)
+
+    def closeNode(self, hasBlock):
+        start = self._nodeStack.pop()
+        if hasBlock:
+            self.f.write(self.sentinel)
+
+        end = self.f.tell()
+        self.f.seek(start)
+        self.f.write(struct.pack('<Q' if self.isWide else '<I', end))
+        self.f.seek(end)
+
+    def writeNode(self, name, properties, hasBlock=False):
+        self.openNode(name, properties)
+        self.closeNode(hasBlock)
+
+    def writeFooter(self):
+        self.f.write(self.sentinel)
+        self.f.write(FOOT_ID)
+        self.f.write(b'\x00' * 4)
+        offset = self.f.tell()
+        padding = ((offset + 15) & ~15) - offset
+        self.f.write(b'\x00' * (padding or 16))
+        self.f.write(struct.pack('<I', self.version))
+        self.f.write(b'\x00' * 120)
+        self.f.write(FOOT_MAGIC)
+
+
+class FBXAsciiToBinaryConverter(object):
+    def __init__(self, version=None):
+        super(FBXAsciiToBinaryConverter, self).__init__()
+        self.version = version
+
+    def convert(self, asciiFile, binaryFile=None):
+        """Convert asciiFile and return the size of the binary file."""
+        binaryFile = binaryFile or asciiFile
+        tempFile = binaryFile + '.tmp'
+        version = self.version or FBXAsciiToBinaryConverter.readVersion(asciiFile)
+
+        try:
+            with io.open(asciiFile, 'r', encoding='utf-8', errors='replace') as inFile:
+                with open(tempFile, 'wb') as outFile:
+                    writer = FBXBinaryWriter(outFile, version)
+                    writer.writeHeader()
+                    self._convertLines(inFile, writer)
+                    writer.writeFooter()
+        except Exception:
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            raise
+        fileUtils.replaceFile(tempFile, binaryFile)
+
+        return os.path.getsize(binaryFile)
+
+    @staticmethod
+    def readVersion(asciiFile):
+        with open(asciiFile, 'r') as f:
+            for i, line in enumerate(f):
+                match = re.match(r'\s*FBXVersion:\s*(\d+)', line)
+                if match:
+                    return int(match.group(1))
+                if i > 200:
+                    break
+        return DEFAULT_VERSION
+
+    def _convertLines(self, lines, writer):
+        stack = []
+        array = None
+
+        for line in lines:
+            if array is not None:
+                stripped = line.strip()
+                if stripped.startswith('}'):
+                    tokens = [token for token in tokenize(','.join(array[1])) if token]
+                    writer.writeNode(array[0], [packArray(getArrayType(array[0], tokens), tokens, array[0])])
+                    array = None
+                    continue
+                if stripped.startswith('a:'):
+                    stripped = stripped[2:]
+                array[1].append(stripped.strip(','))
+                continue
+
+            stripped = line.strip()
+            if not stripped or stripped.startswith(';'):
+                continue
+
+            if stripped.startswith('}'):
+                name = stack.pop()
+                writer.closeNode(True)
+                if name == 'FBXHeaderExtension' and not stack:
+                    writer.writeNode('FileId', [packProperty('R', FILE_ID)])
+                    writer.writeNode('CreationTime', [packString(CREATION_TIME)])
+                continue
+
+            match = NODE_PATTERN.match(line)
+            if not match:
+                continue
+
+            name, rest = match.groups()
+            if not stack and name in GENERATED_NODES:
+                continue
+            rest = rest.rstrip()
+            hasBlock = rest.endswith('{')
+            if hasBlock:
+                rest = rest[:-1].rstrip()
+
+            if rest.startswith('*') and hasBlock:
+                array = (name, [])
+                continue
+
+            properties = self._packProperties(name, tokenize(rest) if rest else [], stack)
+            if hasBlock:
+                writer.openNode(name, properties)
+                stack.append(name)
+            else:
+                writer.writeNode(name, properties)
+
+    def _packProperties(self, name, tokens, stack):
+        isObject = len(stack) == 1 and stack[0] in ID_NODE_PARENTS
+        isProperty = name in ('P', 'Property')
+        propertyType = tokens[1].strip('"') if isProperty and len(tokens) > 1 else None
+
+        properties = []
+        for index, token in enumerate(tokens):
+            if token.startswith('"'):
+                value = token[1:-1].replace('&quot;', '"')
+                properties.append(packString(value.encode('utf-8') if isProperty else toBinaryName(value)))
+                continue
+
+            if not NUMBER_PATTERN.match(token):
+                if token in BOOL_WORDS:
+                    properties.append(packProperty('C', BOOL_WORDS[token]))
+                else:
+                    properties.append(packString(token.encode('utf-8')))
+                continue
+
+            value = parseNumber(token)
+            if isProperty:
+                typeCode = self._getPropertyValueType(propertyType, value)
+            elif name in INT64_NODES or (isObject and index == 0):
+                typeCode = 'L'
+            elif name in DOUBLE_NODES or isinstance(value, float):
+                typeCode = 'D'
+            else:
+                typeCode = 'I' if INT32_MIN <= value <= INT32_MAX else 'L'
+
+            if typeCode in ('D', 'F'):
+                value = float(value)
+            else:
+                value = int(value)
+            properties.append(packProperty(typeCode, value))
+
+        return properties
+
+    @staticmethod
+    def _getPropertyValueType(propertyType, value):
+        if propertyType in INT_PROPERTY_TYPES:
+            return 'I'
+        if propertyType in INT64_PROPERTY_TYPES:
+            return 'L'
+        if propertyType in FLOAT_PROPERTY_TYPES:
+            return 'F'
+        return 'D'
+
+
+def convertFile(asciiFile, binaryFile=None):
+    return FBXAsciiToBinaryConverter().convert(asciiFile, binaryFile)
@@ -0,0 +1,129 @@
+"""
+Description: Splits an ascii fbx file baked over the union range of several clips into one file per clip in a single pass.
+Keys outside of a clip range are dropped and time spans are set to the clip range, key times are kept as they were in the scene.
+"""
+
+import os
+import re
+import bisect
+
+from . import fileUtils
+from . import fbxCurves
+
+
+KTIME_PER_SECOND = 46186158000
+TIME_MODE_FRAME_RATES = {
+    1: 120.0, 2: 100.0, 3: 60.0, 4: 50.0, 5: 48.0, 6: 30.0, 7: 30.0, 8: 30000.0 / 1001.0, 9: 30000.0 / 1001.0,
+    10: 25.0, 11: 24.0, 12: 1000.0, 13: 24000.0 / 1001.0, 15: 96.0, 16: 72.0, 17: 60000.0 / 1001.0, 18: 120000.0 / 1001.0,
+}
+TIME_MODE_CUSTOM = 14
+DEFAULT_FRAME_RATE = 30.0
+FRAME_TOLERANCE = 0.01  # Key times of rates like 29.97 are whole ticks per frame, they drift from the rounded time of the frame
+
+TIME_MODE_PATTERN = re.compile(r'^\s*P: "TimeMode",.*,(\d+)\s*$')
+CUSTOM_FRAME_RATE_PATTERN = re.compile(r'^\s*P: "CustomFrameRate",.*,(-?[\d.eE+-]+)\s*$')
+START_PROPERTY_PATTERN = re.compile(r'^(\s*P: "(?:TimeSpanStart|LocalStart|ReferenceStart)",.*,)(-?\d+)(\s*)$')
+STOP_PROPERTY_PATTERN = re.compile(r'^(\s*P: "(?:TimeSpanStop|LocalStop|ReferenceStop)",.*,)(-?\d+)(\s*)$')
+TAKE_TIME_PATTERN = re.compile(r'^(\s*(?:LocalTime|ReferenceTime): )(-?\d+),(-?\d+)(\s*)$')
+
+
+def getFrameRate(fbxFile):
+    timeMode = None
+    customFrameRate = None
+    with open(fbxFile, 'r') as f:
+        for line in f:
+            if line.startswith('Objects:'):
+                break
+            match = TIME_MODE_PATTERN.match(line)
+            if match:
+                timeMode = int(match.group(1))
+            match = CUSTOM_FRAME_RATE_PATTERN.match(line)
+            if match:
+                customFrameRate = float(match.group(1))
+
+    if timeMode == TIME_MODE_CUSTOM and customFrameRate and customFrameRate > 0:
+        return customFrameRate
+    return TIME_MODE_FRAME_RATES.get(timeMode, DEFAULT_FRAME_RATE)
+
+
+def frameToKTime(frame, frameRate):
+    return int(round(float(frame) * KTIME_PER_SECOND / frameRate))
+
+
+def clipCurve(curve, startTime, endTime, tolerance=0):
+    """Keep keys from startTime to endTime, keys up to tolerance outside of the range are on the boundary frames."""
+    times = [int(token) for token in curve.keyTimes]
+    start = bisect.bisect_left(times, startTime - tolerance)
+    end = bisect.bisect_right(times, endTime + tolerance)
+    if start < end:
+        return curve.sliceKeys(start, end)
+
+    # No key in the range, the value held from the previous key is kept at the clip start
+    index = max(0, start - 1)
+    clippedCurve = curve.sliceKeys(index, index + 1)
+    if clippedCurve.numKeys:
+        clippedCurve.setKeys([str(startTime)], clippedCurve.keyValues)
+    return clippedCurve
+
+
+class FBXClipSplitter(object):
+    def __init__(self, clips):
+        """clips are dictionaries with startFrame, endFrame and outFile."""
+        super(FBXClipSplitter, self).__init__()
+        self.clips = clips
+
+    def split(self, fbxFile):
+        """Write all clip files reading fbxFile once and return the number of bytes read."""
+        frameRate = getFrameRate(fbxFile)
+        ranges = [(frameToKTime(clip['startFrame'], frameRate), frameToKTime(clip['endFrame'], frameRate)) for clip in self.clips]
+        tolerance = frameToKTime(FRAME_TOLERANCE, frameRate)
+        tempFiles = [clip['outFile'] + '.tmp' for clip in self.clips]
+
+        outFiles = []
+        try:
+            for tempFile in tempFiles:
+                outFiles.append(open(tempFile, 'w'))
+
+            with open(fbxFile, 'r') as inFile:
+                for item in fbxCurves.iterCurves(inFile):
+                    if isinstance(item, fbxCurves.AnimationCurve):
+                        for f, (startTime, endTime) in zip(outFiles, ranges):
+                            f.writelines(clipCurve(item, startTime, endTime, tolerance).toLines())
+                        continue
+
+                    for f, (startTime, endTime) in zip(outFiles, ranges):
+                        f.write(FBXClipSplitter.replaceTime(item, startTime, endTime))
+        except Exception:
+            for f in outFiles:
+                f.close()
+            for tempFile in tempFiles:
+                if os.path.exists(tempFile):
+                    os.remove(tempFile)
+            raise
+
+        for f in outFiles:
+            f.close()
+        for clip, tempFile in zip(self.clips, tempFiles):
+            fileUtils.replaceFile(tempFile, clip['outFile'])
+
+        return os.path.getsize(fbxFile)
+
+    @staticmethod
+    def replaceTime(line, startTime, endTime):
+        if 'Time' not in line and 'Start' not in line and 'Stop' not in line:
+            return line
+
+        match = START_PROPERTY_PATTERN.match(line)
+        if match:
+            return '{0}{1}{2}'.format(match.group(1), startTime, match.group(3))
+        match = STOP_PROPERTY_PATTERN.match(line)
+        if match:
+            return '{0}{1}{2}'.format(match.group(1), endTime, match.group(3))
+        match = TAKE_TIME_PATTERN.match(line)
+        if match:
+            return '{0}{1},{2}{3}'.format(match.group(1), startTime, endTime, match.group(4))
+        return line
+
+
+def splitFile(fbxFile, clips):
+    return FBXClipSplitter(clips).split(fbxFile)
@@ -0,0 +1,176 @@
+"""
+Description: Parses AnimationCurve objects of ascii fbx files while streaming the other lines through untouched.
+"""
+
+import re
+
+
+CURVE_HEADER_PATTERN = re.compile(r'^\tAnimationCurve: (\d+),')
+ARRAY_HEADER_PATTERN = re.compile(r'^(\t+)(\w+): \*(\d+) \{')
+
+INTERPOLATION_MASK = 0x0000000e
+INTERPOLATION_CONSTANT = 0x00000002
+INTERPOLATION_LINEAR = 0x00000004
+INTERPOLATION_CUBIC = 0x00000008
+FLAG_NAMES = [
+    (0x00000002, 'Constant'),
+    (0x00000004, 'Linear'),
+    (0x00000008, 'Cubic'),
+    (0x00000100, 'TangeantAuto'),
+    (0x00000200, 'TangeantTCB'),
+    (0x00000400, 'TangeantUser'),
+    (0x00000800, 'GenericBreak'),
+    (0x00001000, 'GenericClamp'),
+    (0x00002000, 'GenericTimeIndependent'),
+    (0x00004000, 'GenericClampProgressive'),
+]
+
+
+def getFlagNames(flags):
+    return '|'.join(name for flag, name in FLAG_NAMES if flags & flag)
+
+
+class AnimationCurve(object):
+    """
+    Lines of one AnimationCurve object, the key arrays are kept as string tokens so values that are not edited are written back as they were.
+    Members of the block other than the arrays are kept in order as plain lines.
+    """
+    def __init__(self, id, header):
+        super(AnimationCurve, self).__init__()
+        self.id = id
+        self.header = header
+        self.lines = [header]
+        self.members = []
+        self.arrays = {}
+        self.isModified = False
+
+    @property
+    def numKeys(self):
+        return len(self.arrays.get('KeyTime', []))
+
+    @property
+    def keyTimes(self):
+        return self.arrays.get('KeyTime', [])
+
+    @property
+    def keyValues(self):
+        return self.arrays.get('KeyValueFloat', [])
+
+    def addArray(self, name, indent, tokens, footer):
+        self.arrays[name] = tokens
+        self.members.append((name, (indent, footer)))
+
+    def addLine(self, line):
+        self.members.append((None, line))
+
+    def setKeys(self, keyTimes, keyValues):
+        self.arrays['KeyTime'] = keyTimes
+        self.arrays['KeyValueFloat'] = keyValues
+        self.isModified = True
+
+    def setInterpolation(self, interpolation):
+        """Use one attribute set with the given interpolation for all keys."""
+        flags = int(self.arrays.get('KeyAttrFlags', ['0'])[0])
+        flags = (flags & ~INTERPOLATION_MASK) | interpolation
+        self.arrays['KeyAttrFlags'] = [str(flags)]
+        self.arrays['KeyAttrDataFloat'] = self.arrays.get('KeyAttrDataFloat', ['0', '0', '255086342', '0'])[:4]
+        self.arrays['KeyAttrRefCount'] = [str(self.numKeys)]
+        self.isModified = True
+
+    def getAttributeSets(self):
+        """Return [flags, data, refCount] of each attribute set, refCount is the number of consecutive keys using it."""
+        flags = self.arrays.get('KeyAttrFlags', [])
+        data = self.arrays.get('KeyAttrDataFloat', [])
+        refCounts = self.arrays.get('KeyAttrRefCount', [])
+        return [[flags[i], data[i * 4:i * 4 + 4], int(refCounts[i])] for i in range(min(len(flags), len(refCounts)))]
+
+    def setAttributeSets(self, attributeSets):
+        merged = []
+        for flags, data, refCount in attributeSets:
+            if refCount <= 0:
+                continue
+            if merged and merged[-1][0] == flags and merged[-1][1] == data:
+                merged[-1][2] += refCount
+            else:
+                merged.append([flags, list(data), refCount])
+
+        self.arrays['KeyAttrFlags'] = [attributeSet[0] for attributeSet in merged]
+        self.arrays['KeyAttrDataFloat'] = [value for attributeSet in merged for value in attributeSet[1]]
+        self.arrays['KeyAttrRefCount'] = [str(attributeSet[2]) for attributeSet in merged]
+        self.isModified = True
+
+    def sliceKeys(self, start, end):
+        """Return a copy of the curve with keys start to end, attribute sets are cut to the keys that are kept."""
+        curve = AnimationCurve(self.id, self.header)
+        curve.lines = self.lines
+        curve.members = self.members
+        curve.arrays = dict(self.arrays)
+
+        keyAttributeSets = []
+        for attributeSet in self.getAttributeSets():
+            keyAttributeSets.extend([attributeSet] * attributeSet[2])
+        attributeSets = [[flags, data, 1] for flags, data, refCount in keyAttributeSets[start:end]]
+
+        curve.setKeys(self.keyTimes[start:end], self.keyValues[start:end])
+        curve.setAttributeSets(attributeSets)
+        return curve
+
+    def toLines(self):
+        if not self.isModified:
+            return self.lines
+
+        lines = [self.header]
+        for name, value in self.members:
+            if name is None:
+                if value.lstrip().startswith(';KeyAttrFlags:') and 'KeyAttrFlags' in self.arrays:
+                    value = '{0};KeyAttrFlags: {1}\n'.format(value[:len(value) - len(value.lstrip())], getFlagNames(int(self.arrays['KeyAttrFlags'][0])))
+                lines.append(value)
+                continue
+
+            indent, footer = value
+            tokens = self.arrays[name]
+            lines.append('{0}{1}: *{2} {{\n'.format(indent, name, len(tokens)))
+            lines.append('{0}\ta: {1}\n'.format(indent, ','.join(tokens)))
+            lines.append(footer)
+        return lines
+
+
+def iterCurves(lines):
+    """Yield AnimationCurve objects for curve blocks of the Objects section and the other lines as they are."""
+    curve = None
+    array = None
+
+    for line in lines:
+        if curve is None:
+            match = CURVE_HEADER_PATTERN.match(line)
+            if match and line.rstrip().endswith('{'):
+                curve = AnimationCurve(int(match.group(1)), line)
+            else:
+                yield line
+            continue
+
+        curve.lines.append(line)
+        if array is not None:
+            stripped = line.strip()
+            if stripped.startswith('}'):
+                curve.addArray(array[0], array[1], [token for token in ','.join(array[2]).split(',') if token], line)
+                array = None
+            else:
+                array[2].append(stripped[2:].strip() if stripped.startswith('a:') else stripped)
+            continue
+
+        if line.startswith('\t}'):
+            curve.addLine(line)
+            yield curve
+            curve = None
+            continue
+
+        match = ARRAY_HEADER_PATTERN.match(line)
+        if match:
+            array = (match.group(2), match.group(1), [])
+        else:
+            curve.addLine(line)
+
+    if curve is not None:
+        for line in curve.lines:
+            yield line
@@ -0,0 +1,241 @@
+"""
+Description: Single pass streaming editor for exported ascii fbx files.
+Each edit is a line filter chained after the previous one so the whole file is never held in memory.
+"""
+
+import os
+import re
+
+from . import fileUtils
+
+
+NEW_ROOT_JOINT_PROPERTIES = '''
+                        P: "PreRotation", "Vector3D", "Vector", "",-90,0,0
+                        P: "RotationActive", "bool", "", "",1
+                        P: "InheritType", "enum", "", "",1
+                        P: "ScalingMax", "Vector3D", "Vector", "",0,0,0
+                        P: "Show", "bool", "", "",1
+                        P: "DefaultAttributeIndex", "int", "Integer", "",0
+                        P: "Lcl Translation", "Lcl Translation", "", "A",0,0,0
+                        P: "Lcl Rotation", "Lcl Rotation", "", "A+",0,0,0
+            '''
+
+SHOW_PATTERN = re.compile(r'(\tP: "Show".*?),\d')
+CONNECTION_OO_PATTERN = re.compile(r'\tC: "OO",(\d+),\d+\n')
+
+
+def isObjectHeader(line):
+    return line.startswith('\t') and not line.startswith('\t\t') and line.endswith('{\n')
+
+
+class FBXEditor(object):
+    STAGES = ['showJoints', 'parentRootJointToWorld', 'resetRootJointProperties', 'removeRootJointCurves', 'removeNamespace']
+
+    def __init__(self, rootJoint, namespace, bakeSpace='world', stages=None):
+        super(FBXEditor, self).__init__()
+        self.rootJoint = rootJoint
+        self.namespace = namespace
+        self.bakeSpace = bakeSpace
+        self.stages = stages if stages is not None else FBXEditor.STAGES
+
+    def edit(self, fbxFile, outFile=None):
+        """Apply all edits in one pass and return the number of bytes read."""
+        outFile = outFile or fbxFile
+        tempFile = outFile + '.tmp'
+        numBytes = os.path.getsize(fbxFile)
+
+        try:
+            with open(fbxFile, 'r') as inFile:
+                with open(tempFile, 'w') as f:
+                    f.writelines(self.editLines(inFile))
+        except Exception:
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            raise
+        fileUtils.replaceFile(tempFile, outFile)
+
+        return numBytes
+
+    def editLines(self, lines):
+        for stage in self.getStages():
+            lines = stage(lines)
+        return lines
+
+    def getStages(self):
+        stages = []
+        for stageName in self.stages:
+            if stageName in ('resetRootJointProperties', 'removeRootJointCurves') and self.bakeSpace != 'local':
+                continue
+            stages.append(getattr(self, stageName))
+        return stages
+
+    def showJoints(self, lines):
+        # Mirrors r'\tModel:.*?"LimbNode" {.*?}.*?}\n' matches, a candidate starting on a non LimbNode model is dropped at the next non Model object
+        pending = []
+        state = None
+        startPos = 0
+        for line in lines:
+            if state == 'model' and (line == '}\n' or (isObjectHeader(line) and not line.startswith('\tModel:'))):
+                for pendingLine in pending:
+                    yield pendingLine
+                pending = []
+                state = None
+
+            pos = 0
+            if state is None:
+                pos = line.find('\tModel:')
+                if pos < 0:
+                    yield line
+                    continue
+                state = 'model'
+                startPos = pos
+
+            pending.append(line)
+
+            if state == 'model':
+                found = line.find('"LimbNode" {', pos)
+                if found < 0:
+                    continue
+                state = 'limbNode'
+                pos = found + len('"LimbNode" {')
+
+            if state == 'limbNode':
+                found = line.find('}', pos)
+                if found < 0:
+                    continue
+                state = 'block'
+                pos = found + 1
+
+            if state == 'block':
+                if line.find('}\n', pos) < 0:
+                    continue
+
+                firstLine = pending[0]
+                yield firstLine[:startPos] + SHOW_PATTERN.sub(r'\1,1', firstLine[startPos:])
+                for pendingLine in pending[1:]:
+                    if '"Show"' in pendingLine:
+                        pendingLine = SHOW_PATTERN.sub(r'\1,1', pendingLine)
+                    yield pendingLine
+                pending = []
+                state = None
+
+        for pendingLine in pending:
+            yield pendingLine
+
+    def parentRootJointToWorld(self, lines):
+        pattern = re.compile(r'(\t;Model.*?{0}, Model::).*'.format(self.rootJoint))
+
+        heldLine = None
+        heldMatch = None
+        for line in lines:
+            if heldMatch:
+                connectionMatch = CONNECTION_OO_PATTERN.match(line)
+                if connectionMatch:
+                    yield heldLine[:heldMatch.start()] + heldMatch.group(1) + 'RootNode\n'
+                    yield '\tC: "OO",{0},0\n'.format(connectionMatch.group(1))
+                    heldMatch = None
+                    continue
+                yield heldLine
+                heldMatch = None
+
+            if ';Model' in line and line.endswith('\n'):
+                heldMatch = pattern.search(line, 0, len(line) - 1)
+                if heldMatch:
+                    heldLine = line
+                    continue
+
+            yield line
+
+        if heldMatch:
+            yield heldLine
+
+    def resetRootJointProperties(self, lines):
+        headerPattern = re.compile(r'%s", "LimbNode" {' % (self.rootJoint))
+
+        state = 'start'
+        head = ''
+        for line in lines:
+            pos = 0
+
+            if state == 'start':
+                pos = line.find('\tModel:')
+                if pos < 0:
+                    yield line
+                    continue
+                state = 'model'
+
+            if state == 'model':
+                found = line.find('"Model::', pos)
+                if found < 0:
+                    yield line
+                    continue
+                state = 'header'
+                pos = found + len('"Model::')
+
+            if state == 'header':
+                match = headerPattern.search(line, pos)
+                if not match:
+                    yield line
+                    continue
+                state = 'brace'
+                pos = match.end()
+
+            if state == 'brace':
+                found = line.find('{', pos)
+                if found < 0:
+                    yield line
+                    continue
+                state = 'properties'
+                head = line[:found + 1]
+                pos = found + 1
+
+            if state == 'properties':
+                found = line.find('\t\t}', pos)
+                if found < 0:
+                    continue
+                state = 'done'
+                yield head + NEW_ROOT_JOINT_PROPERTIES + line[found:]
+                continue
+
+            yield line
+
+        if state != 'done':
+            raise RuntimeError('Can not find properties of root joint "{0}".'.format(self.rootJoint))
+
+    def removeRootJointCurves(self, lines):
+        pattern = re.compile(r'\t;AnimCurveNode::.*?Model::.*?%s\n' % (self.rootJoint))
+
+        heldLine = None
+        heldMatch = None
+        carry = ''
+        for line in lines:
+            if heldMatch:
+                if line.startswith('\tC: "OP"') and line.endswith('\n'):
+                    carry = heldLine[:heldMatch.start()]
+                    heldMatch = None
+                    continue
+                yield heldLine
+                heldMatch = None
+
+            searchPos = len(carry)
+            if carry:
+                line = carry + line
+                carry = ''
+
+            if ';AnimCurveNode::' in line:
+                heldMatch = pattern.search(line, searchPos)
+                if heldMatch:
+                    heldLine = line
+                    continue
+
+            yield line
+
+        if heldMatch:
+            yield heldLine
+        if carry:
+            yield carry
+
+    def removeNamespace(self, lines):
+        namespace = ':' + self.namespace
+        for line in lines:
+            yield line.replace(namespace, '')
@@ -0,0 +1,191 @@
+"""
+Description: Structural index of the Objects and Connections sections in an ascii fbx file.
+Edits that look up objects by id or connection use it, the stream editor does not since all of its edits are made in the order of the file and indexing is another read of the whole file.
+"""
+
+import collections
+import re
+
+
+FBXObject = collections.namedtuple('FBXObject', ['id', 'nodeType', 'className', 'name', 'subClass', 'start', 'end'])
+FBXConnection = collections.namedtuple('FBXConnection', ['type', 'childId', 'parentId', 'property', 'start', 'end'])
+
+OBJECT_HEADER_PATTERN = re.compile(br'\t(\w+): (-?\d+), "(.*?)::(.*)", "(.*)" \{')
+CONNECTION_PATTERN = re.compile(br'\tC: "(\w+)",(-?\d+),(-?\d+)(?:, "(.*)")?')
+SECTION_HEADER_PATTERN = re.compile(br'(\w+): ')
+
+ROOT_NODE_ID = 0
+
+
+def decode(value):
+    return value.decode('utf-8') if value is not None else None
+
+
+class FBXIndex(object):
+    def __init__(self, fbxFile=None):
+        super(FBXIndex, self).__init__()
+        self.fbxFile = fbxFile
+
+        self.objects = collections.OrderedDict()
+        self.connections = []
+        self.sections = collections.OrderedDict()
+
+        self._objectsByName = collections.defaultdict(list)
+        self._childConnections = collections.defaultdict(list)
+        self._parentConnections = collections.defaultdict(list)
+
+        if fbxFile:
+            with open(fbxFile, 'rb') as f:
+                self.build(f)
+
+    def build(self, lines):
+        section = None
+        sectionStart = 0
+        curObject = None
+        commentStart = None
+        offset = 0
+
+        for line in lines:
+            lineStart = offset
+            offset += len(line)
+
+            if section is None:
+                match = SECTION_HEADER_PATTERN.match(line)
+                if match and line.rstrip().endswith(b'{'):
+                    section = decode(match.group(1))
+                    sectionStart = lineStart
+                continue
+
+            if line[:1] == b'}':
+                if curObject:
+                    self._addObject(curObject, lineStart)
+                    curObject = None
+                self.sections[section] = (sectionStart, offset)
+                section = None
+                continue
+
+            if section == 'Objects':
+                if line[:1] != b'\t' or line[1:2] == b'\t':
+                    continue
+
+                if curObject:
+                    self._addObject(curObject, offset if line[1:2] == b'}' else lineStart)
+                    curObject = None
+
+                match = OBJECT_HEADER_PATTERN.match(line)
+                if match:
+                    curObject = (match, lineStart)
+
+            elif section == 'Connections':
+                if line[:2] == b'\t;':
+                    commentStart = lineStart
+                    continue
+
+                match = CONNECTION_PATTERN.match(line)
+                if match:
+                    start = commentStart if commentStart is not None else lineStart
+                    self._addConnection(match, start, offset)
+                commentStart = None
+
+        return self
+
+    def _addObject(self, objectInfo, end):
+        match, start = objectInfo
+        fbxObject = FBXObject(
+            int(match.group(2)),
+            decode(match.group(1)),
+            decode(match.group(3)),
+            decode(match.group(4)),
+            decode(match.group(5)),
+            start,
+            end
+        )
+        self.objects[fbxObject.id] = fbxObject
+        self._objectsByName[fbxObject.name].append(fbxObject.id)
+
+    def _addConnection(self, match, start, end):
+        connection = FBXConnection(
+            decode(match.group(1)),
+            int(match.group(2)),
+            int(match.group(3)),
+            decode(match.group(4)),
+            start,
+            end
+        )
+        index = len(self.connections)
+        self.connections.append(connection)
+        self._childConnections[connection.parentId].append(index)
+        self._parentConnections[connection.childId].append(index)
+
+    def getObject(self, objectId):
+        return self.objects.get(objectId)
+
+    def findObjects(self, name, nodeType=None, subClass=None):
+        objects = []
+        for objectId in self._objectsByName.get(name, []):
+            fbxObject = self.objects[objectId]
+            if nodeType and fbxObject.nodeType != nodeType:
+                continue
+            if subClass and fbxObject.subClass != subClass:
+                continue
+            objects.append(fbxObject)
+        return objects
+
+    def findObject(self, name, nodeType=None, subClass=None):
+        objects = self.findObjects(name, nodeType, subClass)
+        return objects[0] if objects else None
+
+    def getConnections(self, objectId):
+        indexes = sorted(self._childConnections.get(objectId, []) + self._parentConnections.get(objectId, []))
+        return [self.connections[index] for index in indexes]
+
+    def getChildConnections(self, objectId):
+        return [self.connections[index] for index in self._childConnections.get(objectId, [])]
+
+    def getParentConnections(self, objectId):
+        return [self.connections[index] for index in self._parentConnections.get(objectId, [])]
+
+    def getChildren(self, objectId, nodeType=None):
+        return self._filterObjects([connection.childId for connection in self.getChildConnections(objectId)], nodeType)
+
+    def getParents(self, objectId, nodeType=None):
+        return self._filterObjects([connection.parentId for connection in self.getParentConnections(objectId)], nodeType)
+
+    def isParentedToRoot(self, objectId):
+        return any(connection.parentId == ROOT_NODE_ID for connection in self.getParentConnections(objectId))
+
+    def getAnimationCurveNodes(self, objectId):
+        return self.getChildren(objectId, 'AnimationCurveNode')
+
+    def getAnimationCurves(self, objectId):
+        curves = []
+        for curveNode in self.getAnimationCurveNodes(objectId):
+            curves.extend(self.getChildren(curveNode.id, 'AnimationCurve'))
+        return curves
+
+    def getCurveChannel(self, curveId):
+        """
+        Return (nodeType, name, property, channel) of what the curve animates, e.g. ('Model', 'Root', 'Lcl Rotation', 'd|X').
+        Object ids change on every export so this is the key to match curves between files.
+        """
+        for curveConnection in self.getParentConnections(curveId):
+            curveNode = self.objects.get(curveConnection.parentId)
+            if not curveNode or curveNode.nodeType != 'AnimationCurveNode':
+                continue
+
+            for nodeConnection in self.getParentConnections(curveNode.id):
+                target = self.objects.get(nodeConnection.parentId)
+                if target and nodeConnection.type == 'OP':
+                    return (target.nodeType, target.name, nodeConnection.property, curveConnection.property)
+        return None
+
+    def _filterObjects(self, objectIds, nodeType):
+        objects = []
+        for objectId in objectIds:
+            fbxObject = self.objects.get(objectId)
+            if not fbxObject:
+                continue
+            if nodeType and fbxObject.nodeType != nodeType:
+                continue
+            objects.append(fbxObject)
+        return objects
@@ -0,0 +1,218 @@
+"""
+Description: Memory mapped patcher for exported ascii fbx files.
+Edits are written in place when none of them changes the length, e.g. exports without a namespace.
+Otherwise all edits are spliced into a temp file in one pass that replaces the file, removing the namespace always takes this path.
+"""
+
+import os
+import re
+import sys
+import mmap
+import shutil
+
+from . import fbxEditor
+from . import fileUtils
+from . import fbxIndex
+
+
+SHOW_PATTERN = re.compile(br'\tP: "Show".*?,(\d)')
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+USE_SENDFILE = hasattr(os, 'sendfile') and sys.platform.startswith('linux')  # Other platforms only send files to sockets
+
+
+def copyRange(srcFile, dstFile, mm, start, end):
+    """Copy mm[start:end] to dstFile, in kernel space on linux and in chunks of mm when sendfile fails or is not available."""
+    if USE_SENDFILE:
+        dstFile.flush()
+        offset = start
+        try:
+            while offset < end:
+                sent = os.sendfile(dstFile.fileno(), srcFile.fileno(), offset, end - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            pass
+        dstFile.seek(0, os.SEEK_END)
+        if offset == end:
+            return
+
+        start = offset
+
+    while start < end:
+        chunkEnd = min(start + COPY_CHUNK_SIZE, end)
+        dstFile.write(mm[start:chunkEnd])
+        start = chunkEnd
+
+
+class FBXPatcher(object):
+    def __init__(self, rootJoint, namespace, bakeSpace='world'):
+        super(FBXPatcher, self).__init__()
+        self.rootJoint = rootJoint
+        self.namespace = namespace
+        self.bakeSpace = bakeSpace
+        self._newline = b'\n'
+
+    def edit(self, fbxFile, outFile=None):
+        """Patch fbxFile and return the number of bytes it had."""
+        outFile = outFile or fbxFile
+        numBytes = os.path.getsize(fbxFile)
+        if not numBytes:
+            return numBytes
+
+        index = fbxIndex.FBXIndex(fbxFile)
+        tempFile = outFile + '.tmp'
+        with open(fbxFile, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                edits = self.getEdits(mm, index)
+                isInPlace = all(end - start == len(newBytes) for start, end, newBytes in edits)
+                if not isInPlace:
+                    self._splice(f, mm, edits, tempFile)
+            finally:
+                mm.close()
+
+        if not isInPlace:
+            fileUtils.replaceFile(tempFile, outFile)
+            return numBytes
+
+        if outFile != fbxFile:
+            shutil.copyfile(fbxFile, outFile)
+        if edits:
+            with open(outFile, 'r+b') as f:
+                mm = mmap.mmap(f.fileno(), 0)
+                try:
+                    for start, end, newBytes in edits:
+                        mm[start:end] = newBytes
+                    mm.flush()
+                finally:
+                    mm.close()
+
+        return numBytes
+
+    def getEdits(self, mm, index):
+        self._newline = b'\r\n' if mm.find(b'\r\n', 0, 4096) >= 0 else b'\n'
+        edits = self._getShowEdits(mm, index)
+
+        rootJoint = index.findObject(self.rootJoint, 'Model', 'LimbNode')
+        if rootJoint:
+            edits.extend(self._getParentRootJointEdits(mm, index, rootJoint))
+
+        if self.bakeSpace == 'local':
+            if not rootJoint:
+                raise RuntimeError('Can not find properties of root joint "{0}".'.format(self.rootJoint))
+            edits.append(self._getRootJointPropertiesEdit(mm, rootJoint))
+            edits.extend(self._getRootJointCurveEdits(index, rootJoint))
+
+        edits.sort()
+
+        return self._addNamespaceEdits(mm, FBXPatcher._removeOverlappingEdits(edits))
+
+    def _getShowEdits(self, mm, index):
+        # Same models as the streaming editor, non LimbNode models right before a LimbNode are included
+        edits = []
+        pendingModels = []
+        for fbxObject in index.objects.values():
+            if fbxObject.nodeType != 'Model':
+                pendingModels = []
+                continue
+
+            pendingModels.append(fbxObject)
+            if fbxObject.subClass != 'LimbNode':
+                continue
+
+            for model in pendingModels:
+                pos = mm.find(b'\tP: "Show"', model.start, model.end)
+                while pos >= 0:
+                    lineEnd = mm.find(b'\n', pos, model.end)
+                    lineEnd = lineEnd if lineEnd >= 0 else model.end
+                    match = SHOW_PATTERN.match(mm[pos:lineEnd])
+                    if match:
+                        digitPos = pos + match.start(1)
+                        edits.append((digitPos, digitPos + 1, b'1'))
+                    pos = mm.find(b'\tP: "Show"', lineEnd, model.end)
+            pendingModels = []
+
+        return edits
+
+    def _getParentRootJointEdits(self, mm, index, rootJoint):
+        edits = []
+        for connection in index.getParentConnections(rootJoint.id):
+            if connection.type != 'OO' or connection.parentId == fbxIndex.ROOT_NODE_ID:
+                continue
+
+            parent = index.getObject(connection.parentId)
+            if not parent or parent.nodeType != 'Model':
+                continue
+
+            oldBytes = mm[connection.start:connection.end]
+            comment, connectionLine = oldBytes.split(self._newline)[:2]
+            rootEnd = comment.find((self.rootJoint + ', Model::').encode('utf-8'))
+            if not comment.startswith(b'\t;Model') or rootEnd < 0:
+                continue
+
+            comment = comment[:rootEnd + len(self.rootJoint) + len(', Model::')] + b'RootNode'
+            connectionLine = '\tC: "OO",{0},0'.format(rootJoint.id).encode('utf-8') + self._newline
+            edits.append((connection.start, connection.end, comment + self._newline + connectionLine))
+
+        return edits
+
+    def _getRootJointPropertiesEdit(self, mm, rootJoint):
+        headerEnd = mm.find(b'\n', rootJoint.start, rootJoint.end)
+        propertiesStart = mm.find(b'{', headerEnd, rootJoint.end) + 1
+        propertiesEnd = mm.find(b'\t\t}', propertiesStart, rootJoint.end)
+        if propertiesStart <= 0 or propertiesEnd < 0:
+            raise RuntimeError('Can not find properties of root joint "{0}".'.format(self.rootJoint))
+
+        newProperties = fbxEditor.NEW_ROOT_JOINT_PROPERTIES.encode('utf-8').replace(b'\n', self._newline)
+        return (propertiesStart, propertiesEnd, newProperties)
+
+    def _getRootJointCurveEdits(self, index, rootJoint):
+        edits = []
+        for connection in index.getChildConnections(rootJoint.id):
+            child = index.getObject(connection.childId)
+            if connection.type == 'OP' and child and child.nodeType == 'AnimationCurveNode':
+                edits.append((connection.start, connection.end, b''))
+        return edits
+
+    @staticmethod
+    def _removeOverlappingEdits(edits):
+        result = []
+        end = -1
+        for edit in edits:
+            if edit[0] < end:
+                continue
+            result.append(edit)
+            end = max(end, edit[1])
+        return result
+
+    def _addNamespaceEdits(self, mm, edits):
+        namespace = (':' + self.namespace).encode('utf-8')
+
+        allEdits = []
+        pos = 0
+        for start, end, newBytes in edits + [(len(mm), len(mm), None)]:
+            found = mm.find(namespace, pos, start)
+            while found >= 0 and found + len(namespace) <= start:
+                allEdits.append((found, found + len(namespace), b''))
+                found = mm.find(namespace, found + len(namespace), start)
+
+            if newBytes is not None:
+                allEdits.append((start, end, newBytes.replace(namespace, b'')))
+            pos = max(pos, end)
+
+        return allEdits
+
+    def _splice(self, srcFile, mm, edits, tempFile):
+        try:
+            with open(tempFile, 'wb') as f:
+                pos = 0
+                for start, end, newBytes in edits:
+                    copyRange(srcFile, f, mm, pos, start)
+                    f.write(newBytes)
+                    pos = end
+                copyRange(srcFile, f, mm, pos, len(mm))
+        except Exception:
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            raise
@@ -0,0 +1,241 @@
+"""
+Description: Removes animation that never changes and objects left over by other edits from exported ascii fbx files.
+A curve holding one value is dropped and its value is written to the channel of its curve node, a curve node left without curves is dropped and its values are written to the property it animated.
+Objects that only exist for their parents are removed with their connections once the parents are gone, like curve nodes of the root joint in local bake space.
+"""
+
+import os
+import re
+import mmap
+import shutil
+import fnmatch
+import collections
+
+from . import fileUtils
+from . import fbxIndex
+from . import fbxPatcher
+from . import fbxSplitter
+
+
+DEFAULT_TOLERANCE = 0.00001
+
+# Properties whose static value can be written to the animated object, the type is used when the object has no line for it yet
+STATIC_PROPERTY_TYPES = {
+    'Lcl Translation': b'"Lcl Translation", "", "A"',
+    'Lcl Rotation': b'"Lcl Rotation", "", "A"',
+    'Lcl Scaling': b'"Lcl Scaling", "", "A"',
+    'DeformPercent': b'"Number", "", "A"',
+}
+MEMBER_PROPERTIES = ['DeformPercent']  # Blendshape channels also keep the weight outside of Properties70
+DEPENDENT_NODE_TYPES = ['AnimationCurveNode', 'AnimationCurve', 'NodeAttribute', 'Geometry', 'Deformer']
+
+KEY_VALUES_PATTERN = re.compile(br'\n\t\tKeyValueFloat: \*\d+ \{\s*a: ([^}]*)\}')
+VALUE_SEPARATOR_PATTERN = re.compile(br'[\s,]+')
+CHANNEL_PROPERTY_PATTERN = re.compile(br'\n\t\t\tP: "(d\|[^"]*)", "[^"]*", "[^"]*", "[^"]*",([^\r\n]*)')
+
+
+def getStaticValue(curveBytes, tolerance):
+    """Return the value token of a curve whose keys stay within tolerance, None if the curve changes."""
+    match = KEY_VALUES_PATTERN.search(curveBytes)
+    if not match:
+        return None
+
+    tokens = [token for token in VALUE_SEPARATOR_PATTERN.split(match.group(1)) if token]
+    if not tokens:
+        return None
+    values = [float(token) for token in tokens]
+    if max(values) - min(values) > tolerance:
+        return None
+    return tokens[0]
+
+
+def getChannelProperties(mm, curveNode):
+    """Return channel name to (start, end) of the value of each channel property of the curve node."""
+    channels = collections.OrderedDict()
+    for match in CHANNEL_PROPERTY_PATTERN.finditer(mm[curveNode.start:curveNode.end]):
+        channels[match.group(1).decode('utf-8')] = (curveNode.start + match.start(2), curveNode.start + match.end(2))
+    return channels
+
+
+class FBXPruner(object):
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, keepChannels=None):
+        """keepChannels are fnmatch patterns of channels that are never pruned, e.g. "Root.Lcl Translation.*" or "*.DeformPercent.*"."""
+        super(FBXPruner, self).__init__()
+        self.tolerance = tolerance
+        self.keepChannels = keepChannels or []
+        self._newline = b'\n'
+
+        self.numCurves = 0
+        self.numPrunedCurves = 0
+        self.numRemovedObjects = 0
+
+    def prune(self, fbxFile, outFile=None):
+        """Prune fbxFile in one pass and return the number of bytes read."""
+        outFile = outFile or fbxFile
+        numBytes = os.path.getsize(fbxFile)
+        if not numBytes:
+            return numBytes
+
+        index = fbxIndex.FBXIndex(fbxFile)
+        tempFile = outFile + '.tmp'
+        with open(fbxFile, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                edits = self.getEdits(mm, index)
+                if edits:
+                    self._write(f, mm, edits, tempFile)
+            finally:
+                mm.close()
+
+        if edits:
+            fileUtils.replaceFile(tempFile, outFile)
+        elif outFile != fbxFile:
+            shutil.copyfile(fbxFile, outFile)
+
+        return numBytes
+
+    def getEdits(self, mm, index):
+        self._newline = b'\r\n' if mm.find(b'\r\n', 0, 4096) >= 0 else b'\n'
+        self.numCurves = 0
+        self.numPrunedCurves = 0
+        self.numRemovedObjects = 0
+
+        objectEdits = collections.defaultdict(list)
+        removedIds = set()
+        for curveNode in index.objects.values():
+            if curveNode.nodeType == 'AnimationCurveNode':
+                removedIds.update(self._pruneCurveNode(mm, index, curveNode, objectEdits))
+        removedIds.update(self._getOrphanIds(index, removedIds))
+        if not removedIds:
+            return []
+        self.numRemovedObjects = len(removedIds)
+
+        edits = []
+        counts = {}
+        for fbxObject in index.objects.values():
+            if fbxObject.id in removedIds:
+                edits.append((fbxObject.start, fbxObject.end, b''))
+                continue
+            edits.extend(objectEdits.get(fbxObject.id, []))
+            counts[fbxObject.nodeType] = counts.get(fbxObject.nodeType, 0) + 1
+
+        for connection in index.connections:
+            if connection.childId in removedIds or connection.parentId in removedIds:
+                start, end = fbxSplitter.getConnectionRange(mm, connection)
+                edits.append((start, end, b''))
+
+        if 'Definitions' in index.sections:
+            start, end = index.sections['Definitions']
+            edits.append((start, end, fbxSplitter.rewriteDefinitions(mm[start:end], counts)))
+
+        edits.sort()
+        return edits
+
+    def isKept(self, targetName, propertyName, channel):
+        channelPath = '{0}.{1}.{2}'.format(targetName, propertyName, channel.split('|')[-1])
+        return any(fnmatch.fnmatchcase(channelPath, pattern) for pattern in self.keepChannels)
+
+    def _pruneCurveNode(self, mm, index, curveNode, objectEdits):
+        """Add edits for static curves of the curve node and return ids of the curves and the curve node when they can be removed."""
+        target, propertyName = self._getTarget(index, curveNode)
+        curveConnections = [connection for connection in index.getChildConnections(curveNode.id) if connection.childId in index.objects]
+        self.numCurves += len(curveConnections)
+        if not target or propertyName not in STATIC_PROPERTY_TYPES or not curveConnections:
+            return []
+
+        channels = getChannelProperties(mm, curveNode)
+        staticValues = {}
+        for connection in curveConnections:
+            curve = index.objects[connection.childId]
+            if curve.nodeType != 'AnimationCurve' or connection.property not in channels or self.isKept(target.name, propertyName, connection.property):
+                continue
+            value = getStaticValue(mm[curve.start:curve.end], self.tolerance)
+            if value is not None:
+                staticValues[connection.property] = (curve.id, value)
+        if not staticValues:
+            return []
+
+        if len(staticValues) == len(curveConnections):
+            values = [staticValues[channel][1] if channel in staticValues else mm[start:end] for channel, (start, end) in channels.items()]
+            propertyEdits = self._getPropertyEdits(mm, target, propertyName, b','.join(values))
+            if propertyEdits:
+                objectEdits[target.id].extend(propertyEdits)
+                self.numPrunedCurves += len(staticValues)
+                return [curveId for curveId, value in staticValues.values()] + [curveNode.id]
+
+        for channel, (curveId, value) in staticValues.items():
+            objectEdits[curveNode.id].append(channels[channel] + (value,))
+        self.numPrunedCurves += len(staticValues)
+        return [curveId for curveId, value in staticValues.values()]
+
+    def _getTarget(self, index, curveNode):
+        for connection in index.getParentConnections(curveNode.id):
+            target = index.getObject(connection.parentId)
+            if target and connection.type == 'OP':
+                return target, connection.property
+        return None, None
+
+    def _getPropertyEdits(self, mm, target, propertyName, value):
+        """Return edits that set the static value of the property on target, None when target has no place for it."""
+        objectBytes = mm[target.start:target.end]
+        name = propertyName.encode('utf-8')
+
+        edits = []
+        match = re.search(br'\n\t\t\tP: "' + re.escape(name) + br'", "[^"]*", "[^"]*", "[^"]*",([^\r\n]*)', objectBytes)
+        if match:
+            edits.append((target.start + match.start(1), target.start + match.end(1), value))
+        if propertyName in MEMBER_PROPERTIES:
+            match = re.search(br'\n\t\t' + re.escape(name) + br': ([^\r\n]*)', objectBytes)
+            if match:
+                edits.append((target.start + match.start(1), target.start + match.end(1), value))
+        if edits:
+            return edits
+
+        propertiesStart = objectBytes.find(b'\n\t\tProperties70:  {')
+        propertiesEnd = objectBytes.find(b'\n\t\t}', propertiesStart + 1) + 1
+        if propertiesStart < 0 or propertiesEnd <= 0:
+            return None
+        line = b'\t\t\tP: "' + name + b'", ' + STATIC_PROPERTY_TYPES[propertyName] + b',' + value + self._newline
+        return [(target.start + propertiesEnd, target.start + propertiesEnd, line)]
+
+    def _getOrphanIds(self, index, removedIds):
+        """Dependent objects without a parent that is left, curve nodes also need the property they animate."""
+        orphanIds = set()
+        isChanged = True
+        while isChanged:
+            isChanged = False
+            for fbxObject in index.objects.values():
+                if fbxObject.nodeType not in DEPENDENT_NODE_TYPES or fbxObject.id in removedIds or fbxObject.id in orphanIds:
+                    continue
+                if not self._hasParent(index, fbxObject, removedIds | orphanIds):
+                    orphanIds.add(fbxObject.id)
+                    isChanged = True
+        return orphanIds
+
+    def _hasParent(self, index, fbxObject, removedIds):
+        for connection in index.getParentConnections(fbxObject.id):
+            if connection.parentId in removedIds:
+                continue
+            if fbxObject.nodeType == 'AnimationCurveNode' and connection.type != 'OP':
+                continue
+            if connection.parentId == fbxIndex.ROOT_NODE_ID or connection.parentId in index.objects:
+                return True
+        return False
+
+    def _write(self, srcFile, mm, edits, tempFile):
+        try:
+            with open(tempFile, 'wb') as f:
+                pos = 0
+                for start, end, newBytes in edits:
+                    fbxPatcher.copyRange(srcFile, f, mm, pos, start)
+                    f.write(newBytes)
+                    pos = end
+                fbxPatcher.copyRange(srcFile, f, mm, pos, len(mm))
+        except Exception:
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            raise
+
+
+def pruneFile(fbxFile, tolerance=DEFAULT_TOLERANCE, keepChannels=None):
+    return FBXPruner(tolerance, keepChannels).prune(fbxFile)
@@ -0,0 +1,219 @@
+"""
+Description: Splits an ascii fbx file exported for several characters at once into one file per namespace.
+Each file keeps the objects of one namespace, objects without a namespace that hang off them and the shared animation stack and layer.
+Objects keep their ids so kept ranges are copied as they are, only definitions and bind poses are rewritten.
+"""
+
+import os
+import re
+import mmap
+
+from . import fileUtils
+from . import fbxIndex
+from . import fbxPatcher
+
+
+SHARED_NODE_TYPES = ['AnimationStack', 'AnimationLayer']
+
+OBJECT_TYPE_PATTERN = re.compile(br'^\tObjectType: "(\w+)" \{')
+TYPE_COUNT_PATTERN = re.compile(br'^(\t\tCount: )(\d+)')
+TOTAL_COUNT_PATTERN = re.compile(br'^(\tCount: )(\d+)')
+POSE_NODE_ID_PATTERN = re.compile(br'\n\t\t\tNode: (-?\d+)')
+NUM_POSE_NODES_PATTERN = re.compile(br'(\n\t\tNbPoseNodes: )\d+')
+
+
+def getNamespace(name):
+    return name.rsplit(':', 1)[0] if ':' in name else None
+
+
+def isInNamespace(name, namespace):
+    return name.startswith(namespace + ':')
+
+
+def getOwnerNamespace(name, namespaces):
+    """Return the longest of namespaces that name is in so nested namespaces keep their objects, None when it is in none of them."""
+    owners = [namespace for namespace in namespaces if isInNamespace(name, namespace)]
+    return max(owners, key=len) if owners else None
+
+
+def getObjectIds(index, namespace, namespaces=None):
+    """
+    Return ids of objects that belong to namespace, namespaces are all namespaces the file is split to.
+    Objects without a namespace, like node attributes, geometry and curves, belong to the namespaced objects they are connected to.
+    """
+    namespaces = namespaces or [namespace]
+    return getLinkedObjectIds(index, [fbxObject.id for fbxObject in index.objects.values() if getOwnerNamespace(fbxObject.name, namespaces) == namespace])
+
+
+def getUnsplitObjectIds(index, namespaces):
+    """Return ids of objects in namespaces the file is not split to and of objects without a namespace that belong to them."""
+    objectIds = [fbxObject.id for fbxObject in index.objects.values() if getNamespace(fbxObject.name) and not getOwnerNamespace(fbxObject.name, namespaces)]
+    return getLinkedObjectIds(index, objectIds)
+
+
+def getLinkedObjectIds(index, objectIds):
+    """Return objectIds with objects without a namespace connected to them, directly or through other objects without a namespace."""
+    linkedIds = set()
+    pending = list(objectIds)
+    while pending:
+        objectId = pending.pop()
+        if objectId in linkedIds:
+            continue
+        linkedIds.add(objectId)
+
+        connections = index.getConnections(objectId)
+        for linkedId in [connection.childId for connection in connections] + [connection.parentId for connection in connections]:
+            linked = index.getObject(linkedId)
+            if not linked or linked.id in linkedIds or linked.nodeType in SHARED_NODE_TYPES or getNamespace(linked.name):
+                continue
+            pending.append(linked.id)
+
+    return linkedIds
+
+
+def getSharedObjectIds(index, ownedIds):
+    """Objects no namespace has claimed are kept in every file, the animation stack and layer are always shared."""
+    sharedIds = set()
+    for fbxObject in index.objects.values():
+        if fbxObject.nodeType in SHARED_NODE_TYPES or (fbxObject.id not in ownedIds and not getNamespace(fbxObject.name)):
+            sharedIds.add(fbxObject.id)
+    return sharedIds
+
+
+def filterPose(poseBytes, objectIds):
+    """Return the pose with only pose nodes of objectIds and the number of nodes left."""
+    parts = poseBytes.split(b'\n\t\tPoseNode:')
+    head, nodes = parts[0], parts[1:]
+
+    tail = b''
+    if nodes:  # Closing lines of the pose object follow the last pose node
+        tailStart = nodes[-1].rfind(b'\n\t\t}') + len(b'\n\t\t}')
+        nodes[-1], tail = nodes[-1][:tailStart], nodes[-1][tailStart:]
+
+    keptNodes = []
+    for node in nodes:
+        match = POSE_NODE_ID_PATTERN.search(node)
+        if match and int(match.group(1)) in objectIds:
+            keptNodes.append(node)
+
+    poseBytes = head + b''.join(b'\n\t\tPoseNode:' + node for node in keptNodes) + tail
+    return NUM_POSE_NODES_PATTERN.sub(br'\g<1>' + str(len(keptNodes)).encode('utf-8'), poseBytes, 1), len(keptNodes)
+
+
+def getConnectionRange(mm, connection):
+    """Range to remove for the connection, including the blank line that separates it from the previous one."""
+    start = connection.start
+    for blankLine in (b'\t\n', b'\t\r\n'):
+        if mm[start - len(blankLine):start] == blankLine:
+            return start - len(blankLine), connection.end
+    return start, connection.end
+
+
+def rewriteDefinitions(definitionBytes, counts):
+    """Set counts of object types found in counts, the total count is the sum of all types."""
+    lines = definitionBytes.splitlines(True)
+    objectType = None
+    typeCounts = []
+    for i, line in enumerate(lines):
+        match = OBJECT_TYPE_PATTERN.match(line)
+        if match:
+            objectType = match.group(1).decode('utf-8')
+            continue
+
+        match = TYPE_COUNT_PATTERN.match(line)
+        if match and objectType:
+            count = int(match.group(2)) if objectType == 'GlobalSettings' else counts.get(objectType, 0)
+            lines[i] = match.group(1) + str(count).encode('utf-8') + line[match.end():]
+            typeCounts.append(count)
+            objectType = None
+
+    for i, line in enumerate(lines):
+        match = TOTAL_COUNT_PATTERN.match(line)
+        if match:
+            lines[i] = match.group(1) + str(sum(typeCounts)).encode('utf-8') + line[match.end():]
+            break
+
+    return b''.join(lines)
+
+
+class FBXNamespaceSplitter(object):
+    def __init__(self, outFiles):
+        """outFiles maps full namespaces, e.g. "heroA:props", to the files they are written to."""
+        super(FBXNamespaceSplitter, self).__init__()
+        self.outFiles = outFiles
+
+    def split(self, fbxFile, index=None):
+        """Write the file of each namespace and return the number of bytes read, nothing is written when a namespace has no objects."""
+        index = index or fbxIndex.FBXIndex(fbxFile)
+
+        namespaceIds = {}
+        for namespace in self.outFiles:
+            namespaceIds[namespace] = getObjectIds(index, namespace, list(self.outFiles))
+            if not namespaceIds[namespace]:
+                raise RuntimeError('"{0}" has no objects in "{1}".'.format(namespace, fbxFile))
+        ownedIds = getUnsplitObjectIds(index, list(self.outFiles))  # Dropped from every file
+        for objectIds in namespaceIds.values():
+            ownedIds.update(objectIds)
+        sharedIds = getSharedObjectIds(index, ownedIds)
+
+        numBytes = os.path.getsize(fbxFile)
+        with open(fbxFile, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for namespace, outFile in self.outFiles.items():
+                    edits = self.getEdits(mm, index, namespaceIds[namespace] | sharedIds)
+                    self._write(f, mm, edits, outFile)
+            finally:
+                mm.close()
+
+        return numBytes
+
+    def getEdits(self, mm, index, objectIds):
+        edits = []
+        counts = {}
+        for fbxObject in index.objects.values():
+            if fbxObject.id not in objectIds:
+                edits.append((fbxObject.start, fbxObject.end, b''))
+                continue
+
+            if fbxObject.nodeType == 'Pose':
+                poseBytes, numNodes = filterPose(mm[fbxObject.start:fbxObject.end], objectIds)
+                if not numNodes:
+                    edits.append((fbxObject.start, fbxObject.end, b''))
+                    continue
+                edits.append((fbxObject.start, fbxObject.end, poseBytes))
+            counts[fbxObject.nodeType] = counts.get(fbxObject.nodeType, 0) + 1
+
+        keptIds = objectIds | set([fbxIndex.ROOT_NODE_ID])
+        for connection in index.connections:
+            if connection.childId in keptIds and connection.parentId in keptIds:
+                continue
+            start, end = getConnectionRange(mm, connection)
+            edits.append((start, end, b''))
+
+        if 'Definitions' in index.sections:
+            start, end = index.sections['Definitions']
+            edits.append((start, end, rewriteDefinitions(mm[start:end], counts)))
+
+        edits.sort()
+        return edits
+
+    def _write(self, srcFile, mm, edits, outFile):
+        tempFile = outFile + '.tmp'
+        try:
+            with open(tempFile, 'wb') as f:
+                pos = 0
+                for start, end, newBytes in edits:
+                    fbxPatcher.copyRange(srcFile, f, mm, pos, start)
+                    f.write(newBytes)
+                    pos = end
+                fbxPatcher.copyRange(srcFile, f, mm, pos, len(mm))
+        except Exception:
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            raise
+        fileUtils.replaceFile(tempFile, outFile)
+
+
+def splitFile(fbxFile, outFiles):
+    return FBXNamespaceSplitter(outFiles).split(fbxFile)
@@ -0,0 +1,192 @@
+"""
+Description: Stitches ascii fbx files exported for consecutive frame ranges of the same item into one file.
+The first segment is used as the base and its curves are extended with keys of the other segments.
+Curves are matched by what they animate because object ids differ between exports, keys at overlapping frames are used once.
+Only byte ranges of the other segments are indexed, their curves are read one at a time while the base curve is written.
+
+Segments are separate bakes, so they can disagree at the frame they share. Rotations are unwrapped again by each export, so whole turns are
+removed from appended keys. Other differences are reported in discontinuities and are not fixed. For example, dynamics and simulations
+restart in every segment, and items that use them should not be exported in chunks.
+"""
+
+import os
+import re
+import math
+
+from . import fileUtils
+from . import fbxIndex
+from . import fbxCurves
+
+
+STOP_PROPERTY_PATTERN = re.compile(r'^(\s*P: "(TimeSpanStop|LocalStop|ReferenceStop)",.*,)(-?\d+)(\s*)$')
+TAKE_TIME_PATTERN = re.compile(r'^(\s*(LocalTime|ReferenceTime): -?\d+,)(-?\d+)(\s*)$')
+
+DEFAULT_TOLERANCE = 0.001
+ROTATION_PROPERTIES = ['Lcl Rotation']
+
+
+def getCurveChannels(fbxFile):
+    index = fbxIndex.FBXIndex(fbxFile)
+    channels = {}
+    for fbxObject in index.objects.values():
+        if fbxObject.nodeType == 'AnimationCurve':
+            channels[fbxObject.id] = index.getCurveChannel(fbxObject.id)
+    return channels
+
+
+def getCurveRanges(fbxFile):
+    """Return (start, end) byte range of the first curve of each channel."""
+    index = fbxIndex.FBXIndex(fbxFile)
+    ranges = {}
+    for fbxObject in index.objects.values():
+        if fbxObject.nodeType == 'AnimationCurve':
+            channel = index.getCurveChannel(fbxObject.id)
+            if channel and channel not in ranges:
+                ranges[channel] = (fbxObject.start, fbxObject.end)
+    return ranges
+
+
+def readCurve(f, start, end):
+    f.seek(start)
+    lines = f.read(end - start).decode('utf-8').replace('\r\n', '\n').splitlines(True)
+    for item in fbxCurves.iterCurves(lines):
+        if isinstance(item, fbxCurves.AnimationCurve):
+            return item
+    return None
+
+
+def getBoundaryOffset(curve, other, isRotation, tolerance):
+    """
+    Return (offset for values of other, difference left at the shared key) when both curves have a key at the frame they share.
+    Rotations are offset by whole turns since each segment unwraps its euler angles on its own.
+    """
+    if not curve.numKeys or not other.numKeys or int(other.keyTimes[0]) != int(curve.keyTimes[-1]):
+        return 0.0, 0.0
+
+    difference = float(curve.keyValues[-1]) - float(other.keyValues[0])
+    offset = 0.0
+    if isRotation and abs(difference) > tolerance:
+        offset = round(difference / 360.0) * 360.0
+    return offset, difference - offset
+
+
+def offsetValues(values, offset):
+    if not offset:
+        return values
+    return [repr(float(value) + offset) for value in values]
+
+
+def appendKeys(curve, other, offset=0.0):
+    """Append keys of other after the last key of curve, offset is added to the appended values."""
+    attributeSets = curve.getAttributeSets()
+    otherSets = other.getAttributeSets()
+
+    numSkipped = 0
+    if curve.numKeys:
+        lastTime = int(curve.keyTimes[-1])
+        while numSkipped < other.numKeys and int(other.keyTimes[numSkipped]) <= lastTime:
+            numSkipped += 1
+
+    numToSkip = numSkipped
+    for attributeSet in otherSets:
+        skipped = min(numToSkip, attributeSet[2])
+        attributeSet[2] -= skipped
+        numToSkip -= skipped
+
+    curve.setKeys(curve.keyTimes + other.keyTimes[numSkipped:], curve.keyValues + offsetValues(other.keyValues[numSkipped:], offset))
+    curve.setAttributeSets(attributeSets + otherSets)
+
+
+class FBXStitcher(object):
+    def __init__(self, tolerance=DEFAULT_TOLERANCE):
+        """Shared keys that still differ by more than tolerance after unwrapping are reported in discontinuities."""
+        super(FBXStitcher, self).__init__()
+        self.tolerance = tolerance
+        self.numStitchedCurves = 0
+        self.missingChannels = []
+        self.discontinuities = []
+
+    def stitch(self, segmentFiles, outFile):
+        """Stitch segmentFiles in order into outFile and return the number of bytes read."""
+        segments = [getCurveRanges(segmentFile) for segmentFile in segmentFiles[1:]]
+        stopTimes = self.readStopTimes(segmentFiles[-1]) if len(segmentFiles) > 1 else {}
+
+        baseChannels = getCurveChannels(segmentFiles[0])
+        self.numStitchedCurves = 0
+        self.missingChannels = []
+        self.discontinuities = []
+
+        tempFile = outFile + '.tmp'
+        segmentHandles = []
+        try:
+            for segmentFile in segmentFiles[1:]:
+                segmentHandles.append(open(segmentFile, 'rb'))
+            with open(segmentFiles[0], 'r') as inFile:
+                with open(tempFile, 'w') as f:
+                    for item in fbxCurves.iterCurves(inFile):
+                        if isinstance(item, fbxCurves.AnimationCurve):
+                            self._stitchCurve(item, baseChannels.get(item.id), zip(segmentHandles, segments))
+                            f.writelines(item.toLines())
+                        else:
+                            f.write(FBXStitcher.replaceStopTime(item, stopTimes))
+        except Exception:
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            raise
+        finally:
+            for segmentHandle in segmentHandles:
+                segmentHandle.close()
+        fileUtils.replaceFile(tempFile, outFile)
+
+        return sum(os.path.getsize(segmentFile) for segmentFile in segmentFiles)
+
+    def readStopTimes(self, segmentFile):
+        """Return stop times of the time spans in the file."""
+        stopTimes = {}
+        with open(segmentFile, 'r') as f:
+            for item in fbxCurves.iterCurves(f):
+                if isinstance(item, fbxCurves.AnimationCurve):
+                    continue
+                match = STOP_PROPERTY_PATTERN.match(item) or TAKE_TIME_PATTERN.match(item)
+                if match:
+                    stopTimes[match.group(2)] = match.group(3)
+        return stopTimes
+
+    def _stitchCurve(self, curve, channel, segments):
+        if channel is None:
+            return
+
+        isRotation = channel[2] in ROTATION_PROPERTIES
+        for segmentHandle, ranges in segments:
+            if channel not in ranges:
+                self.missingChannels.append(channel)
+                continue
+            other = readCurve(segmentHandle, *ranges[channel])
+
+            offset, difference = getBoundaryOffset(curve, other, isRotation, self.tolerance)
+            if abs(difference) > self.tolerance or math.isnan(difference):
+                self.discontinuities.append((channel, int(other.keyTimes[0]), difference))
+            appendKeys(curve, other, offset)
+        self.numStitchedCurves += 1
+
+    @staticmethod
+    def replaceStopTime(line, stopTimes):
+        match = STOP_PROPERTY_PATTERN.match(line) or TAKE_TIME_PATTERN.match(line)
+        if not match or match.group(2) not in stopTimes:
+            return line
+        return match.group(1) + stopTimes[match.group(2)] + match.group(4)
+
+
+def formatDiscontinuities(discontinuities, maxMessages=10):
+    lines = []
+    for (nodeType, name, propertyName, channel), keyTime, difference in discontinuities[:maxMessages]:
+        lines.append('{0}.{1}.{2} jumps by {3:g} at time {4}'.format(name, propertyName, channel.split('|')[-1], difference, keyTime))
+    if len(discontinuities) > maxMessages:
+        lines.append('{0} more'.format(len(discontinuities) - maxMessages))
+    return '\n'.join(lines)
+
+
+def stitchFiles(segmentFiles, outFile, tolerance=DEFAULT_TOLERANCE):
+    stitcher = FBXStitcher(tolerance)
+    stitcher.stitch(segmentFiles, outFile)
+    return stitcher
@@ -0,0 +1,242 @@
+"""
+Description: Checks that a post processed ascii fbx file is consistent before it is published.
+The file is streamed once, only object ids and counts are kept so memory does not grow with the number of keys.
+Each check reports the number of problems and the first of their messages, the report is written as json.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+from . import constants
+from . import fileUtils
+from . import fbxCurves
+from . import fbxClipper
+from . import fbxIndex
+
+
+CHECKS = ['connections', 'root', 'show', 'namespace', 'keys']
+MAX_MESSAGES = 20
+
+SECTION_HEADER_PATTERN = re.compile(r'^(\w+): ')
+OBJECT_HEADER_PATTERN = re.compile(r'^\t(\w+): (-?\d+), "(.*?)::(.*)", "(.*)" \{')
+CONNECTION_PATTERN = re.compile(r'^\tC: "(\w+)",(-?\d+),(-?\d+)')
+
+
+def getReportFile(fbxFile, reportDir=constants.VERIFY_REPORT_DIR):
+    key = os.path.normcase(os.path.abspath(fbxFile)).replace('\\', '/')
+    name = '{0}_{1}.json'.format(os.path.splitext(os.path.basename(fbxFile))[0], hashlib.sha1(key.encode('utf-8')).hexdigest()[:12])
+    return os.path.join(reportDir, name)
+
+
+def writeReport(report, reportFile):
+    reportDir = os.path.dirname(reportFile)
+    if reportDir and not os.path.exists(reportDir):
+        os.makedirs(reportDir)
+
+    tempFile = reportFile + '.tmp'
+    with open(tempFile, 'w') as f:
+        json.dump(report, f, indent=4)
+    fileUtils.replaceFile(tempFile, reportFile)
+
+
+def formatReport(report):
+    lines = ['"{0}" verification has failed.'.format(report['publishFile'] or report['fbxFile'])]
+    for checkName in CHECKS:
+        check = report['checks'][checkName]
+        if check['numErrors']:
+            lines.append('{0}: {1} errors'.format(checkName, check['numErrors']))
+            lines.extend('    {0}'.format(message) for message in check['messages'])
+    if report.get('reportFile'):
+        lines.append('Report: {0}'.format(report['reportFile']))
+    return '\n'.join(lines)
+
+
+class FBXVerifier(object):
+    def __init__(self, rootJoint=None, namespace=None, startFrame=None, endFrame=None, exactKeyCount=False, maxMessages=MAX_MESSAGES):
+        """
+        rootJoint and namespace are the names given to the fbx editor, checks that need them are skipped without them.
+        Keys have to be within startFrame and endFrame, with exactKeyCount every curve also needs a key on each frame like a bake without key reduction.
+        """
+        super(FBXVerifier, self).__init__()
+        self.rootJoint = rootJoint
+        self.namespace = namespace
+        self.startFrame = startFrame
+        self.endFrame = endFrame
+        self.exactKeyCount = exactKeyCount
+        self.maxMessages = maxMessages
+
+    def verify(self, fbxFile, reportFile=None, publishFile=None):
+        """Return the report of fbxFile and write it to reportFile, publishFile is where fbxFile will be published to."""
+        startTime = time.time()
+        self._reset()
+
+        with open(fbxFile, 'r') as f:
+            for item in fbxCurves.iterCurves(f):
+                if isinstance(item, fbxCurves.AnimationCurve):
+                    self._checkCurve(item)
+                else:
+                    self._checkLine(item)
+        self._finish()
+
+        report = {
+            'fbxFile': fbxFile,
+            'publishFile': publishFile,
+            'reportFile': reportFile,
+            'valid': not any(check['numErrors'] for check in self.checks.values()),
+            'numBytes': os.path.getsize(fbxFile),
+            'numObjects': len(self._objectIds),
+            'numConnections': self._numConnections,
+            'numCurves': self._numCurves,
+            'duration': time.time() - startTime,
+            'checks': self.checks,
+        }
+        if reportFile:
+            writeReport(report, reportFile)
+        return report
+
+    def addError(self, checkName, message):
+        check = self.checks[checkName]
+        check['numErrors'] += 1
+        if len(check['messages']) < self.maxMessages:
+            check['messages'].append(message)
+
+    def _reset(self):
+        self.checks = dict((checkName, {'numErrors': 0, 'messages': [], 'skipped': False}) for checkName in CHECKS)
+        self._section = None
+        self._objectIds = set()
+        self._limbNode = None
+        self._rootIds = []
+        self._parentedRootIds = set()
+        self._unresolvedConnections = []
+        self._numConnections = 0
+        self._numCurves = 0
+        self._timeMode = None
+        self._customFrameRate = None
+        self._keyRange = None
+
+        self._rootName = self.rootJoint
+        if self.rootJoint and self.namespace and self.rootJoint.startswith(self.namespace + ':'):
+            self._rootName = self.rootJoint[len(self.namespace) + 1:]
+        self._namespaceMarker = '::{0}:'.format(self.namespace) if self.namespace else None
+
+    def _checkLine(self, line):
+        if line[:1] == '}':
+            self._section = None
+            self._limbNode = None
+            return
+        match = SECTION_HEADER_PATTERN.match(line)
+        if match and line.rstrip().endswith('{'):
+            self._section = match.group(1)
+            return
+
+        if self._section == 'Objects':
+            self._checkObjectLine(line)
+        elif self._section == 'Connections':
+            self._checkConnectionLine(line)
+        elif self._section == 'GlobalSettings':
+            match = fbxClipper.TIME_MODE_PATTERN.match(line)
+            if match:
+                self._timeMode = int(match.group(1))
+            match = fbxClipper.CUSTOM_FRAME_RATE_PATTERN.match(line)
+            if match:
+                self._customFrameRate = float(match.group(1))
+
+    def _checkObjectLine(self, line):
+        if line[:1] == '\t' and line[1:2] != '\t':
+            self._limbNode = None
+            match = OBJECT_HEADER_PATTERN.match(line)
+            if not match:
+                return
+
+            nodeType, objectId, name, subClass = match.group(1), int(match.group(2)), match.group(4), match.group(5)
+            self._addObject(objectId)
+            if self._namespaceMarker and self._namespaceMarker in line:
+                self.addError('namespace', 'Object "{0}" still has the namespace.'.format(name))
+            if nodeType == 'Model' and subClass == 'LimbNode':
+                self._limbNode = name
+                if name == self._rootName:
+                    self._rootIds.append(objectId)
+            return
+
+        if self._limbNode and 'P: "Show"' in line and line.rstrip().rsplit(',', 1)[-1] != '1':
+            self.addError('show', 'Joint "{0}" is hidden.'.format(self._limbNode))
+
+    def _checkConnectionLine(self, line):
+        if line.startswith('\t;'):
+            if self._namespaceMarker and self._namespaceMarker in line:
+                self.addError('namespace', 'Connection "{0}" still has the namespace.'.format(line.strip()[1:]))
+            return
+
+        match = CONNECTION_PATTERN.match(line)
+        if not match:
+            return
+
+        self._numConnections += 1
+        childId, parentId = int(match.group(2)), int(match.group(3))
+        if parentId == fbxIndex.ROOT_NODE_ID:
+            self._parentedRootIds.add(childId)
+        if childId not in self._objectIds or (parentId != fbxIndex.ROOT_NODE_ID and parentId not in self._objectIds):
+            self._unresolvedConnections.append((childId, parentId))  # Resolved at the end in case objects follow connections
+
+    def _checkCurve(self, curve):
+        self._numCurves += 1
+        self._addObject(curve.id)
+
+        if curve.numKeys == 0:
+            self.addError('keys', 'Curve {0} has no keys.'.format(curve.id))
+            return
+        if self.startFrame is None or self.endFrame is None:
+            return
+
+        if self._keyRange is None:
+            self._keyRange = self._getKeyRange()
+        startTime, endTime, numFrames, margin = self._keyRange
+
+        if self.exactKeyCount and curve.numKeys != numFrames:
+            self.addError('keys', 'Curve {0} has {1} keys for {2} frames.'.format(curve.id, curve.numKeys, numFrames))
+        elif curve.numKeys > numFrames:
+            self.addError('keys', 'Curve {0} has {1} keys, more than {2} frames.'.format(curve.id, curve.numKeys, numFrames))
+
+        firstTime, lastTime = int(curve.keyTimes[0]), int(curve.keyTimes[-1])
+        if firstTime < startTime - margin or lastTime > endTime + margin:
+            self.addError('keys', 'Curve {0} has keys outside of frames {1} to {2}.'.format(curve.id, self.startFrame, self.endFrame))
+
+    def _getKeyRange(self):
+        """Return (start time, end time, number of frames, half a frame) of the frame range in fbx time."""
+        if self._timeMode == fbxClipper.TIME_MODE_CUSTOM and self._customFrameRate and self._customFrameRate > 0:
+            frameRate = self._customFrameRate
+        else:
+            frameRate = fbxClipper.TIME_MODE_FRAME_RATES.get(self._timeMode, fbxClipper.DEFAULT_FRAME_RATE)
+
+        numFrames = int(round(float(self.endFrame) - float(self.startFrame))) + 1
+        margin = fbxClipper.frameToKTime(0.5, frameRate)
+        return fbxClipper.frameToKTime(self.startFrame, frameRate), fbxClipper.frameToKTime(self.endFrame, frameRate), numFrames, margin
+
+    def _addObject(self, objectId):
+        if objectId in self._objectIds:
+            self.addError('connections', 'Object id {0} is used more than once.'.format(objectId))
+        self._objectIds.add(objectId)
+
+    def _finish(self):
+        for childId, parentId in self._unresolvedConnections:
+            for objectId in (childId, parentId):
+                if objectId != fbxIndex.ROOT_NODE_ID and objectId not in self._objectIds:
+                    self.addError('connections', 'Connection {0} -> {1} refers to missing object {2}.'.format(childId, parentId, objectId))
+
+        if self._rootName:
+            if not self._rootIds:
+                self.addError('root', 'Root joint "{0}" is missing.'.format(self._rootName))
+            elif not any(rootId in self._parentedRootIds for rootId in self._rootIds):
+                self.addError('root', 'Root joint "{0}" is not parented to RootNode.'.format(self._rootName))
+        else:
+            self.checks['root']['skipped'] = True
+
+        self.checks['namespace']['skipped'] = not self._namespaceMarker
+        self.checks['keys']['skipped'] = self.startFrame is None or self.endFrame is None
+
+
+def verifyFile(fbxFile, rootJoint=None, namespace=None, startFrame=None, endFrame=None, reportFile=None):
+    return FBXVerifier(rootJoint, namespace, startFrame, endFrame).verify(fbxFile, reportFile)
@@ -0,0 +1,145 @@
+"""
+Description: Moves finished fbx files from the local staging directory to export directories on background threads.
+Files are copied next to the destination, verified by size and checksum and then renamed over the destination.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import threading
+import traceback
+from multiprocessing.pool import ThreadPool
+
+from . import fileUtils
+from . import publishJournal
+
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def getDefaultStagingDirectory():
+    return os.path.join(tempfile.gettempdir(), 'takAniPublisher', 'staging')
+
+
+def copyFile(srcFile, dstFile):
+    """Copy srcFile to dstFile and return the checksum of the copied data."""
+    sha = hashlib.sha1()
+    with open(srcFile, 'rb') as inFile:
+        with open(dstFile, 'wb') as outFile:
+            while True:
+                block = inFile.read(COPY_BLOCK_SIZE)
+                if not block:
+                    break
+                sha.update(block)
+                outFile.write(block)
+            outFile.flush()
+            os.fsync(outFile.fileno())
+    return sha.hexdigest()
+
+
+def transferFile(srcFile, dstFile, checksum=None, removeSource=True):
+    """Move srcFile to dstFile atomically, checksum is the expected checksum of srcFile if it is known."""
+    dstDir = os.path.dirname(dstFile)
+    if dstDir and not os.path.exists(dstDir):
+        os.makedirs(dstDir)
+
+    tempFile = dstFile + '.transfer'
+    try:
+        sourceChecksum = copyFile(srcFile, tempFile)
+        if checksum and sourceChecksum != checksum:
+            raise IOError('"{0}" has changed after it was staged.'.format(srcFile))
+
+        # Read back what has arrived, a copy to a network share can be incomplete without an error
+        if os.path.getsize(tempFile) != os.path.getsize(srcFile) or publishJournal.getChecksum(tempFile) != sourceChecksum:
+            raise IOError('"{0}" has been corrupted while it was copied.'.format(dstFile))
+    except Exception:
+        if os.path.exists(tempFile):
+            os.remove(tempFile)
+        raise
+    fileUtils.replaceFile(tempFile, dstFile)
+
+    if removeSource:
+        os.remove(srcFile)
+
+    return sourceChecksum
+
+
+def runTransfer(srcFile, dstFile, checksum, callback):
+    result = {'srcFile': srcFile, 'dstFile': dstFile, 'numBytes': 0, 'checksum': None, 'duration': 0.0, 'error': None}
+
+    startTime = time.time()
+    try:
+        result['numBytes'] = os.path.getsize(srcFile)
+        result['checksum'] = transferFile(srcFile, dstFile, checksum)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['duration'] = time.time() - startTime
+
+    if callback:
+        try:
+            callback(result)
+        except Exception:
+            sys.stderr.write(traceback.format_exc())
+
+    return result
+
+
+class TransferPool(object):
+    """
+    Transfers run on a few threads since they wait on disks and network, submit blocks when maxPending transfers are waiting.
+    Callbacks are called on the transfer threads.
+    """
+    def __init__(self, numWorkers=2, maxPending=None):
+        super(TransferPool, self).__init__()
+        self.numWorkers = max(1, numWorkers)
+        self.maxPending = maxPending or self.numWorkers * 2
+
+        self.results = []
+
+        self._pool = None
+        self._asyncResults = []
+        self._finishThread = None
+
+    def submit(self, srcFile, dstFile, checksum=None, callback=None):
+        if not self._pool:
+            self._pool = ThreadPool(self.numWorkers)
+
+        pending = [asyncResult for asyncResult in self._asyncResults if not asyncResult.ready()]
+        if len(pending) >= self.maxPending:
+            pending[0].wait()
+
+        self._asyncResults.append(self._pool.apply_async(runTransfer, (srcFile, dstFile, checksum, callback)))
+
+    def getNumPending(self):
+        return len([asyncResult for asyncResult in self._asyncResults if not asyncResult.ready()])
+
+    def finish(self, callback=None):
+        """Stop accepting transfers and call callback with all results on a background thread once they are done."""
+        self._finishThread = threading.Thread(target=self._finish, args=(callback,))
+        self._finishThread.start()
+
+    def wait(self, onWait=None, interval=0.05):
+        """onWait is called every interval seconds until the transfers are done, e.g. to keep a ui responsive."""
+        if self._finishThread is None:
+            self.finish()
+        while onWait and self._finishThread.is_alive():
+            onWait()
+            self._finishThread.join(interval)
+        self._finishThread.join()
+        return self.results
+
+    def isDone(self):
+        return self._finishThread is not None and not self._finishThread.is_alive()
+
+    def _finish(self, callback):
+        self.results = [asyncResult.get() for asyncResult in self._asyncResults]
+        if self._pool:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._asyncResults = []
+
+        if callback:
+            callback(self.results)
@@ -0,0 +1,15 @@
+"""
+Description: File helpers without maya so post process workers and tests can use them.
+"""
+
+import os
+
+
+def replaceFile(srcFile, dstFile):
+    if hasattr(os, 'replace'):
+        os.replace(srcFile, dstFile)
+        return
+
+    if os.path.exists(dstFile):
+        os.remove(dstFile)
+    os.rename(srcFile, dstFile)
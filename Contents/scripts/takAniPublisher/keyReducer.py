@@ -0,0 +1,238 @@
+"""
+Description: Removes redundant keys of baked animation curves in ascii fbx files.
+A key is removed when linear interpolation of its neighbors stays within the tolerance for every original key it spans.
+Curves are reduced in batches with numpy when it is available, otherwise curve by curve in pure python with the same result.
+"""
+
+import os
+
+from . import fileUtils
+from . import fbxCurves
+
+
+DEFAULT_TOLERANCE = 0.001
+DEFAULT_BATCH_SIZE = 512
+
+np = None  # Imported by importNumpy when a reducer is created, it would slow down opening the tool otherwise
+_isNumpyImported = False
+
+
+def importNumpy():
+    """Return numpy, None when it is not available."""
+    global np, _isNumpyImported
+    if not _isNumpyImported:
+        _isNumpyImported = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+def selectNonAdjacent(candidates):
+    """Keys next to each other can not be removed in the same pass, take every other key of each run of candidates."""
+    selected = []
+    runLength = 0
+    for candidate in candidates:
+        runLength = runLength + 1 if candidate else 0
+        selected.append(candidate and runLength % 2 == 1)
+    return selected
+
+
+def reduceCurve(times, values, tolerance):
+    """Return indices of the keys to keep."""
+    kept = list(range(len(times)))
+
+    while len(kept) > 2:
+        numKept = len(kept)
+        errors = [0.0] * numKept
+
+        for rank in range(1, numKept - 1):
+            key = kept[rank]
+            errors[rank] = abs(values[key] - interpolate(times, values, kept[rank - 1], kept[rank + 1], times[key]))
+
+        for rank in range(numKept - 1):
+            left, right = kept[rank], kept[rank + 1]
+            for index in range(left + 1, right):
+                if rank > 0:
+                    error = abs(values[index] - interpolate(times, values, kept[rank - 1], right, times[index]))
+                    errors[rank] = max(errors[rank], error)
+                if rank + 1 < numKept - 1:
+                    error = abs(values[index] - interpolate(times, values, left, kept[rank + 2], times[index]))
+                    errors[rank + 1] = max(errors[rank + 1], error)
+
+        candidates = [0 < rank < numKept - 1 and errors[rank] <= tolerance for rank in range(numKept)]
+        selected = selectNonAdjacent(candidates)
+        if not any(selected):
+            break
+        kept = [key for key, isSelected in zip(kept, selected) if not isSelected]
+
+    return kept
+
+
+def interpolate(times, values, start, end, time):
+    return values[start] + (values[end] - values[start]) * (time - times[start]) / (times[end] - times[start])
+
+
+def reduceCurvesNumpy(curveTimes, curveValues, tolerance):
+    """
+    Same passes as reduceCurve but for all curves at once on flat arrays.
+    First and last keys of each curve are always kept so no window crosses into a neighbor curve.
+    Return a list of kept indices per curve.
+    """
+    lengths = np.array([len(times) for times in curveTimes], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    times = np.array([float(time) for times in curveTimes for time in times], dtype=np.float64)
+    values = np.array([float(value) for values in curveValues for value in values], dtype=np.float64)
+
+    numSamples = len(times)
+    isEnd = np.zeros(numSamples, dtype=bool)
+    isEnd[offsets[:-1][lengths > 0]] = True
+    isEnd[offsets[1:][lengths > 0] - 1] = True
+    keep = np.ones(numSamples, dtype=bool)
+
+    def interpolateNumpy(start, end, time):
+        return values[start] + (values[end] - values[start]) * (time - times[start]) / (times[end] - times[start])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        while True:
+            keptIndices = np.flatnonzero(keep)
+            numKept = len(keptIndices)
+            ranks = np.cumsum(keep) - 1
+            prevKept = keptIndices[np.maximum(np.arange(numKept) - 1, 0)]
+            nextKept = keptIndices[np.minimum(np.arange(numKept) + 1, numKept - 1)]
+            isInterior = ~isEnd[keptIndices]
+
+            errors = np.zeros(numKept, dtype=np.float64)
+            errors[isInterior] = np.abs(values[keptIndices] - interpolateNumpy(prevKept, nextKept, times[keptIndices]))[isInterior]
+
+            freeIndices = np.flatnonzero(~keep)
+            if len(freeIndices):
+                leftRanks = ranks[freeIndices]
+                rightRanks = leftRanks + 1
+                freeTimes = times[freeIndices]
+                freeValues = values[freeIndices]
+
+                leftErrors = np.abs(freeValues - interpolateNumpy(prevKept[leftRanks], keptIndices[rightRanks], freeTimes))
+                leftErrors[~isInterior[leftRanks]] = 0.0
+                np.maximum.at(errors, leftRanks, leftErrors)
+
+                rightErrors = np.abs(freeValues - interpolateNumpy(keptIndices[leftRanks], nextKept[rightRanks], freeTimes))
+                rightErrors[~isInterior[rightRanks]] = 0.0
+                np.maximum.at(errors, rightRanks, rightErrors)
+
+            candidates = isInterior & (errors <= tolerance)
+            runStarts = candidates & ~np.concatenate([[False], candidates[:-1]])
+            runStartRanks = np.maximum.accumulate(np.where(runStarts, np.arange(numKept), 0))
+            selected = candidates & ((np.arange(numKept) - runStartRanks) % 2 == 0)
+            if not selected.any():
+                break
+            keep[keptIndices[selected]] = False
+
+    keptLists = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        keptLists.append((np.flatnonzero(keep[start:end])).tolist())
+    return keptLists
+
+
+class KeyReducer(object):
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, precision=None, batchSize=DEFAULT_BATCH_SIZE, useNumpy=True):
+        super(KeyReducer, self).__init__()
+        self.tolerance = tolerance
+        self.precision = precision
+        self.batchSize = batchSize
+        self.useNumpy = useNumpy and importNumpy() is not None
+
+        self.numKeys = 0
+        self.numReducedKeys = 0
+
+    def reduce(self, fbxFile, outFile=None):
+        """Reduce keys of all curves in one pass and return the number of bytes read."""
+        outFile = outFile or fbxFile
+        tempFile = outFile + '.tmp'
+        numBytes = os.path.getsize(fbxFile)
+
+        try:
+            with open(fbxFile, 'r') as inFile:
+                with open(tempFile, 'w') as f:
+                    f.writelines(self.reduceLines(inFile))
+        except Exception:
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            raise
+        fileUtils.replaceFile(tempFile, outFile)
+
+        return numBytes
+
+    def reduceLines(self, lines):
+        self.numKeys = 0
+        self.numReducedKeys = 0
+
+        # Lines between buffered curves are held back until the end of the section so the output keeps its order
+        pending = []
+        curves = []
+        for item in fbxCurves.iterCurves(lines):
+            if isinstance(item, fbxCurves.AnimationCurve):
+                pending.append(item)
+                curves.append(item)
+                if len(curves) >= self.batchSize:
+                    for line in self._flush(pending, curves):
+                        yield line
+                    pending = []
+                    curves = []
+            elif curves and item.startswith('\t'):
+                pending.append(item)
+            else:
+                for line in self._flush(pending, curves):
+                    yield line
+                pending = []
+                curves = []
+                yield item
+
+        for line in self._flush(pending, curves):
+            yield line
+
+    def _flush(self, pending, curves):
+        self.reduceCurves(curves)
+        for item in pending:
+            if isinstance(item, fbxCurves.AnimationCurve):
+                for line in item.toLines():
+                    yield line
+            else:
+                yield item
+
+    def reduceCurves(self, curves):
+        curves = [curve for curve in curves if curve.numKeys and curve.numKeys == len(curve.keyValues)]
+        if not curves:
+            return
+
+        if self.useNumpy:
+            keptLists = reduceCurvesNumpy([curve.keyTimes for curve in curves], [curve.keyValues for curve in curves], self.tolerance)
+        else:
+            keptLists = []
+            for curve in curves:
+                times = [float(time) for time in curve.keyTimes]
+                values = [float(value) for value in curve.keyValues]
+                keptLists.append(reduceCurve(times, values, self.tolerance))
+
+        for curve, kept in zip(curves, keptLists):
+            self.numKeys += curve.numKeys
+            self.numReducedKeys += len(kept)
+
+            keyValues = curve.keyValues
+            if self.precision is not None:
+                keyValues = [self.formatValue(value) for value in keyValues]
+
+            if len(kept) < curve.numKeys:
+                curve.setKeys([curve.keyTimes[index] for index in kept], [keyValues[index] for index in kept])
+                curve.setInterpolation(fbxCurves.INTERPOLATION_LINEAR)
+            elif self.precision is not None:
+                curve.setKeys(curve.keyTimes, keyValues)
+
+    def formatValue(self, value):
+        return '{0:.{1}g}'.format(float(value), self.precision)
+
+
+def reduceFile(fbxFile, tolerance=DEFAULT_TOLERANCE, precision=None):
+    return KeyReducer(tolerance, precision).reduce(fbxFile)
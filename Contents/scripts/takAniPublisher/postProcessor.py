@@ -0,0 +1,157 @@
+"""
+Description: Runs fbx post processing jobs in or out of the maya process.
+Jobs are plain dictionaries so they can be sent to worker processes.
+"""
+
+import os
+import sys
+import time
+import traceback
+import multiprocessing
+
+from . import fbxEditor
+from . import fbxPatcher
+from . import fbxBinary
+from . import keyReducer
+from . import fbxClipper
+from . import fbxPruner
+from . import fbxVerifier
+
+
+def createEditJob(fbxFile, rootJoint, namespace, bakeSpace, editMode='stream', binary=False, keyReduction=None, outFile=None, clips=None, pruning=None, verify=None):
+    """
+    keyReduction and pruning are None or dictionaries of keyReducer.KeyReducer and fbxPruner.FBXPruner arguments, fbxFile is edited in place without outFile.
+    clips are dictionaries with startFrame, endFrame and outFile, the edited file is split to them and removed.
+    verify is None or a dictionary for each output file with fbxVerifier.FBXVerifier range arguments, reportFile and publishFile.
+    """
+    return {
+        'fbxFile': fbxFile,
+        'rootJoint': rootJoint,
+        'namespace': namespace,
+        'bakeSpace': bakeSpace,
+        'editMode': editMode,
+        'binary': binary,
+        'keyReduction': keyReduction,
+        'outFile': outFile,
+        'clips': clips,
+        'pruning': pruning,
+        'verify': verify,
+    }
+
+
+def editFBX(job):
+    if job['editMode'] == 'patch':
+        editor = fbxPatcher.FBXPatcher(job['rootJoint'], job['namespace'], job['bakeSpace'])
+    else:
+        editor = fbxEditor.FBXEditor(job['rootJoint'], job['namespace'], job['bakeSpace'])
+    outFile = job.get('outFile') or job['fbxFile']
+    numBytes = editor.edit(job['fbxFile'], outFile)
+
+    outFiles = [outFile]
+    if job.get('clips'):  # Edits are done once on the whole bake, keys are reduced per clip so clip boundaries keep their keys
+        fbxClipper.splitFile(outFile, job['clips'])
+        os.remove(outFile)
+        outFiles = [clip['outFile'] for clip in job['clips']]
+
+    verifyArgsList = job.get('verify') or [None] * len(outFiles)
+    for outFile, verifyArgs in zip(outFiles, verifyArgsList):  # Channels can be static in a clip but not in the whole bake
+        if job.get('pruning') is not None:
+            fbxPruner.FBXPruner(**job['pruning']).prune(outFile)
+
+        if job.get('keyReduction') is not None:
+            keyReducer.KeyReducer(**job['keyReduction']).reduce(outFile)
+
+        if verifyArgs is not None:  # Binary files can not be streamed as text, they are verified before the conversion
+            verifyArgs = dict(verifyArgs)
+            reportFile = verifyArgs.pop('reportFile', None)
+            publishFile = verifyArgs.pop('publishFile', None)
+            report = fbxVerifier.FBXVerifier(job['rootJoint'], job['namespace'], **verifyArgs).verify(outFile, reportFile, publishFile)
+            if not report['valid']:
+                raise RuntimeError(fbxVerifier.formatReport(report))
+
+        if job.get('binary'):
+            fbxBinary.convertFile(outFile)
+
+    return numBytes
+
+
+def runJob(job):
+    result = {'fbxFile': job['fbxFile'], 'namespace': job['namespace'], 'numBytes': 0, 'duration': 0.0, 'error': None}
+
+    startTime = time.time()
+    try:
+        result['numBytes'] = editFBX(job)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['duration'] = time.time() - startTime
+
+    return result
+
+
+def getPythonExecutable():
+    """Worker processes can not be started with the maya gui executable, use mayapy next to it."""
+    executable = sys.executable
+    if not os.path.basename(executable).lower().startswith('maya'):
+        return executable
+
+    exeDir = os.path.dirname(executable)
+    mayapyName = 'mayapy.exe' if sys.platform == 'win32' else 'mayapy'
+    for mayapy in [os.path.join(exeDir, mayapyName), os.path.join(exeDir, '..', 'bin', mayapyName)]:
+        if os.path.exists(mayapy):
+            return os.path.normpath(mayapy)
+
+    return executable
+
+
+def getContext():
+    """
+    Multiprocessing context that spawns workers with mayapy, None when workers could only be forked from maya.
+    Python 2 multiprocessing only spawns on windows, set_executable does not exist on other platforms.
+    """
+    if hasattr(multiprocessing, 'get_context'):
+        context = multiprocessing.get_context('spawn')
+    else:
+        context = multiprocessing
+    if not hasattr(context, 'set_executable'):
+        return None
+    context.set_executable(getPythonExecutable())
+    return context
+
+
+def canSpawnWorkers():
+    return getContext() is not None
+
+
+class PostProcessPool(object):
+    def __init__(self, numWorkers=2, maxPending=None):
+        super(PostProcessPool, self).__init__()
+        self.numWorkers = max(1, numWorkers)
+        self.maxPending = maxPending or self.numWorkers * 2
+
+        self._pool = None
+        self._asyncResults = []
+
+    def submit(self, job):
+        if not self._pool:
+            context = getContext()
+            if context is None:
+                raise RuntimeError('Post processing workers can not be spawned on this platform.')
+            self._pool = context.Pool(processes=self.numWorkers)
+
+        pending = [asyncResult for asyncResult in self._asyncResults if not asyncResult.ready()]
+        if len(pending) >= self.maxPending:
+            pending[0].wait()
+
+        self._asyncResults.append(self._pool.apply_async(runJob, (job,)))
+
+    def join(self):
+        results = [asyncResult.get() for asyncResult in self._asyncResults]
+        self.close()
+        return results
+
+    def close(self):
+        if self._pool:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._asyncResults = []
@@ -0,0 +1,121 @@
+"""
+Description: Remembers what each published fbx file was made from so unchanged items can be skipped.
+Published files are matched by size and modification time only, their content is not read so checking stays cheap on network shares.
+"""
+
+import maya.cmds as cmds
+
+import os
+import json
+import hashlib
+
+from . import constants
+from . import fileUtils
+from . import exportProfiles
+
+
+# Settings that change the bytes of published files, the export profile is hashed by its options instead of its name
+OUTPUT_SETTINGS = [
+    'fbxEditMode',
+    'keyReduction', 'keyReductionTolerance', 'keyPrecision',
+    'pruneStaticChannels', 'staticChannelTolerance', 'keepChannels',
+    'verifyPublish',
+    'chunkedExport', 'chunkSize', 'sharedBake',
+]
+
+
+def getAnimCurves(nodes):
+    history = cmds.listHistory(nodes, pruneDagObjects=False) or []
+    return sorted(set(cmds.ls(history, type='animCurve') or []))
+
+
+def getAnimCurvesHash(nodes):
+    sha = hashlib.sha1()
+    for animCurve in getAnimCurves(nodes):
+        keyData = [
+            animCurve,
+            cmds.keyframe(animCurve, q=True, timeChange=True, valueChange=True, floatChange=True),
+            cmds.keyTangent(animCurve, q=True, inTangentType=True, outTangentType=True),
+            cmds.keyTangent(animCurve, q=True, inAngle=True, outAngle=True, inWeight=True, outWeight=True),
+            cmds.setInfinity(animCurve, q=True, preInfinite=True, postInfinite=True),
+        ]
+        sha.update(json.dumps(keyData).encode('utf-8'))
+    return sha.hexdigest()
+
+
+def getFingerprint(pubItem, version):
+    refFile = pubItem.refFile.split('{')[0]
+    data = {
+        'refFile': refFile,
+        'refFileMtime': os.path.getmtime(refFile) if os.path.exists(refFile) else None,
+        'exportNodes': sorted(pubItem.exportNodes),
+        'animCurves': getAnimCurvesHash(pubItem.exportNodes),
+        'startFrame': float(pubItem.startFrame),
+        'endFrame': float(pubItem.endFrame),
+        'clips': pubItem.clips,
+        'bakeSpace': pubItem.bakeSpace,
+        'exportBlendshape': pubItem.exportBlendshape,
+        'exportBinary': pubItem.exportBinary,
+        'exportOptions': list(exportProfiles.getProfile(pubItem.settings).items()),
+        'settings': dict((key, pubItem.settings.get(key)) for key in OUTPUT_SETTINGS),
+        'version': version,
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class PublishCache(object):
+    def __init__(self, cacheFile=constants.PUBLISH_CACHE_FILE):
+        super(PublishCache, self).__init__()
+        self.cacheFile = cacheFile
+        self.entries = {}
+
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        if not os.path.exists(self.cacheFile):
+            return
+
+        try:
+            with open(self.cacheFile, 'r') as f:
+                self.entries = json.load(f)
+        except ValueError:  # Broken cache file is rebuilt
+            self.entries = {}
+
+    def save(self):
+        cacheDir = os.path.dirname(self.cacheFile)
+        if not os.path.exists(cacheDir):
+            os.makedirs(cacheDir)
+
+        tempFile = self.cacheFile + '.tmp'
+        with open(tempFile, 'w') as f:
+            json.dump(self.entries, f, indent=4)
+        fileUtils.replaceFile(tempFile, self.cacheFile)
+
+    def isUpToDate(self, fbxFile, fingerprint):
+        """
+        True when fbxFile was published from the same fingerprint and still has the size and modification time it was published with.
+        A file replaced by another one of the same size and modification time is not noticed.
+        """
+        entry = self.entries.get(PublishCache.getKey(fbxFile))
+        if not entry or entry['fingerprint'] != fingerprint:
+            return False
+
+        if not os.path.exists(fbxFile):
+            return False
+
+        return os.path.getsize(fbxFile) == entry['size'] and os.path.getmtime(fbxFile) == entry['mtime']
+
+    def update(self, fbxFile, fingerprint):
+        self.entries[PublishCache.getKey(fbxFile)] = {
+            'fingerprint': fingerprint,
+            'size': os.path.getsize(fbxFile),
+            'mtime': os.path.getmtime(fbxFile),
+        }
+
+    def remove(self, fbxFile):
+        self.entries.pop(PublishCache.getKey(fbxFile), None)
+
+    @staticmethod
+    def getKey(fbxFile):
+        return os.path.normcase(os.path.abspath(fbxFile)).replace('\\', '/')
@@ -0,0 +1,116 @@
+"""
+Description: Events sent by AniPublisher.publish to its listeners and a tracker that turns them into progress numbers.
+Events are plain dictionaries with type and time keys so they can be logged or sent to other processes as they are.
+"""
+
+import time
+
+
+PUBLISH_STARTED = 'publishStarted'
+PUBLISH_FINISHED = 'publishFinished'
+ITEM_STARTED = 'itemStarted'
+ITEM_SKIPPED = 'itemSkipped'
+ITEM_FINISHED = 'itemFinished'
+ITEM_FAILED = 'itemFailed'
+STAGE_STARTED = 'stageStarted'
+STAGE_FINISHED = 'stageFinished'
+
+EXPORT_STAGE = 'export'
+POST_PROCESS_STAGE = 'postProcess'
+TRANSFER_STAGE = 'transfer'
+
+
+def createEvent(eventType, **data):
+    event = {'type': eventType, 'time': time.time()}
+    event.update(data)
+    return event
+
+
+def formatDuration(seconds):
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return '{0}:{1:02d}:{2:02d}'.format(hours, minutes, seconds)
+    return '{0:02d}:{1:02d}'.format(minutes, seconds)
+
+
+def formatBytes(numBytes):
+    for unit in ('B', 'KB', 'MB'):
+        if numBytes < 1024.0:
+            return '{0:.1f} {1}'.format(numBytes, unit)
+        numBytes /= 1024.0
+    return '{0:.1f} GB'.format(numBytes)
+
+
+class ProgressTracker(object):
+    """Feed it every event, remaining time is estimated from the average time of items published so far."""
+    def __init__(self):
+        super(ProgressTracker, self).__init__()
+        self.reset()
+
+    def reset(self):
+        self.numItems = 0
+        self.numDone = 0
+        self.numFailed = 0
+        self.numSkipped = 0
+        self.numBytes = 0
+        self.numTransfers = 0
+        self.numFailedTransfers = 0
+        self.startTime = None
+        self.endTime = None
+        self.cancelled = False
+        self.currentItem = None
+        self.currentStage = None
+
+        self._publishTime = 0.0
+        self._numPublished = 0
+
+    def onEvent(self, event):
+        eventType = event['type']
+        if eventType == PUBLISH_STARTED:
+            self.reset()
+            self.numItems = event['numItems']
+            self.startTime = event['time']
+        elif eventType == ITEM_STARTED:
+            self.currentItem = event['namespace']
+            self.currentStage = None
+        elif eventType == STAGE_STARTED:
+            self.currentStage = event['stage']
+        elif eventType == STAGE_FINISHED:
+            self.numBytes += event.get('numBytes', 0)
+            if event['stage'] == TRANSFER_STAGE:  # Transfers of local staging finish after their items and the publish
+                self.numTransfers += 1
+                if event.get('error'):
+                    self.numFailedTransfers += 1
+        elif eventType == ITEM_SKIPPED:
+            self.numDone += 1
+            self.numSkipped += 1
+        elif eventType in (ITEM_FINISHED, ITEM_FAILED):
+            self.numDone += 1
+            if eventType == ITEM_FAILED:
+                self.numFailed += 1
+            self._publishTime += event.get('duration', 0.0)
+            self._numPublished += 1
+            self.currentStage = None
+        elif eventType == PUBLISH_FINISHED:
+            self.endTime = event['time']
+            self.cancelled = event.get('cancelled', False)
+            self.currentItem = None
+            self.currentStage = None
+
+    def getElapsed(self):
+        if self.startTime is None:
+            return 0.0
+        return (self.endTime or time.time()) - self.startTime
+
+    def getThroughput(self):
+        """Post processed bytes per second."""
+        elapsed = self.getElapsed()
+        return self.numBytes / elapsed if elapsed > 0 else 0.0
+
+    def getRemainingTime(self):
+        if not self._numPublished:
+            return None
+        return self._publishTime / self._numPublished * max(0, self.numItems - self.numDone)
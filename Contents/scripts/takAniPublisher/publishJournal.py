@@ -0,0 +1,201 @@
+"""
+Description: Records the progress of each publish item so an interrupted publish can be resumed.
+Items are exported and post processed to staging files, the fbx file is only replaced by a finished file.
+The journal is rewritten atomically after every state change so it is never half written after a crash.
+Files are recorded with size, modification time and checksum, a checksum the writer already knows, e.g. from a copy, is taken as it is instead of reading the file again.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import collections
+
+from . import constants
+from . import fileUtils
+
+
+EXPORTED = 'exported'
+POST_PROCESSED = 'postProcessed'
+VERIFIED = 'verified'
+STATES = [EXPORTED, POST_PROCESSED, VERIFIED]
+
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+
+def getChecksum(path):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(CHECKSUM_BLOCK_SIZE)
+            if not block:
+                break
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def getStagingFiles(fbxFile, stagingDir=None):
+    """
+    Return (exportFile, processedFile), raw export is kept until the item is verified so post processing can be redone.
+    Files are next to fbxFile without stagingDir, names in stagingDir are made unique per fbxFile.
+    """
+    base = fbxFile[:-4] if fbxFile.lower().endswith('.fbx') else fbxFile
+    if stagingDir:
+        key = os.path.normcase(os.path.abspath(fbxFile)).replace('\\', '/')
+        base = os.path.join(stagingDir, '{0}_{1}'.format(os.path.basename(base), hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]))
+    return base + '.export.fbx', base + '.publish.fbx'
+
+
+def getJournalFile(sceneFile, journalDir=constants.JOURNAL_DIR):
+    key = os.path.normcase(os.path.abspath(sceneFile)).replace('\\', '/')
+    name = '{0}_{1}.json'.format(os.path.splitext(os.path.basename(sceneFile))[0], hashlib.sha1(key.encode('utf-8')).hexdigest()[:12])
+    return os.path.join(journalDir, name)
+
+
+class PublishJournal(object):
+    def __init__(self, journalFile):
+        super(PublishJournal, self).__init__()
+        self.journalFile = journalFile
+        self.entries = collections.OrderedDict()
+        self._lock = threading.RLock()  # Items are verified by transfer threads
+
+        self.load()
+
+    def load(self):
+        self.entries = collections.OrderedDict()
+        if not os.path.exists(self.journalFile):
+            return
+
+        try:
+            with open(self.journalFile, 'r') as f:
+                self.entries = json.load(f, object_pairs_hook=collections.OrderedDict).get('items', collections.OrderedDict())
+        except ValueError:  # Journal is replaced atomically, a broken file is not from this tool
+            self.entries = collections.OrderedDict()
+
+    def save(self):
+        journalDir = os.path.dirname(self.journalFile)
+        if not os.path.exists(journalDir):
+            os.makedirs(journalDir)
+
+        with self._lock:
+            tempFile = self.journalFile + '.tmp'
+            with open(tempFile, 'w') as f:
+                json.dump({'items': self.entries}, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            fileUtils.replaceFile(tempFile, self.journalFile)
+
+    def exists(self):
+        return os.path.exists(self.journalFile)
+
+    def isComplete(self):
+        return all(entry['state'] == VERIFIED for entry in self.entries.values())
+
+    def remove(self):
+        with self._lock:
+            self.entries = collections.OrderedDict()
+            if os.path.exists(self.journalFile):
+                os.remove(self.journalFile)
+
+    def retainItems(self, fbxFiles):
+        """Drop entries of items other than fbxFiles so items left out of a publish do not keep it interrupted, return the dropped entries."""
+        keys = set(PublishJournal.getKey(fbxFile) for fbxFile in fbxFiles)
+        with self._lock:
+            droppedEntries = [entry for key, entry in self.entries.items() if key not in keys]
+            if not droppedEntries:
+                return []
+            self.entries = collections.OrderedDict((key, entry) for key, entry in self.entries.items() if key in keys)
+            if self.entries:
+                self.save()
+            elif os.path.exists(self.journalFile):
+                os.remove(self.journalFile)
+        return droppedEntries
+
+    def getResumeState(self, fbxFile, fingerprint):
+        """
+        Return the last state of fbxFile that can be continued from, None if the item has to be published from the start.
+        A state only counts when the item has not changed and all files written in that state are still intact.
+        """
+        entry = self.getEntry(fbxFile)
+        if not entry or entry['fingerprint'] != fingerprint or entry['state'] not in STATES:
+            return None
+
+        for state in reversed(STATES):
+            if STATES.index(entry['state']) < STATES.index(state):
+                continue
+            fileInfos = entry['files'].get(state, {})
+            if all(path in fileInfos and PublishJournal.isIntact(path, fileInfos[path]) for path in PublishJournal.getStatePaths(entry, state)):
+                return state
+        return None
+
+    def begin(self, fbxFile, namespace, fingerprint, exportFile, processedFile, outputs):
+        """
+        outputs are (processedFile, finalFile) pairs, an item has more than one when it is split to clips.
+        A resumed publish continues with these paths, staging settings may have changed since.
+        """
+        with self._lock:
+            self.entries[PublishJournal.getKey(fbxFile)] = {
+                'fbxFile': fbxFile,
+                'namespace': namespace,
+                'fingerprint': fingerprint,
+                'exportFile': exportFile,
+                'processedFile': processedFile,
+                'outputs': [list(output) for output in outputs],
+                'state': None,
+                'files': {},
+                'time': time.time(),
+            }
+            self.save()
+
+    def setState(self, fbxFile, state, path, checksum=None):
+        """
+        Record that path has been written in state and return its checksum, it is computed from the file when checksum is not given.
+        The item moves to the state once all of its files of the state are recorded.
+        """
+        checksum = checksum or getChecksum(path)
+        with self._lock:
+            entry = self.entries[PublishJournal.getKey(fbxFile)]
+            fileInfos = entry['files'].setdefault(state, {})
+            fileInfos[path] = {'size': os.path.getsize(path), 'mtime': os.path.getmtime(path), 'checksum': checksum}
+            if all(statePath in fileInfos for statePath in PublishJournal.getStatePaths(entry, state)):
+                entry['state'] = state
+            entry['time'] = time.time()
+            self.save()
+        return checksum
+
+    def getEntry(self, fbxFile):
+        return self.entries.get(PublishJournal.getKey(fbxFile))
+
+    def getState(self, fbxFile):
+        entry = self.getEntry(fbxFile)
+        return entry['state'] if entry else None
+
+    def getPaths(self, fbxFile):
+        """Return (exportFile, processedFile, outputs) recorded by begin."""
+        entry = self.getEntry(fbxFile)
+        return entry['exportFile'], entry['processedFile'], [tuple(output) for output in entry['outputs']]
+
+    def getChecksum(self, fbxFile, state, path):
+        entry = self.getEntry(fbxFile)
+        if not entry or path not in entry['files'].get(state, {}):
+            return None
+        return entry['files'][state][path]['checksum']
+
+    @staticmethod
+    def getStatePaths(entry, state):
+        if state == EXPORTED:
+            return [entry['exportFile']]
+        if state == POST_PROCESSED:
+            return [output[0] for output in entry['outputs']]
+        return [output[1] for output in entry['outputs']]
+
+    @staticmethod
+    def isIntact(path, fileInfo):
+        if not os.path.exists(path) or os.path.getsize(path) != fileInfo['size'] or os.path.getmtime(path) != fileInfo.get('mtime'):
+            return False
+        return not fileInfo['checksum'] or getChecksum(path) == fileInfo['checksum']
+
+    @staticmethod
+    def getKey(fbxFile):
+        return os.path.normcase(os.path.abspath(fbxFile)).replace('\\', '/')
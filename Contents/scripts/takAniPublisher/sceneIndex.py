@@ -0,0 +1,82 @@
+"""
+Description: Collects data of all references in the scene in one pass so publish items do not query maya again.
+"""
+
+import maya.OpenMaya as om
+import maya.cmds as cmds
+
+import collections
+
+
+ReferenceRecord = collections.namedtuple('ReferenceRecord', ['refNode', 'refFile', 'rigFile', 'namespace', 'fullNamespace', 'isLoaded', 'exportSet', 'exportNodes', 'startFrame', 'endFrame'])
+
+
+def iterReferences():
+    """Yield (refNode, refFile, rigFile, fullNamespace, isLoaded) of references with a file using MFnReference."""
+    nodeIter = om.MItDependencyNodes(om.MFn.kReference)
+    while not nodeIter.isDone():
+        fnRef = om.MFnReference(nodeIter.thisNode())
+        nodeIter.next()
+
+        try:
+            refFile = fnRef.fileName(True, True, True)
+            rigFile = fnRef.fileName(True, True, False)
+        except RuntimeError:  # Empty reference node
+            continue
+        if not refFile:
+            continue
+
+        yield fnRef.name(), refFile, rigFile, ':' + fnRef.associatedNamespace(False), fnRef.isLoaded()
+
+
+class SceneIndex(object):
+    def __init__(self, exportSetName):
+        super(SceneIndex, self).__init__()
+        self.exportSetName = exportSetName
+
+        self.records = []
+        self._recordsByRefNode = {}
+
+        self.build()
+
+    def build(self):
+        startFrame = cmds.playbackOptions(q=True, min=True)
+        endFrame = cmds.playbackOptions(q=True, max=True)
+
+        references = list(iterReferences())
+
+        exportSets = ['{0}:{1}'.format(reference[3], self.exportSetName) for reference in references if reference[4]]
+        existingSets = set(exportSet.lstrip(':') for exportSet in cmds.ls(exportSets, type='objectSet') or [])
+
+        self.records = []
+        for refNode, refFile, rigFile, fullNamespace, isLoaded in references:
+            exportSet = '{0}:{1}'.format(fullNamespace, self.exportSetName)
+            if exportSet.lstrip(':') not in existingSets:
+                exportSet = None
+
+            exportNodes = ()
+            if exportSet:
+                exportNodes = tuple(cmds.sets(exportSet, q=True) or [])
+
+            record = ReferenceRecord(
+                refNode=refNode,
+                refFile=refFile,
+                rigFile=rigFile,
+                namespace=fullNamespace.split(':')[-1],
+                fullNamespace=fullNamespace,
+                isLoaded=isLoaded,
+                exportSet=exportSet,
+                exportNodes=exportNodes,
+                startFrame=startFrame,
+                endFrame=endFrame,
+            )
+            self.records.append(record)
+
+        self._recordsByRefNode = dict((record.refNode, record) for record in self.records)
+
+    def getRecord(self, refNode):
+        return self._recordsByRefNode.get(refNode)
+
+    def getRigRecords(self):
+        """Records of loaded references that have the export set."""
+        return [record for record in self.records if record.isLoaded and record.exportSet]
@@ -0,0 +1,157 @@
+"""
+Description: Loads settings once and shares them between the publisher, publish items and the settings ui.
+User settings override the default settings and are reloaded only when one of the files has changed on disk.
+"""
+
+import os
+import json
+import weakref
+
+from . import constants
+from . import fileUtils
+from . import tracer
+
+
+class SettingsStore(object):
+    def __init__(self, defaultSettingFile=constants.DEFAULT_SETTING_FILE, userSettingFile=constants.USER_SETTING_FILE):
+        super(SettingsStore, self).__init__()
+        self.defaultSettingFile = defaultSettingFile
+        self.userSettingFile = userSettingFile
+
+        self._defaults = {}
+        self._settings = {}
+        self._fileStamps = None
+        self._listeners = []
+
+    def get(self):
+        """Return a copy of the current settings so callers can change it freely."""
+        self._reloadIfChanged()
+        return dict(self._settings)
+
+    def getDefaults(self):
+        self._reloadIfChanged()
+        return dict(self._defaults)
+
+    def save(self, settings):
+        """Write values that differ from the defaults to the user setting file and notify listeners."""
+        defaults = self.getDefaults()
+        userSettings = dict((key, value) for key, value in settings.items() if key not in defaults or defaults[key] != value)
+
+        userSettingDir = os.path.dirname(self.userSettingFile)
+        if not os.path.exists(userSettingDir):
+            os.makedirs(userSettingDir)
+
+        tempFile = self.userSettingFile + '.tmp'
+        with open(tempFile, 'w') as f:
+            json.dump(userSettings, f, indent=4)
+        fileUtils.replaceFile(tempFile, self.userSettingFile)
+
+        self._reloadIfChanged(force=True)
+
+    def addListener(self, callback):
+        """
+        Listeners are called with a copy of the new settings whenever they change.
+        Bound methods are referenced weakly so publish items and widgets do not need to remove themselves.
+        """
+        self._listeners.append(SettingsStore._createRef(callback))
+
+    def removeListener(self, callback):
+        self._listeners = [ref for ref in self._listeners if ref() not in (None, callback)]
+
+    def _reloadIfChanged(self, force=False):
+        fileStamps = (SettingsStore._getFileStamp(self.defaultSettingFile), SettingsStore._getFileStamp(self.userSettingFile))
+        if not force and fileStamps == self._fileStamps:
+            return
+
+        isFirstLoad = self._fileStamps is None
+        self._fileStamps = fileStamps
+
+        settings = self._load()
+        if settings == self._settings:
+            return
+        self._settings = settings
+
+        if not isFirstLoad:
+            self._notify()
+
+    def _load(self):
+        with tracer.getTracer().span('loadSettings', category='settings'):
+            return self._loadFiles()
+
+    def _loadFiles(self):
+        with open(self.defaultSettingFile, 'r') as f:
+            self._defaults = json.load(f)
+
+        userSettings = {}
+        if os.path.exists(self.userSettingFile):
+            try:
+                with open(self.userSettingFile, 'r') as f:
+                    userSettings = json.load(f)
+            except ValueError:  # Broken user setting file falls back to defaults
+                userSettings = {}
+
+        return SettingsStore.validate(self._defaults, userSettings)
+
+    def _notify(self):
+        listeners = []
+        for ref in self._listeners:
+            callback = ref()
+            if callback is None:
+                continue
+            listeners.append(ref)
+            callback(dict(self._settings))
+        self._listeners = listeners
+
+    @staticmethod
+    def validate(defaults, userSettings):
+        """Merge user settings over defaults, user values of a different type than the default value are ignored."""
+        settings = dict(defaults)
+        for key, value in userSettings.items():
+            if key in defaults and not SettingsStore._isSameType(defaults[key], value):
+                continue
+            settings[key] = value
+        return settings
+
+    @staticmethod
+    def _isSameType(default, value):
+        if default is None or value is None:
+            return True
+        if isinstance(default, bool) or isinstance(value, bool):
+            return isinstance(default, bool) and isinstance(value, bool)
+        numberTypes = (int, float, type(2 ** 64))
+        if isinstance(default, numberTypes):
+            return isinstance(value, numberTypes)
+        if isinstance(default, (list, dict)):
+            return isinstance(value, type(default))
+        return not isinstance(value, numberTypes + (list, dict))
+
+    @staticmethod
+    def _getFileStamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_size)
+
+    @staticmethod
+    def _createRef(callback):
+        if getattr(callback, '__self__', None) is not None and hasattr(callback, '__func__'):
+            instanceRef = weakref.ref(callback.__self__)
+            func = callback.__func__
+
+            def ref():
+                instance = instanceRef()
+                return None if instance is None else func.__get__(instance, type(instance))
+            return ref
+
+        return lambda: callback
+
+
+_store = None
+
+
+def getStore():
+    global _store
+    if _store is None:
+        _store = SettingsStore()
+    return _store
@@ -1,19 +1,14 @@
 from PySide2 import QtWidgets, QtCore
 
-import os
-import json
 import shutil
 
-from . import constants
-reload(constants)
+from . import settingsStore
 
 
 class SettingsUI(QtWidgets.QDialog):
     def __init__(self, parent=None):
         super(SettingsUI, self).__init__(parent)
 
-        self.defaultSettingFile = constants.DEFAULT_SETTING_FILE
-        self.userSettingFile = constants.USER_SETTING_FILE
         self.settings = None
 
         self.setWindowTitle('Settings')
@@ -74,15 +69,9 @@ class SettingsUI(QtWidgets.QDialog):
             self.customExportDirLe.setDisabled(False)
 
     def loadSettings(self):
-        settingsFile = self.userSettingFile if os.path.exists(self.userSettingFile) else self.defaultSettingFile
-        with open(settingsFile, 'r') as f:
-            self.settings = json.load(f)
+        self.settings = settingsStore.getStore().get()
 
     def saveSettings(self):
-        if not os.path.exists(constants.APP_PREFERENCE_DIR):
-            os.mkdir(constants.APP_PREFERENCE_DIR)
-
-        with open(self.userSettingFile, 'w') as f:
-            json.dump(self.settings, f, indent=4)
+        settingsStore.getStore().save(self.settings)
 
         self.close()
@@ -0,0 +1,129 @@
+"""
+Description: Finds and decodes publish item thumbnails on background threads.
+Scaled thumbnails are cached on disk by image path and modification time so rigs on network shares are read only once.
+"""
+
+from PySide2 import QtCore, QtGui
+
+import os
+import hashlib
+
+from . import constants
+
+
+THUMBNAIL_SIZE = 100
+MAX_THREADS = 4
+
+
+def getCacheFile(imageFile, cacheDir=constants.THUMBNAIL_CACHE_DIR):
+    stat = os.stat(imageFile)
+    key = '{0}|{1}|{2}|{3}'.format(os.path.normcase(os.path.abspath(imageFile)), stat.st_mtime, stat.st_size, THUMBNAIL_SIZE)
+    return os.path.join(cacheDir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+
+def loadThumbnail(imageFile, cacheDir=constants.THUMBNAIL_CACHE_DIR):
+    """Return a scaled QImage of imageFile, QImage is safe to create outside of the main thread unlike QPixmap."""
+    cacheFile = getCacheFile(imageFile, cacheDir)
+    if os.path.exists(cacheFile):
+        image = QtGui.QImage(cacheFile)
+        if not image.isNull():
+            return image
+
+    reader = QtGui.QImageReader(imageFile)
+    size = reader.size()
+    if size.isValid():
+        size.scale(THUMBNAIL_SIZE, THUMBNAIL_SIZE, QtCore.Qt.KeepAspectRatio)
+        reader.setScaledSize(size)  # Jpeg is decoded at the reduced size directly
+    image = reader.read()
+    if image.isNull():
+        return image
+
+    tempFile = '{0}.{1}.tmp.png'.format(cacheFile, id(image))
+    try:
+        if not os.path.exists(cacheDir):
+            os.makedirs(cacheDir)
+        if image.save(tempFile) and not os.path.exists(cacheFile):
+            os.rename(tempFile, cacheFile)
+    except (IOError, OSError):  # Thumbnail is still usable without the cache
+        pass
+    finally:
+        if os.path.exists(tempFile):
+            os.remove(tempFile)
+
+    return image
+
+
+class ThumbnailSignals(QtCore.QObject):
+    finished = QtCore.Signal(str, str, object)
+
+
+class ThumbnailTask(QtCore.QRunnable):
+    def __init__(self, refFile, resolver, signals):
+        super(ThumbnailTask, self).__init__()
+        self.refFile = refFile
+        self.resolver = resolver
+        self.signals = signals
+
+    def run(self):
+        imageFile = ''
+        image = None
+        try:
+            imageFile = self.resolver(self.refFile)
+            if os.path.isfile(imageFile):
+                image = loadThumbnail(imageFile)
+        except Exception:
+            image = None
+        self.signals.finished.emit(self.refFile, imageFile, image)
+
+
+class ThumbnailService(QtCore.QObject):
+    """Items that reference the same rig file share one lookup, callbacks are called on the main thread with (imageFile, QImage)."""
+    def __init__(self, parent=None):
+        super(ThumbnailService, self).__init__(parent)
+        self.threadPool = QtCore.QThreadPool()
+        self.threadPool.setMaxThreadCount(MAX_THREADS)
+
+        self.signals = ThumbnailSignals()
+        self.signals.finished.connect(self._onFinished)
+
+        self._results = {}
+        self._callbacks = {}
+
+    def request(self, refFile, resolver, callback):
+        if refFile in self._results:
+            if self._results[refFile]:
+                callback(*self._results[refFile])
+            return
+
+        if refFile in self._callbacks:
+            self._callbacks[refFile].append(callback)
+            return
+
+        self._callbacks[refFile] = [callback]
+        self.threadPool.start(ThumbnailTask(refFile, resolver, self.signals))
+
+    def clear(self):
+        self._results = {}
+
+    def _onFinished(self, refFile, imageFile, image):
+        callbacks = self._callbacks.pop(refFile, [])
+        if image is None or image.isNull():  # Keep showing the default image
+            self._results[refFile] = None
+            return
+
+        self._results[refFile] = (imageFile, image)
+        for callback in callbacks:
+            try:
+                callback(imageFile, image)
+            except RuntimeError:  # Widget has been deleted before the thumbnail arrived
+                pass
+
+
+_service = None
+
+
+def getService():
+    global _service
+    if _service is None:
+        _service = ThumbnailService()
+    return _service
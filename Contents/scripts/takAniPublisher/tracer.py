@@ -0,0 +1,230 @@
+"""
+Description: Records nested timing spans of the publish to find where time goes.
+Spans track wall time, process cpu time and peak memory, traces are saved as chrome trace json (chrome://tracing, Perfetto).
+Tracing is disabled by default and a disabled span costs one attribute check.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import functools
+import collections
+
+
+def getCpuTime():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def getPeakMemory():
+    """Peak resident memory of the process in bytes, None if it can not be queried."""
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            import ctypes.wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [
+                    ('cb', ctypes.wintypes.DWORD),
+                    ('PageFaultCount', ctypes.wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize
+        except (ImportError, AttributeError, OSError):
+            pass
+        return None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports kilobytes
+
+
+class Span(object):
+    __slots__ = ('tracer', 'name', 'category', 'args', 'startTime', 'startCpuTime')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.startTime = time.time()
+        self.startCpuTime = getCpuTime()
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        endTime = time.time()
+        cpuTime = getCpuTime() - self.startCpuTime
+        if excType is not None:
+            self.args['error'] = excType.__name__
+        self.tracer.addEvent(self.name, self.category, self.startTime, endTime - self.startTime, cpuTime, getPeakMemory(), self.args)
+        return False
+
+
+class NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+TraceEvent = collections.namedtuple('TraceEvent', ['name', 'category', 'startTime', 'duration', 'cpuTime', 'peakMemory', 'threadId', 'args'])
+
+
+class Tracer(object):
+    def __init__(self):
+        super(Tracer, self).__init__()
+        self.enabled = False
+        self.events = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+    def span(self, name, category='publish', **args):
+        """Context manager that records a span, spans nest by time like chrome trace complete events."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args)
+
+    def traced(self, name=None, category='publish'):
+        """Decorator version of span, the span is named after the function by default."""
+        def decorator(func):
+            spanName = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, spanName, category, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def addEvent(self, name, category, startTime, duration, cpuTime=None, peakMemory=None, args=None):
+        """Add a finished span, used for work measured somewhere else like post process workers."""
+        event = TraceEvent(name, category, startTime, duration, cpuTime, peakMemory, threading.current_thread().ident, args or {})
+        with self._lock:
+            self.events.append(event)
+
+    def toChromeTrace(self):
+        pid = os.getpid()
+        traceEvents = []
+        for event in sorted(self.events, key=lambda event: (event.startTime, -event.duration)):
+            args = dict(event.args)
+            if event.cpuTime is not None:
+                args['cpuTime'] = round(event.cpuTime, 6)
+            if event.peakMemory is not None:
+                args['peakMemory'] = event.peakMemory
+            traceEvents.append({
+                'name': event.name,
+                'cat': event.category,
+                'ph': 'X',
+                'ts': int(event.startTime * 1000000),
+                'dur': int(event.duration * 1000000),
+                'pid': pid,
+                'tid': event.threadId,
+                'args': args,
+            })
+        return {'traceEvents': traceEvents, 'displayTimeUnit': 'ms'}
+
+    def save(self, traceFile):
+        traceDir = os.path.dirname(traceFile)
+        if traceDir and not os.path.exists(traceDir):
+            os.makedirs(traceDir)
+        with open(traceFile, 'w') as f:
+            json.dump(self.toChromeTrace(), f)
+
+    def getSummary(self):
+        return summarize(self.toChromeTrace()['traceEvents'])
+
+
+def summarize(traceEvents):
+    """
+    Aggregate chrome trace complete events by name.
+    Self time excludes time of child spans in the same thread so nested stages are not counted twice.
+    """
+    summary = collections.OrderedDict()
+    stacks = {}
+
+    for event in sorted(traceEvents, key=lambda event: (event['pid'], event['tid'], event['ts'], -event['dur'])):
+        stack = stacks.setdefault((event['pid'], event['tid']), [])
+        while stack and stack[-1][0]['ts'] + stack[-1][0]['dur'] <= event['ts']:
+            stack.pop()
+        if stack:
+            stack[-1][1]['selfTime'] -= event['dur'] / 1000000.0
+
+        stats = summary.get(event['name'])
+        if stats is None:
+            stats = summary[event['name']] = {'count': 0, 'totalTime': 0.0, 'selfTime': 0.0, 'maxTime': 0.0, 'cpuTime': 0.0, 'peakMemory': None}
+        duration = event['dur'] / 1000000.0
+        stats['count'] += 1
+        stats['totalTime'] += duration
+        stats['selfTime'] += duration
+        stats['maxTime'] = max(stats['maxTime'], duration)
+        stats['cpuTime'] += event['args'].get('cpuTime', 0.0)
+        peakMemory = event['args'].get('peakMemory')
+        if peakMemory is not None:
+            stats['peakMemory'] = max(stats['peakMemory'] or 0, peakMemory)
+
+        stack.append((event, stats))
+
+    return summary
+
+
+def summarizeFiles(traceFiles):
+    """Aggregated summary of many trace files, for example one per batch worker."""
+    traceEvents = []
+    for traceFile in traceFiles:
+        with open(traceFile, 'r') as f:
+            traceEvents.extend(json.load(f)['traceEvents'])
+    return summarize(traceEvents)
+
+
+def formatSummary(summary):
+    lines = ['{0:<24}{1:>7}{2:>12}{3:>12}{4:>12}{5:>12}{6:>10}'.format('Stage', 'Count', 'Total(s)', 'Self(s)', 'Max(s)', 'Cpu(s)', 'Peak(MB)')]
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]['totalTime']):
+        peakMemory = '-' if stats['peakMemory'] is None else round(stats['peakMemory'] / (1024.0 * 1024.0), 1)
+        lines.append('{0:<24}{1:>7}{2:>12}{3:>12}{4:>12}{5:>12}{6:>10}'.format(
+            name[:23], stats['count'], round(stats['totalTime'], 3), round(stats['selfTime'], 3), round(stats['maxTime'], 3), round(stats['cpuTime'], 3), peakMemory))
+    return '\n'.join(lines)
+
+
+_tracer = None
+
+
+def getTracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
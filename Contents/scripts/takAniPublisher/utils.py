@@ -1,12 +1,20 @@
+import maya.OpenMaya as om
 import maya.cmds as cmds
 import maya.mel as mel
-import pymel.core as pm
+import maya.utils
 
 import os
-import json
 import time
 
+try:
+    from importlib import reload
+except ImportError:
+    pass  # Builtin in python 2
+
 from . import constants
+from . import settingsStore
+from . import exportProfiles
+from . import tracer
 
 
 def removeNamespace(node):
@@ -37,78 +45,69 @@ def loadFBXPlugin():
         cmds.loadPlugin('fbxmaya')
 
 
-def setFBXExportOptions(startFrame, endFrame, shapes):
+def setFBXExportOptions(startFrame, endFrame, shapes, profile=None):
     loadFBXPlugin()
 
-    mel.eval('FBXResetExport;')
+    profile = profile or exportProfiles.getProfile(getSettings())
+    options = exportProfiles.getItemOptions(profile, startFrame, endFrame, shapes)
+    mel.eval(exportProfiles.ExportOptionsState().getMelScript(options))
 
-    mel.eval('FBXExportSmoothingGroups -v false;')
-    mel.eval('FBXExportTangents -v false;')
-    mel.eval('FBXExportSmoothMesh -v false;')
-    mel.eval('FBXExportTriangulate -v false;')
 
-    mel.eval('FBXExportAnimationOnly -v false;')
-    mel.eval('FBXExportAxisConversionMethod convertAnimation;')
-    mel.eval('FBXExportBakeComplexAnimation -v true;')
-    mel.eval('FBXExportBakeComplexStart -v {0};'.format(startFrame))
-    mel.eval('FBXExportBakeComplexEnd -v {0};'.format(endFrame))
-    mel.eval('FBXExportBakeComplexStep -v 1;')
-    mel.eval('FBXExportQuaternion -v resample;')
-    mel.eval('FBXExportBakeResampleAnimation -v false;')
-    mel.eval('FBXExportApplyConstantKeyReducer -v false;')
+def showJoints(joints):
+    for jnt in joints:
+        cmds.setAttr('{0}.drawStyle'.format(jnt), 0)
 
-    mel.eval('FBXExportSkins -v true;')
-    mel.eval('FBXExportShapes -v true;')
-    if not shapes:
-        mel.eval('FBXExportShapes -v false;')
 
-    mel.eval('FBXExportLights -v false;')
-    mel.eval('FBXExportCameras -v false;')
-    mel.eval('FBXExportInstances -v false;')
-    mel.eval('FBXExportCacheFile -v false;')
-    mel.eval('FBXExportEmbeddedTextures -v false;')
+def executeDeferred(func, *args):
+    """Call func on the main thread, maya commands and script editor messages are not safe from other threads."""
+    maya.utils.executeDeferred(func, *args)
 
-    mel.eval('FBXExportColladaSingleMatrix true;')
-    mel.eval('FBXExportColladaTriangulate false;')
 
-    mel.eval('FBXExportConstraints -v false;')
-    mel.eval('FBXExportInputConnections -v true;')
-    mel.eval('FBXExportSkeletonDefinitions -v false;')
+def processDeferred():
+    """Run calls deferred by executeDeferred now, for the main thread waiting on other threads."""
+    maya.utils.processIdleEvents()
 
-    mel.eval('FBXExportUpAxis y;')
-    mel.eval('FBXExportScaleFactor 1.0;')
-    mel.eval('FBXExportConvertUnitString cm;')
 
-    mel.eval('FBXExportInAscii -v true;')
-    mel.eval('FBXExportReferencedAssetsContent -v true;')
-    mel.eval('FBXExportUseSceneName -v false;')
-    mel.eval('FBXExportFileVersion -v FBX201800;')
+def getSettings():
+    return settingsStore.getStore().get()
 
 
-def showJoints(joints):
-    for jnt in joints:
-        cmds.setAttr('{0}.drawStyle'.format(jnt), 0)
+def isDevMode():
+    return os.environ.get(constants.DEV_MODE_VARIABLE, '') not in ('', '0')
 
 
-def getSettings():
-    settingsFile = constants.USER_SETTING_FILE if os.path.exists(constants.USER_SETTING_FILE) else constants.DEFAULT_SETTING_FILE
-    with open(settingsFile, 'r') as f:
-        settings = json.load(f)
-    return settings
+def reloadModules(modules):
+    """Reload modules in order when in dev mode, dependencies have to come before the modules using them."""
+    if not isDevMode():
+        return
+    for module in modules:
+        reload(module)
 
 
 class PerformanceChecker(object):
+    """Times one labeled job and records it as a span of the publish tracer."""
     def __init__(self):
         super(PerformanceChecker, self).__init__()
         self._startTime = None
         self._label = None
+        self._span = None
+        self.duration = 0.0
 
     def start(self, label):
         self._startTime = time.time()
         self._label = label
+        self._span = tracer.getTracer().span(label)
+        self._span.__enter__()
 
-    def end(self):
+    def end(self, numBytes=None):
         duration = time.time() - self._startTime
-        pm.displayInfo('"{0}" job took {1}s.'.format(self._label, round(duration, 2)))
+        self.duration = duration
+        if numBytes is not None and self._span is not tracer.NULL_SPAN:
+            self._span.args['numBytes'] = numBytes
+        self._span.__exit__(None, None, None)
+        message = '"{0}" job took {1}s.'.format(self._label, round(duration, 2))
+        if numBytes is not None and duration > 0:
+            message += ' ({0} MB/s)'.format(round(numBytes / (1024.0 * 1024.0) / duration, 2))
+        om.MGlobal.displayInfo(message)
 
 
@@ -0,0 +1,290 @@
+"""
+Description: Benchmarks fbx post processing stages of the publisher on synthetic exports, no maya is needed.
+Times are normalized by a calibration workload so a baseline recorded on one machine can be compared on another.
+Edited files are checked against the legacy editor output before anything is timed.
+
+Usage:
+    python benchmarks/benchPostProcess.py
+    python benchmarks/benchPostProcess.py --cases small,medium --repeat 5 --output results.json
+    python benchmarks/benchPostProcess.py --save-baseline
+    python benchmarks/benchPostProcess.py --compare benchmarks/baseline.json --threshold 1.3
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import collections
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS_DIR), 'Contents', 'scripts'))
+
+from takAniPublisher import fbxEditor
+from takAniPublisher import fbxPatcher
+from takAniPublisher import fbxBinary
+from takAniPublisher import keyReducer
+from takAniPublisher import fbxPruner
+from takAniPublisher import fbxVerifier
+from takAniPublisher import postProcessor
+from takAniPublisher import tracer
+
+import fbxGenerator
+import legacyEditor
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2 has no allocation tracing, peak memory is not recorded
+    tracemalloc = None
+
+
+DEFAULT_BASELINE_FILE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+NAMESPACE = 'heroA'
+BAKE_SPACE = 'local'  # Local bake space runs every editor stage
+KEY_REDUCTION = {'tolerance': keyReducer.DEFAULT_TOLERANCE, 'precision': None}
+
+CASES = collections.OrderedDict([
+    ('small', {'joints': 30, 'frames': 200, 'blendshapes': 10}),
+    ('medium', {'joints': 80, 'frames': 1000, 'blendshapes': 50}),
+    ('large', {'joints': 120, 'frames': 3000, 'blendshapes': 100}),
+])
+DEFAULT_CASES = ['small', 'medium']
+
+
+def calibrate(repeat=5):
+    """Seconds of a fixed string and regex workload, similar to what the editors do per line."""
+    lines = ['\t\tP: "Lcl Translation", "Lcl Translation", "", "A",{0},{1},0\n'.format(i, i * 0.5) for i in range(20000)]
+    pattern = re.compile(r'(\tP: "Lcl Translation".*?),\d')
+    durations = []
+    for i in range(repeat):
+        startTime = time.time()
+        for line in lines:
+            pattern.sub(r'\1,1', line).split(',')
+        durations.append(time.time() - startTime)
+    return min(durations)
+
+
+def getStages(rootJoint, numFrames):
+    """Stage name and function that edits the given file in place."""
+    def streamStage(stages):
+        return lambda fbxFile: fbxEditor.FBXEditor(rootJoint, NAMESPACE, BAKE_SPACE, stages=stages).edit(fbxFile)
+
+    stages = [
+        ('legacy', lambda fbxFile: legacyEditor.editFile(fbxFile, rootJoint, NAMESPACE, BAKE_SPACE)),
+        ('stream.passthrough', streamStage([])),
+    ]
+    for stageName in fbxEditor.FBXEditor.STAGES:
+        stages.append(('stream.' + stageName, streamStage([stageName])))
+    stages.extend([
+        ('stream', streamStage(None)),
+        ('patch', lambda fbxFile: fbxPatcher.FBXPatcher(rootJoint, NAMESPACE, BAKE_SPACE).edit(fbxFile)),
+        ('pruning', lambda fbxFile: fbxPruner.FBXPruner().prune(fbxFile)),
+        ('verify', lambda fbxFile: fbxVerifier.FBXVerifier(rootJoint, NAMESPACE, 0, numFrames - 1, True).verify(fbxFile)),
+        ('keyReduction', lambda fbxFile: keyReducer.KeyReducer(**KEY_REDUCTION).reduce(fbxFile)),
+        ('binary', lambda fbxFile: fbxBinary.convertFile(fbxFile)),
+        ('editFBX', lambda fbxFile: postProcessor.editFBX(postProcessor.createEditJob(fbxFile, rootJoint, NAMESPACE, BAKE_SPACE, 'stream', True, KEY_REDUCTION))),
+    ])
+    return stages
+
+
+def checkOutputs(sourceFile, workDir, rootJoint):
+    """Stream and patch editors have to write exactly what the legacy editor writes."""
+    with open(sourceFile, 'r') as f:
+        expected = legacyEditor.editContents(f.read(), rootJoint, NAMESPACE, BAKE_SPACE)
+
+    errors = []
+    for mode, editor in (('stream', fbxEditor.FBXEditor(rootJoint, NAMESPACE, BAKE_SPACE)), ('patch', fbxPatcher.FBXPatcher(rootJoint, NAMESPACE, BAKE_SPACE))):
+        fbxFile = os.path.join(workDir, 'check_{0}.fbx'.format(mode))
+        shutil.copy(sourceFile, fbxFile)
+        editor.edit(fbxFile)
+        with open(fbxFile, 'r') as f:
+            if f.read() != expected:
+                errors.append('{0} editor output differs from the legacy editor output.'.format(mode))
+        os.remove(fbxFile)
+    return errors
+
+
+class Benchmark(object):
+    def __init__(self, caseNames=None, repeat=3, workDir=None, trackMemory=True):
+        super(Benchmark, self).__init__()
+        self.caseNames = caseNames or DEFAULT_CASES
+        self.repeat = max(1, repeat)
+        self.workDir = workDir
+        self.trackMemory = trackMemory and tracemalloc is not None
+
+    def run(self):
+        ownsWorkDir = self.workDir is None
+        workDir = self.workDir or tempfile.mkdtemp(prefix='takAniPublisherBench_')
+        try:
+            results = {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'calibration': calibrate(),
+                'cases': collections.OrderedDict(),
+                'errors': [],
+            }
+            for caseName in self.caseNames:
+                results['cases'][caseName] = self.runCase(caseName, workDir, results)
+        finally:
+            if ownsWorkDir:
+                shutil.rmtree(workDir, ignore_errors=True)
+
+        return results
+
+    def runCase(self, caseName, workDir, results):
+        case = CASES[caseName]
+        sourceFile = os.path.join(workDir, '{0}.fbx'.format(caseName))
+        rootJoint = fbxGenerator.generate(sourceFile, case['joints'], case['frames'], case['blendshapes'], NAMESPACE)
+        numBytes = os.path.getsize(sourceFile)
+
+        for error in checkOutputs(sourceFile, workDir, rootJoint):
+            results['errors'].append('{0}: {1}'.format(caseName, error))
+
+        # Later stages get the output of the stream editor like in the publisher
+        editedFile = os.path.join(workDir, '{0}_edited.fbx'.format(caseName))
+        fbxEditor.FBXEditor(rootJoint, NAMESPACE, BAKE_SPACE).edit(sourceFile, editedFile)
+        report = fbxVerifier.FBXVerifier(rootJoint, NAMESPACE, 0, case['frames'] - 1, True).verify(editedFile)
+        if not report['valid']:
+            results['errors'].append('{0}: {1}'.format(caseName, fbxVerifier.formatReport(report)))
+        reducedFile = os.path.join(workDir, '{0}_reduced.fbx'.format(caseName))
+        keyReducer.KeyReducer(**KEY_REDUCTION).reduce(editedFile, reducedFile)
+        inputFiles = {'pruning': editedFile, 'verify': editedFile, 'keyReduction': editedFile, 'binary': reducedFile}
+
+        stages = collections.OrderedDict()
+        for stageName, func in getStages(rootJoint, case['frames']):
+            stages[stageName] = self.measure(caseName, stageName, func, inputFiles.get(stageName, sourceFile), workDir, results['calibration'])
+
+        for path in (sourceFile, editedFile, reducedFile):
+            os.remove(path)
+
+        return {'params': case, 'numBytes': numBytes, 'stages': stages}
+
+    def measure(self, caseName, stageName, func, inputFile, workDir, calibration):
+        fbxFile = os.path.join(workDir, 'work.fbx')
+        durations = []
+        for i in range(self.repeat):
+            shutil.copy(inputFile, fbxFile)
+            startTime = time.time()
+            with tracer.getTracer().span(stageName, category='benchmark', case=caseName):
+                func(fbxFile)
+            durations.append(time.time() - startTime)
+
+        peakMemory = None
+        if self.trackMemory:  # Separate run as allocation tracing slows the stage down
+            shutil.copy(inputFile, fbxFile)
+            tracemalloc.start()
+            try:
+                func(fbxFile)
+                peakMemory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        for path in (fbxFile, os.path.splitext(fbxFile)[0] + '.bin.fbx'):
+            if os.path.exists(path):
+                os.remove(path)
+
+        durations.sort()
+        return {
+            'min': durations[0],
+            'median': durations[len(durations) // 2],
+            'score': durations[0] / calibration,
+            'peakMemory': peakMemory,
+        }
+
+
+def compare(results, baseline, threshold):
+    """
+    Return regression messages of stages that are slower or use more memory than threshold times the baseline.
+    Cases and stages the baseline has no numbers for are reported too, the baseline has to be recorded again when stages are added.
+    """
+    regressions = []
+    for caseName, case in results['cases'].items():
+        baselineCase = baseline.get('cases', {}).get(caseName)
+        if not baselineCase:
+            regressions.append('{0} is not in the baseline.'.format(caseName))
+            continue
+        if baselineCase['params'] != case['params']:
+            regressions.append('{0} has different parameters than the baseline.'.format(caseName))
+            continue
+
+        for stageName, stats in case['stages'].items():
+            baselineStats = baselineCase['stages'].get(stageName)
+            if not baselineStats:
+                regressions.append('{0} {1} is not in the baseline.'.format(caseName, stageName))
+                continue
+
+            ratio = stats['score'] / baselineStats['score']
+            stats['scoreRatio'] = ratio
+            if ratio > threshold:
+                regressions.append('{0} {1} is {2}x slower than the baseline.'.format(caseName, stageName, round(ratio, 2)))
+
+            if stats['peakMemory'] and baselineStats.get('peakMemory'):
+                memoryRatio = float(stats['peakMemory']) / baselineStats['peakMemory']
+                stats['memoryRatio'] = memoryRatio
+                if memoryRatio > threshold:
+                    regressions.append('{0} {1} uses {2}x the baseline peak memory.'.format(caseName, stageName, round(memoryRatio, 2)))
+    return regressions
+
+
+def formatResults(results):
+    lines = ['Python {0}, calibration {1}s'.format(results['python'], round(results['calibration'], 4))]
+    for caseName, case in results['cases'].items():
+        lines.append('')
+        lines.append('{0}: {1} joints, {2} frames, {3} blendshapes, {4} MB'.format(
+            caseName, case['params']['joints'], case['params']['frames'], case['params']['blendshapes'], round(case['numBytes'] / (1024.0 * 1024.0), 2)))
+        lines.append('{0:<36}{1:>10}{2:>10}{3:>10}{4:>12}{5:>10}'.format('Stage', 'Min(s)', 'Med(s)', 'MB/s', 'Peak(MB)', 'vs base'))
+        for stageName, stats in case['stages'].items():
+            throughput = round(case['numBytes'] / (1024.0 * 1024.0) / stats['min'], 1) if stats['min'] > 0 else '-'
+            peakMemory = '-' if stats['peakMemory'] is None else round(stats['peakMemory'] / (1024.0 * 1024.0), 1)
+            ratio = '-' if 'scoreRatio' not in stats else '{0}x'.format(round(stats['scoreRatio'], 2))
+            lines.append('{0:<36}{1:>10}{2:>10}{3:>10}{4:>12}{5:>10}'.format(stageName, round(stats['min'], 4), round(stats['median'], 4), throughput, peakMemory, ratio))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark fbx post processing on synthetic exports.')
+    parser.add_argument('--cases', default=','.join(DEFAULT_CASES), help='Comma separated cases of {0}.'.format(', '.join(CASES)))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip the peak memory run of each stage.')
+    parser.add_argument('--output', default=None, help='Results json file.')
+    parser.add_argument('--compare', default=None, help='Baseline json file to compare with, regressions make the exit code 1.')
+    parser.add_argument('--threshold', type=float, default=1.3, help='Allowed ratio to the baseline.')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE_FILE, default=None, help='Save results as the baseline.')
+    parser.add_argument('--trace', default=None, help='Chrome trace json file of all timed runs.')
+    args = parser.parse_args(argv)
+
+    caseNames = [caseName.strip() for caseName in args.cases.split(',') if caseName.strip()]
+    unknownCases = [caseName for caseName in caseNames if caseName not in CASES]
+    if unknownCases:
+        parser.error('Unknown cases: {0}'.format(', '.join(unknownCases)))
+
+    if args.trace:
+        tracer.getTracer().enable()
+
+    results = Benchmark(caseNames, args.repeat, trackMemory=not args.no_memory).run()
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    sys.stdout.write(formatResults(results) + '\n')
+    for message in results['errors'] + regressions:
+        sys.stdout.write('FAILED: {0}\n'.format(message))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=4)
+    if args.trace:
+        tracer.getTracer().save(args.trace)
+
+    return 1 if results['errors'] or regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Description: Measures how long the publisher takes to open, it runs inside maya.
+Cold runs import the package from scratch like the first shelf click of a session, warm runs open the tool again.
+Heavy modules that maya had loaded before the run are recorded since they make cold numbers of sessions differ.
+
+Usage in the maya script editor, the tool is opened with AniPublisherCtrl.showUI and closed again:
+    import sys; sys.path.append('<repository>/benchmarks')
+    import benchStartup; benchStartup.main(['--repeat', '5', '--output', 'startup.json'])
+
+Usage with mayapy, there is no ui so the publisher is only created:
+    mayapy benchmarks/benchStartup.py --repeat 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), 'Contents', 'scripts')
+
+PACKAGE_NAME = 'takAniPublisher'
+HEAVY_MODULES = ['pymel.core', 'PySide2.QtWidgets', 'shiboken2', 'maya.OpenMaya', 'maya.OpenMayaUI']
+
+
+def getLoadedModules(moduleNames=HEAVY_MODULES):
+    return [moduleName for moduleName in moduleNames if moduleName in sys.modules]
+
+
+def purgePackage(packageName=PACKAGE_NAME):
+    """Forget imported modules of the package so the next import reads them again."""
+    for moduleName in list(sys.modules):
+        if moduleName == packageName or moduleName.startswith(packageName + '.'):
+            del sys.modules[moduleName]
+
+
+def openTool(withUI):
+    """Return (import seconds, open seconds) of one launch."""
+    startTime = time.time()
+    from takAniPublisher import aniPublisherCtrl
+    importTime = time.time() - startTime
+
+    startTime = time.time()
+    ctrl = aniPublisherCtrl.AniPublisherCtrl()
+    if withUI:
+        ctrl.showUI()
+        from PySide2 import QtWidgets
+        QtWidgets.QApplication.processEvents()  # Include the first paint
+    else:
+        ctrl.createPublisher()
+    openTime = time.time() - startTime
+
+    if withUI:
+        ctrl.aniPubUI.close()
+        ctrl.aniPubUI.deleteLater()
+
+    return importTime, openTime
+
+
+def summarize(durations):
+    durations = sorted(durations)
+    return {
+        'min': durations[0],
+        'median': durations[len(durations) // 2],
+        'max': durations[-1],
+    }
+
+
+def run(repeat=5, withUI=True):
+    import maya.cmds as cmds
+
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+
+    results = {
+        'python': platform.python_version(),
+        'maya': cmds.about(version=True),
+        'ui': withUI,
+        'devMode': bool(os.environ.get('TAK_ANI_PUBLISHER_DEV', '') not in ('', '0')),
+        'preloadedModules': getLoadedModules(),
+    }
+
+    purgePackage()
+    importTime, openTime = openTool(withUI)
+    results['cold'] = {'import': importTime, 'open': openTime, 'total': importTime + openTime}
+    results['loadedModules'] = getLoadedModules()
+
+    warmTimes = []
+    for i in range(repeat):
+        warmTimes.append(sum(openTool(withUI)))
+    results['warm'] = summarize(warmTimes)
+
+    return results
+
+
+def formatResults(results):
+    lines = [
+        'maya {0}, python {1}, ui: {2}, dev mode: {3}'.format(results['maya'], results['python'], results['ui'], results['devMode']),
+        'preloaded: {0}'.format(', '.join(results['preloadedModules']) or '-'),
+        'loaded after the run: {0}'.format(', '.join(results['loadedModules']) or '-'),
+        'cold  import {0:8.1f} ms  open {1:8.1f} ms  total {2:8.1f} ms'.format(results['cold']['import'] * 1000, results['cold']['open'] * 1000, results['cold']['total'] * 1000),
+        'warm  min {0:8.1f} ms  median {1:8.1f} ms  max {2:8.1f} ms'.format(results['warm']['min'] * 1000, results['warm']['median'] * 1000, results['warm']['max'] * 1000),
+    ]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark cold and warm launches of the publisher in maya.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of warm launches.')
+    parser.add_argument('--no-ui', action='store_true', help='Only create the publisher, always the case in mayapy.')
+    parser.add_argument('--output', default=None, help='Results json file.')
+    args = parser.parse_args(argv)
+
+    import maya.cmds as cmds
+    withUI = not args.no_ui and not cmds.about(batch=True)
+
+    results = run(max(1, args.repeat), withUI)
+
+    sys.stdout.write(formatResults(results) + '\n')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    return 0
+
+
+if __name__ == '__main__':
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    try:
+        exitCode = main()
+    finally:
+        maya.standalone.uninitialize()
+    sys.exit(exitCode)
@@ -0,0 +1,467 @@
+"""
+Description: Writes synthetic ascii fbx files shaped like FBXExport output of the publisher with FBXExportFileVersion FBX201800.
+Files have a baked skeleton and blendshape weights so post processing can be measured without maya.
+
+Usage:
+    python benchmarks/fbxGenerator.py out.fbx --joints 80 --frames 1000 --blendshapes 50 --namespace heroA
+"""
+
+import math
+import random
+import argparse
+
+
+KTIME_PER_SECOND = 46186158000
+CURVE_FLAGS = 24840  # Cubic|TangeantAuto|GenericTimeIndependent|GenericClampProgressive
+CURVE_DATA = '0,0,255086342,0'
+TIME_MODES = [(6, 30), (11, 24), (10, 25), (3, 60), (9, 30000 / 1001.0), (13, 24000 / 1001.0)]
+TIME_MODE_CUSTOM = 14
+
+
+def formatFloat(value):
+    text = repr(round(value, 6))
+    return text[:-2] if text.endswith('.0') else text
+
+
+class FBXGenerator(object):
+    def __init__(self, numJoints=50, numFrames=100, numBlendshapes=0, namespace='chr', fps=30, seed=0, bindPose=False):
+        """
+        namespace can be a list of namespaces to write a bake of several characters like a shared bake, each has its own rig.
+        fps that are not whole numbers, like 30000 / 1001.0, get key times of a whole number of ticks per frame.
+        """
+        super(FBXGenerator, self).__init__()
+        self.numJoints = max(1, numJoints)
+        self.numFrames = max(2, numFrames)
+        self.numBlendshapes = numBlendshapes
+        self.namespaces = list(namespace) if isinstance(namespace, (list, tuple)) else [namespace]
+        self.namespace = self.namespaces[0]
+        self.fps = fps
+        self.seed = seed
+        self.bindPose = bindPose
+
+        self._random = random.Random(seed)
+        self._nextId = 1000000000
+        self._connections = []
+
+        self.characters = [self._getCharacter(namespace) for namespace in self.namespaces]
+        self.groupName = self.characters[0]['groupName']
+        self.meshName = self.characters[0]['meshName']
+        self.rootJoint = self.characters[0]['rootJoint']
+        self.jointNames = self.characters[0]['jointNames']
+        self.jointParents = self.characters[0]['jointParents']
+        self.blendshapeNames = ['target{0:03d}'.format(i) for i in range(self.numBlendshapes)]
+
+    def _getCharacter(self, namespace):
+        prefix = namespace + ':' if namespace else ''  # Objects of a scene without references have no namespace
+        rootJoint = prefix + 'Root'
+        return {
+            'groupName': prefix + 'Rig_GRP',
+            'meshName': prefix + 'Body',
+            'rootJoint': rootJoint,
+            'jointNames': [rootJoint] + ['{0}Joint{1:03d}'.format(prefix, i) for i in range(1, self.numJoints)],
+            'jointParents': [None] + [self._random.randint(max(0, i - 4), i - 1) for i in range(1, self.numJoints)],
+        }
+
+    def write(self, fbxFile):
+        with open(fbxFile, 'w') as f:
+            f.writelines(self.iterLines())
+        return fbxFile
+
+    def iterLines(self):
+        self._random.seed(self.seed)
+        self._nextId = 1000000000
+        self._connections = []
+
+        for lines in (self._header(), self._globalSettings(), self._definitions(), self._objects(), self._connectionLines(), self._takes()):
+            for line in lines:
+                yield line
+
+    def getKTime(self, frame):
+        if self.fps == int(self.fps):
+            return frame * KTIME_PER_SECOND // int(self.fps)
+        return frame * int(KTIME_PER_SECOND / self.fps)
+
+    def getTimeMode(self):
+        for timeMode, fps in TIME_MODES:
+            if abs(fps - self.fps) < 0.0001:
+                return timeMode
+        return TIME_MODE_CUSTOM
+
+    def _newId(self):
+        self._nextId += self._random.randint(1, 9999)
+        return self._nextId
+
+    def _connect(self, kind, child, childName, parent, parentName, prop=None):
+        self._connections.append((kind, child, childName, parent, parentName, prop))
+
+    def _header(self):
+        yield '; FBX 7.5.0 project file\n'
+        yield '; ----------------------------------------------------\n'
+        yield '\n'
+        yield 'FBXHeaderExtension:  {\n'
+        yield '\tFBXHeaderVersion: 1003\n'
+        yield '\tFBXVersion: 7500\n'
+        yield '\tCreationTimeStamp:  {\n'
+        yield '\t\tVersion: 1000\n'
+        yield '\t\tYear: 2020\n'
+        yield '\t\tMonth: 1\n'
+        yield '\t\tDay: 1\n'
+        yield '\t\tHour: 0\n'
+        yield '\t\tMinute: 0\n'
+        yield '\t\tSecond: 0\n'
+        yield '\t\tMillisecond: 0\n'
+        yield '\t}\n'
+        yield '\tCreator: "FBX SDK/FBX Plugins version 2018.1.1"\n'
+        yield '\tSceneInfo: "SceneInfo::GlobalInfo", "UserData" {\n'
+        yield '\t\tType: "UserData"\n'
+        yield '\t\tVersion: 100\n'
+        yield '\t\tMetaData:  {\n'
+        yield '\t\t\tVersion: 100\n'
+        yield '\t\t\tTitle: ""\n'
+        yield '\t\t\tSubject: ""\n'
+        yield '\t\t}\n'
+        yield '\t}\n'
+        yield '}\n'
+        yield 'GlobalInfo:  {\n'
+        yield '}\n'
+        yield 'FileId: "synthetic"\n'
+        yield 'CreationTime: "2020-01-01 00:00:00:000"\n'
+        yield 'Creator: "FBX SDK/FBX Plugins version 2018.1.1"\n'
+
+    def _globalSettings(self):
+        stopTime = self.getKTime(self.numFrames - 1)
+        yield 'GlobalSettings:  {\n'
+        yield '\tVersion: 1000\n'
+        yield '\tProperties70:  {\n'
+        yield '\t\tP: "UpAxis", "int", "Integer", "",1\n'
+        yield '\t\tP: "UpAxisSign", "int", "Integer", "",1\n'
+        yield '\t\tP: "FrontAxis", "int", "Integer", "",2\n'
+        yield '\t\tP: "FrontAxisSign", "int", "Integer", "",1\n'
+        yield '\t\tP: "CoordAxis", "int", "Integer", "",0\n'
+        yield '\t\tP: "CoordAxisSign", "int", "Integer", "",1\n'
+        yield '\t\tP: "UnitScaleFactor", "double", "Number", "",1\n'
+        yield '\t\tP: "TimeMode", "enum", "", "",{0}\n'.format(self.getTimeMode())
+        yield '\t\tP: "TimeSpanStart", "KTime", "Time", "",0\n'
+        yield '\t\tP: "TimeSpanStop", "KTime", "Time", "",{0}\n'.format(stopTime)
+        yield '\t\tP: "CustomFrameRate", "double", "Number", "",{0}\n'.format(formatFloat(self.fps) if self.getTimeMode() == TIME_MODE_CUSTOM else -1)
+        yield '\t}\n'
+        yield '}\n'
+        yield '\n'
+        yield '; Documents Description\n'
+        yield ';------------------------------------------------------------------\n'
+        yield '\n'
+        yield 'Documents:  {\n'
+        yield '\tCount: 1\n'
+        yield '\tDocument: 1000000000, "", "Scene" {\n'
+        yield '\t\tProperties70:  {\n'
+        yield '\t\t\tP: "SourceObject", "object", "", ""\n'
+        yield '\t\t\tP: "ActiveAnimStackName", "KString", "", "", "Take 001"\n'
+        yield '\t\t}\n'
+        yield '\t\tRootNode: 0\n'
+        yield '\t}\n'
+        yield '}\n'
+        yield '\n'
+        yield '; Document References\n'
+        yield ';------------------------------------------------------------------\n'
+        yield '\n'
+        yield 'References:  {\n'
+        yield '}\n'
+
+    def _definitions(self):
+        numCharacters = len(self.characters)
+        numCurves = (self.numJoints * 9 + self.numBlendshapes) * numCharacters
+        numCurveNodes = (self.numJoints * 3 + self.numBlendshapes) * numCharacters
+        objectTypes = [
+            ('GlobalSettings', 1),
+            ('AnimationStack', 1),
+            ('AnimationLayer', 1),
+            ('NodeAttribute', (self.numJoints + 1) * numCharacters),
+            ('Model', (self.numJoints + 2) * numCharacters),
+            ('Geometry', (1 + self.numBlendshapes) * numCharacters),
+            ('Deformer', (1 + self.numBlendshapes if self.numBlendshapes else 0) * numCharacters),
+            ('Pose', 1 if self.bindPose else 0),
+            ('AnimationCurveNode', numCurveNodes),
+            ('AnimationCurve', numCurves),
+        ]
+        objectTypes = [objectType for objectType in objectTypes if objectType[1]]
+
+        yield '\n'
+        yield '; Object definitions\n'
+        yield ';------------------------------------------------------------------\n'
+        yield '\n'
+        yield 'Definitions:  {\n'
+        yield '\tVersion: 100\n'
+        yield '\tCount: {0}\n'.format(sum(count for name, count in objectTypes))
+        for name, count in objectTypes:
+            yield '\tObjectType: "{0}" {{\n'.format(name)
+            yield '\t\tCount: {0}\n'.format(count)
+            yield '\t}\n'
+        yield '}\n'
+
+    def _objects(self):
+        yield '\n'
+        yield '; Object properties\n'
+        yield ';------------------------------------------------------------------\n'
+        yield '\n'
+        yield 'Objects:  {\n'
+
+        for character in self.characters:
+            for line in self._rig(character):
+                yield line
+
+        if self.bindPose:
+            for line in self._bindPose():
+                yield line
+
+        stackId = self._newId()
+        layerId = self._newId()
+        yield '\tAnimationStack: {0}, "AnimStack::Take 001", "" {{\n'.format(stackId)
+        yield '\t\tProperties70:  {\n'
+        yield '\t\t\tP: "LocalStop", "KTime", "Time", "",{0}\n'.format(self.getKTime(self.numFrames - 1))
+        yield '\t\t\tP: "ReferenceStop", "KTime", "Time", "",{0}\n'.format(self.getKTime(self.numFrames - 1))
+        yield '\t\t}\n'
+        yield '\t}\n'
+        self._connect('OO', layerId, 'AnimLayer::BaseLayer', stackId, 'AnimStack::Take 001')
+
+        keyTimes = ','.join(str(self.getKTime(frame)) for frame in range(self.numFrames))
+        for character in self.characters:
+            for jointName, (jointId, attrId) in zip(character['jointNames'], character['jointIds']):
+                for curveNodeName, prop in (('T', 'Lcl Translation'), ('R', 'Lcl Rotation'), ('S', 'Lcl Scaling')):
+                    for line in self._curveNode(curveNodeName, prop, 'XYZ', jointId, 'Model::' + jointName, layerId, keyTimes):
+                        yield line
+
+            for blendshapeName, channelId in zip(self.blendshapeNames, character['blendshapeChannelIds']):
+                for line in self._curveNode('DeformPercent', 'DeformPercent', ['DeformPercent'], channelId, 'SubDeformer::' + blendshapeName, layerId, keyTimes):
+                    yield line
+
+        yield '\tAnimationLayer: {0}, "AnimLayer::BaseLayer", "" {{\n'.format(layerId)
+        yield '\t}\n'
+        yield '}\n'
+
+    def _rig(self, character):
+        """Objects of one character, ids are kept in character for its curves and the bind pose."""
+        jointIds = []
+        for jointName in character['jointNames']:
+            attrId = self._newId()
+            jointIds.append((self._newId(), attrId))
+            yield '\tNodeAttribute: {0}, "NodeAttribute::", "LimbNode" {{\n'.format(attrId)
+            yield '\t\tProperties70:  {\n'
+            yield '\t\t\tP: "Size", "double", "Number", "",3.33333333333333\n'
+            yield '\t\t}\n'
+            yield '\t\tTypeFlags: "Skeleton"\n'
+            yield '\t}\n'
+        character['jointIds'] = jointIds
+
+        groupId = self._newId()
+        meshId = self._newId()
+        geometryId = self._newId()
+        character['meshId'] = meshId
+        for line in self._geometry(geometryId, 'Geometry::', 'Mesh'):
+            yield line
+
+        blendshapeChannelIds = []
+        character['blendshapeChannelIds'] = blendshapeChannelIds
+        if self.numBlendshapes:
+            blendshapeId = self._newId()
+            yield '\tDeformer: {0}, "Deformer::blendShape1", "BlendShape" {{\n'.format(blendshapeId)
+            yield '\t\tVersion: 100\n'
+            yield '\t}\n'
+            self._connect('OO', blendshapeId, 'Deformer::blendShape1', geometryId, 'Geometry::')
+
+            for blendshapeName in self.blendshapeNames:
+                channelId = self._newId()
+                shapeId = self._newId()
+                blendshapeChannelIds.append(channelId)
+                channelName = 'SubDeformer::{0}'.format(blendshapeName)
+                yield '\tDeformer: {0}, "{1}", "BlendShapeChannel" {{\n'.format(channelId, channelName)
+                yield '\t\tVersion: 100\n'
+                yield '\t\tDeformPercent: 0\n'
+                yield '\t\tFullWeights: *1 {\n'
+                yield '\t\t\ta: 100\n'
+                yield '\t\t} \n'
+                yield '\t}\n'
+                for line in self._geometry(shapeId, 'Geometry::{0}'.format(blendshapeName), 'Shape'):
+                    yield line
+                self._connect('OO', channelId, channelName, blendshapeId, 'Deformer::blendShape1')
+                self._connect('OO', shapeId, 'Geometry::{0}'.format(blendshapeName), channelId, channelName)
+
+        # Mesh is exported before the skeleton like FBXExport does for a selection of export set members
+        for line in self._model(meshId, character['meshName'], 'Mesh', isJoint=False):
+            yield line
+        for line in self._model(groupId, character['groupName'], 'Null', isJoint=False):
+            yield line
+        for jointName, (jointId, attrId) in zip(character['jointNames'], jointIds):
+            for line in self._model(jointId, jointName, 'LimbNode', isJoint=True):
+                yield line
+
+        self._connect('OO', meshId, 'Model::' + character['meshName'], 0, 'Model::RootNode')
+        self._connect('OO', groupId, 'Model::' + character['groupName'], 0, 'Model::RootNode')
+        self._connect('OO', geometryId, 'Geometry::', meshId, 'Model::' + character['meshName'])
+        for i, (jointName, (jointId, attrId)) in enumerate(zip(character['jointNames'], jointIds)):
+            parentIndex = character['jointParents'][i]
+            if parentIndex is None:
+                self._connect('OO', jointId, 'Model::' + jointName, groupId, 'Model::' + character['groupName'])
+            else:
+                self._connect('OO', jointId, 'Model::' + jointName, jointIds[parentIndex][0], 'Model::' + character['jointNames'][parentIndex])
+            self._connect('OO', attrId, 'NodeAttribute::', jointId, 'Model::' + jointName)
+
+    def _bindPose(self):
+        """One bind pose of the meshes and joints of every character, FBXExport writes it without connections."""
+        nodeIds = []
+        for character in self.characters:
+            nodeIds.append(character['meshId'])
+            nodeIds.extend(jointId for jointId, attrId in character['jointIds'])
+
+        yield '\tPose: {0}, "Pose::bindPose1", "BindPose" {{\n'.format(self._newId())
+        yield '\t\tType: "BindPose"\n'
+        yield '\t\tVersion: 100\n'
+        yield '\t\tNbPoseNodes: {0}\n'.format(len(nodeIds))
+        for nodeId in nodeIds:
+            yield '\t\tPoseNode:  {\n'
+            yield '\t\t\tNode: {0}\n'.format(nodeId)
+            yield '\t\t\tMatrix: *16 {\n'
+            yield '\t\t\t\ta: 1,0,0,0,0,1,0,0,0,0,1,0,0,0,0,1\n'
+            yield '\t\t\t} \n'
+            yield '\t\t}\n'
+        yield '\t}\n'
+
+    def _geometry(self, geometryId, name, kind):
+        yield '\tGeometry: {0}, "{1}", "{2}" {{\n'.format(geometryId, name, kind)
+        yield '\t\tVersion: 100\n'
+        if kind == 'Shape':
+            yield '\t\tIndexes: *3 {\n'
+            yield '\t\t\ta: 0,1,2\n'
+            yield '\t\t} \n'
+        yield '\t\tVertices: *9 {\n'
+        yield '\t\t\ta: {0}\n'.format(','.join(formatFloat(self._random.uniform(-10, 10)) for i in range(9)))
+        yield '\t\t} \n'
+        if kind == 'Mesh':
+            yield '\t\tPolygonVertexIndex: *3 {\n'
+            yield '\t\t\ta: 0,1,-3\n'
+            yield '\t\t} \n'
+            yield '\t\tGeometryVersion: 124\n'
+        yield '\t}\n'
+
+    def _model(self, modelId, name, kind, isJoint):
+        yield '\tModel: {0}, "Model::{1}", "{2}" {{\n'.format(modelId, name, kind)
+        yield '\t\tVersion: 232\n'
+        yield '\t\tProperties70:  {\n'
+        if isJoint:
+            yield '\t\t\tP: "PreRotation", "Vector3D", "Vector", "",{0},0,0\n'.format(-90 if name == self.rootJoint else 0)
+        yield '\t\t\tP: "RotationActive", "bool", "", "",1\n'
+        yield '\t\t\tP: "InheritType", "enum", "", "",1\n'
+        yield '\t\t\tP: "ScalingMax", "Vector3D", "Vector", "",0,0,0\n'
+        yield '\t\t\tP: "DefaultAttributeIndex", "int", "Integer", "",0\n'
+        yield '\t\t\tP: "Lcl Translation", "Lcl Translation", "", "A",{0},{1},{2}\n'.format(*[formatFloat(self._random.uniform(-5, 5)) for i in range(3)])
+        if isJoint:
+            yield '\t\t\tP: "Lcl Rotation", "Lcl Rotation", "", "A",{0},{1},{2}\n'.format(*[formatFloat(self._random.uniform(-90, 90)) for i in range(3)])
+            yield '\t\t\tP: "Show", "bool", "", "",0\n'  # Joints are hidden in animation scenes
+            yield '\t\t\tP: "MaxHandle", "int", "Integer", "UH",{0}\n'.format(self._random.randint(1, 999))
+        else:
+            yield '\t\t\tP: "currentUVSet", "KString", "", "U", "map1"\n'
+        yield '\t\t}\n'
+        yield '\t\tShading: Y\n'
+        yield '\t\tCulling: "CullingOff"\n'
+        yield '\t}\n'
+
+    def _curveNode(self, curveNodeName, prop, channels, targetId, targetName, layerId, keyTimes):
+        curveNodeId = self._newId()
+        curveNodeFullName = 'AnimCurveNode::' + curveNodeName
+        yield '\tAnimationCurveNode: {0}, "{1}", "" {{\n'.format(curveNodeId, curveNodeFullName)
+        yield '\t\tProperties70:  {\n'
+        for channel in channels:
+            yield '\t\t\tP: "d|{0}", "Number", "", "A",0\n'.format(channel)
+        yield '\t\t}\n'
+        yield '\t}\n'
+        self._connect('OO', curveNodeId, curveNodeFullName, layerId, 'AnimLayer::BaseLayer')
+        self._connect('OP', curveNodeId, curveNodeFullName, targetId, targetName, prop)
+
+        for channel in channels:
+            curveId = self._newId()
+            values = self._getValues(curveNodeName)
+            yield '\tAnimationCurve: {0}, "AnimCurve::", "" {{\n'.format(curveId)
+            yield '\t\tDefault: 0\n'
+            yield '\t\tKeyVer: 4009\n'
+            yield '\t\tKeyTime: *{0} {{\n'.format(self.numFrames)
+            yield '\t\t\ta: {0}\n'.format(keyTimes)
+            yield '\t\t} \n'
+            yield '\t\tKeyValueFloat: *{0} {{\n'.format(self.numFrames)
+            yield '\t\t\ta: {0}\n'.format(','.join(formatFloat(value) for value in values))
+            yield '\t\t} \n'
+            yield '\t\t;KeyAttrFlags: Cubic|TangeantAuto|GenericTimeIndependent|GenericClampProgressive\n'
+            yield '\t\tKeyAttrFlags: *1 {\n'
+            yield '\t\t\ta: {0}\n'.format(CURVE_FLAGS)
+            yield '\t\t} \n'
+            yield '\t\tKeyAttrDataFloat: *4 {\n'
+            yield '\t\t\ta: {0}\n'.format(CURVE_DATA)
+            yield '\t\t} \n'
+            yield '\t\tKeyAttrRefCount: *1 {\n'
+            yield '\t\t\ta: {0}\n'.format(self.numFrames)
+            yield '\t\t} \n'
+            yield '\t}\n'
+            self._connect('OP', curveId, 'AnimCurve::', curveNodeId, curveNodeFullName, 'd|{0}'.format(channel))
+
+    def _getValues(self, curveNodeName):
+        """Baked values are smooth motion with a little noise, scale and some blendshapes are constant like in real exports."""
+        if curveNodeName == 'S' or (curveNodeName == 'DeformPercent' and self._random.random() < 0.3):
+            value = 1.0 if curveNodeName == 'S' else 0.0
+            return [value] * self.numFrames
+
+        scale = 100.0 if curveNodeName == 'DeformPercent' else (10.0 if curveNodeName == 'T' else 45.0)
+        offset = self._random.uniform(-scale, scale)
+        period = self._random.uniform(10, 120)
+        phase = self._random.uniform(0, math.pi * 2)
+        return [offset + scale * math.sin(phase + frame * 2 * math.pi / period) + self._random.gauss(0, scale * 0.001) for frame in range(self.numFrames)]
+
+    def _connectionLines(self):
+        yield '\n'
+        yield '; Object connections\n'
+        yield ';------------------------------------------------------------------\n'
+        yield '\n'
+        yield 'Connections:  {\n'
+        for kind, child, childName, parent, parentName, prop in self._connections:
+            yield '\t\n'
+            yield '\t;{0}, {1}\n'.format(childName, parentName)
+            if prop is None:
+                yield '\tC: "{0}",{1},{2}\n'.format(kind, child, parent)
+            else:
+                yield '\tC: "{0}",{1},{2}, "{3}"\n'.format(kind, child, parent, prop)
+        yield '}\n'
+
+    def _takes(self):
+        stopTime = self.getKTime(self.numFrames - 1)
+        yield ';Takes section\n'
+        yield ';----------------------------------------------------\n'
+        yield '\n'
+        yield 'Takes:  {\n'
+        yield '\tCurrent: "Take 001"\n'
+        yield '\tTake: "Take 001" {\n'
+        yield '\t\tFileName: "Take_001.tak"\n'
+        yield '\t\tLocalTime: 0,{0}\n'.format(stopTime)
+        yield '\t\tReferenceTime: 0,{0}\n'.format(stopTime)
+        yield '\t}\n'
+        yield '}\n'
+
+
+def generate(fbxFile, numJoints=50, numFrames=100, numBlendshapes=0, namespace='chr', seed=0, fps=30, bindPose=False):
+    """Write the file and return the root joint name of the first namespace to pass to the fbx editors."""
+    generator = FBXGenerator(numJoints, numFrames, numBlendshapes, namespace, fps, seed, bindPose)
+    generator.write(fbxFile)
+    return generator.rootJoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic ascii fbx file shaped like publisher exports.')
+    parser.add_argument('fbxFile')
+    parser.add_argument('--joints', type=int, default=50)
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--blendshapes', type=int, default=0)
+    parser.add_argument('--namespace', default='chr')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generate(args.fbxFile, args.joints, args.frames, args.blendshapes, args.namespace, args.seed)
+
+
+if __name__ == '__main__':
+    main()
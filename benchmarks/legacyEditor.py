@@ -0,0 +1,59 @@
+"""
+Description: The whole file regular expression editor that _editFBX used before streaming edits.
+Kept as the reference for output comparison and as the speed baseline of the post processing benchmark.
+"""
+
+import re
+
+
+NEW_ROOT_JOINT_PROPERTIES = '''
+                        P: "PreRotation", "Vector3D", "Vector", "",-90,0,0
+                        P: "RotationActive", "bool", "", "",1
+                        P: "InheritType", "enum", "", "",1
+                        P: "ScalingMax", "Vector3D", "Vector", "",0,0,0
+                        P: "Show", "bool", "", "",1
+                        P: "DefaultAttributeIndex", "int", "Integer", "",0
+                        P: "Lcl Translation", "Lcl Translation", "", "A",0,0,0
+                        P: "Lcl Rotation", "Lcl Rotation", "", "A+",0,0,0
+            '''
+
+
+def editContents(contents, rootJnt, namespace, bakeSpace):
+    # Show joints
+    subStrs = ''
+    pattern = re.compile(r'\tModel:.*?"LimbNode" {.*?}.*?}\n', re.DOTALL)
+    finds = pattern.findall(contents)
+    if finds:
+        for find in finds:
+            subStr = re.sub(r'(\tP: "Show".*?),\d', r'\1,1', find)
+            subStrs += subStr
+    contents = contents.replace(''.join(finds), subStrs)
+
+    # Parent root joint to the world
+    contents = re.sub(r'(\t;Model.*?{0}, Model::).*?(\n\tC: "OO",\d+),\d+\n'.format(rootJnt), r'\1RootNode\2,0\n', contents)
+
+    # If bake space is local space, set root joint to default state
+    if bakeSpace == 'local':
+        oldRootJntBlock = re.search(r'\tModel:.*?"Model::.*?%s", "LimbNode" {.*?{(.*?)\t\t}.*?}\n' % (rootJnt), contents, re.DOTALL)
+        oldRootJntProperties = oldRootJntBlock.group(1)
+        newRootJntBlock = oldRootJntBlock.group().replace(oldRootJntProperties, NEW_ROOT_JOINT_PROPERTIES)
+        contents = contents.replace(oldRootJntBlock.group(), newRootJntBlock)
+
+        contents = re.sub(r'\t;AnimCurveNode::.*?Model::.*?%s\n\tC: "OP".*?\n' % (rootJnt), '', contents)  # Remove root joint anim curves
+
+    # Remove namespace
+    contents = contents.replace(':' + namespace, '')
+
+    return contents
+
+
+def editFile(fbxFile, rootJnt, namespace, bakeSpace):
+    with open(fbxFile, 'r') as f:
+        contents = f.read()
+
+    contents = editContents(contents, rootJnt, namespace, bakeSpace)
+
+    with open(fbxFile, 'w') as f:
+        f.write(contents)
+
+    return len(contents)
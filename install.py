@@ -53,7 +53,6 @@ def addShelfButtons():
 
     command = '''
 import takAniPublisher.aniPublisherCtrl as apCtrl
-reload(apCtrl)
 
 apCtrlObj = apCtrl.AniPublisherCtrl()
 apCtrlObj.showUI()
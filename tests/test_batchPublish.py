@@ -0,0 +1,151 @@
+"""
+Description: Runs batch publishes with a fake launcher and the subprocess launcher with a fake worker module, no maya is needed.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+
+from takAniPublisher import batchPublish
+from takAniPublisher import batchWorker
+
+
+FAKE_WORKER = '''
+import sys
+import json
+
+with open(sys.argv[1], 'r') as f:
+    job = json.load(f)
+if job.get('crash'):
+    sys.stdout.write('crashed on purpose')
+    sys.exit(3)
+with open(sys.argv[2], 'w') as f:
+    json.dump({'status': 'succeeded', 'items': [{'namespace': namespace} for namespace in job.get('namespaces', [])]}, f)
+'''
+
+
+class FakeLauncher(object):
+    """Publishes nothing, jobs with fail set fail."""
+    def __init__(self):
+        super(FakeLauncher, self).__init__()
+        self.jobs = []
+        self._lock = threading.Lock()
+
+    def launch(self, job):
+        with self._lock:
+            self.jobs.append(job)
+        status = 'failed' if job.get('fail') else 'succeeded'
+        items = [] if job.get('fail') else [{'namespace': namespace} for namespace in job.get('namespaces', [])]
+        return {'scene': job['scene'], 'status': status, 'items': items, 'error': 'Failed.' if job.get('fail') else None, 'duration': 0.0}
+
+
+class BatchPublisherTest(unittest.TestCase):
+    def setUp(self):
+        self.messages = []
+
+    def testReport(self):
+        jobs = [
+            {'scene': 'shot010.ma', 'namespaces': ['heroA', 'heroB']},
+            {'scene': 'shot020.ma', 'fail': True},
+            {'scene': 'shot030.ma', 'namespaces': ['heroC']},
+        ]
+        launcher = FakeLauncher()
+        report = batchPublish.BatchPublisher(launcher, numWorkers=2, log=self.messages.append).run(jobs)
+
+        self.assertEqual(report['numJobs'], 3)
+        self.assertEqual(report['numSucceeded'], 2)
+        self.assertEqual(report['numFailed'], 1)
+        self.assertEqual(report['numItems'], 3)
+        self.assertEqual([job['scene'] for job in report['jobs']], ['shot010.ma', 'shot020.ma', 'shot030.ma'])
+        self.assertEqual(len(launcher.jobs), 3)
+        self.assertEqual(len(self.messages), 3)
+        self.assertTrue(self.messages[-1].startswith('[3/3] shot030.ma: succeeded'))
+
+    def testNoJobs(self):
+        report = batchPublish.BatchPublisher(FakeLauncher(), log=self.messages.append).run([])
+        self.assertEqual((report['numJobs'], report['numFailed']), (0, 0))
+
+
+class FakeItem(object):
+    def __init__(self, namespace):
+        super(FakeItem, self).__init__()
+        self.namespace = namespace
+        self.filename = namespace
+        self.bakeSpace = 'world'
+        self.enable = True
+        self.settings = {}
+
+
+class ApplyOverridesTest(unittest.TestCase):
+    def setUp(self):
+        self.pubItems = [FakeItem('heroA'), FakeItem('heroB')]
+
+    def testOverrides(self):
+        batchWorker.applyOverrides(self.pubItems, {'namespaces': ['heroB'], 'bakeSpace': 'local', 'filename': 'shot010_heroB', 'settings': {'keyReduction': True}})
+        self.assertEqual([(pubItem.enable, pubItem.filename, pubItem.bakeSpace) for pubItem in self.pubItems], [(False, 'heroA', 'world'), (True, 'shot010_heroB', 'local')])
+        self.assertEqual(self.pubItems[1].settings, {'keyReduction': True})
+
+    def testFilenameOfSeveralItems(self):
+        self.assertRaises(RuntimeError, batchWorker.applyOverrides, self.pubItems, {'filename': 'shot010'})
+        self.assertEqual([pubItem.filename for pubItem in self.pubItems], ['heroA', 'heroB'])
+
+
+class LoadJobsTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def testScenesAndSpecs(self):
+        specFile = os.path.join(self.tempDir, 'jobs.json')
+        with open(specFile, 'w') as f:
+            json.dump({'workers': 3, 'jobs': [{'scene': 'shot020.ma', 'bakeSpace': 'local'}]}, f)
+
+        jobs, numWorkers = batchPublish.loadJobs(['shot010.ma', specFile])
+        self.assertEqual(jobs, [{'scene': 'shot010.ma'}, {'scene': 'shot020.ma', 'bakeSpace': 'local'}])
+        self.assertEqual(numWorkers, 3)
+
+
+class SubprocessLauncherTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        with open(os.path.join(self.tempDir, 'fakeBatchWorker.py'), 'w') as f:
+            f.write(FAKE_WORKER)
+
+        self.pythonPath = os.environ.get('PYTHONPATH')
+        os.environ['PYTHONPATH'] = self.tempDir
+
+    def tearDown(self):
+        if self.pythonPath is None:
+            os.environ.pop('PYTHONPATH', None)
+        else:
+            os.environ['PYTHONPATH'] = self.pythonPath
+        shutil.rmtree(self.tempDir)
+
+    def testBatchPublish(self):
+        launcher = batchPublish.SubprocessLauncher(sys.executable, workerModule='fakeBatchWorker')
+        jobs = [{'scene': 'shot010.ma', 'namespaces': ['heroA']}, {'scene': 'shot020.ma', 'crash': True}]
+        report = batchPublish.BatchPublisher(launcher, numWorkers=2, log=lambda message: None).run(jobs)
+
+        succeeded, crashed = report['jobs']
+        self.assertEqual(succeeded['status'], 'succeeded')
+        self.assertEqual(succeeded['items'], [{'namespace': 'heroA'}])
+        self.assertEqual(crashed['status'], 'failed')
+        self.assertIn('exited with code 3', crashed['error'])
+        self.assertIn('crashed on purpose', crashed['error'])
+        self.assertEqual(report['numFailed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Description: Converts synthetic ascii exports to binary fbx and reads them back with a small reader of the 7.x node record format.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import shutil
+import struct
+import zlib
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxBinary
+
+import fbxGenerator
+
+
+ARRAY_FORMATS = {'f': 'f', 'd': 'd', 'l': 'q', 'i': 'i', 'b': 'B'}
+SCALAR_FORMATS = {'Y': 'h', 'C': 'B', 'I': 'i', 'F': 'f', 'D': 'd', 'L': 'q'}
+
+
+class BinaryNode(object):
+    def __init__(self, name, properties, children):
+        super(BinaryNode, self).__init__()
+        self.name = name
+        self.properties = properties  # (type code, value) pairs
+        self.children = children
+
+    def find(self, name):
+        return [child for child in self.children if child.name == name]
+
+
+class BinaryReader(object):
+    """Reads every node record and checks end offsets, so a wrong record length fails the read."""
+    def __init__(self, data):
+        super(BinaryReader, self).__init__()
+        self.data = data
+        self.version = struct.unpack('<I', data[23:27])[0]
+        self.isWide = self.version >= 7500
+        self.pos = 27
+
+    def read(self):
+        nodes = []
+        while True:
+            node = self._readNode()
+            if node is None:
+                break
+            nodes.append(node)
+        return nodes
+
+    def _unpack(self, fmt):
+        values = struct.unpack_from('<' + fmt, self.data, self.pos)
+        self.pos += struct.calcsize('<' + fmt)
+        return values
+
+    def _readNode(self):
+        if self.isWide:
+            endOffset, numProperties, propertyLength = self._unpack('QQQ')
+        else:
+            endOffset, numProperties, propertyLength = self._unpack('III')
+        nameLength = self._unpack('B')[0]
+        if endOffset == 0:
+            return None
+
+        name = self.data[self.pos:self.pos + nameLength].decode('utf-8')
+        self.pos += nameLength
+
+        propertyStart = self.pos
+        properties = [self._readProperty() for i in range(numProperties)]
+        if self.pos - propertyStart != propertyLength:
+            raise ValueError('"{0}" property length does not match its properties.'.format(name))
+
+        children = []
+        while self.pos < endOffset:
+            child = self._readNode()
+            if child is None:
+                break
+            children.append(child)
+        if self.pos != endOffset:
+            raise ValueError('"{0}" ends at {1} instead of {2}.'.format(name, self.pos, endOffset))
+        return BinaryNode(name, properties, children)
+
+    def _readProperty(self):
+        typeCode = self.data[self.pos:self.pos + 1].decode('ascii')
+        self.pos += 1
+        if typeCode in SCALAR_FORMATS:
+            return typeCode, self._unpack(SCALAR_FORMATS[typeCode])[0]
+        if typeCode in ('S', 'R'):
+            length = self._unpack('I')[0]
+            value = self.data[self.pos:self.pos + length]
+            self.pos += length
+            return typeCode, value
+
+        count, encoding, length = self._unpack('III')
+        data = self.data[self.pos:self.pos + length]
+        self.pos += length
+        if encoding:
+            data = zlib.decompress(data)
+        return typeCode, list(struct.unpack('<{0}{1}'.format(count, ARRAY_FORMATS[typeCode]), data))
+
+
+def readAsciiArrays(asciiFile, name):
+    with open(asciiFile, 'r') as f:
+        text = f.read()
+    pattern = re.compile(r'\n\t\t' + name + r': \*\d+ \{\s*a: ([^}]*)\}')
+    return [[token for token in re.split(r'[\s,]+', match.group(1)) if token] for match in pattern.finditer(text)]
+
+
+class FBXBinaryTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.asciiFile = os.path.join(self.tempDir, 'ascii.fbx')
+        self.binaryFile = os.path.join(self.tempDir, 'binary.fbx')
+        fbxGenerator.generate(self.asciiFile, 6, 60, 3, 'chr')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def readBinary(self):
+        fbxBinary.convertFile(self.asciiFile, self.binaryFile)
+        with open(self.binaryFile, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data.startswith(fbxBinary.HEAD_MAGIC))
+        self.assertTrue(data.endswith(fbxBinary.FOOT_MAGIC))
+        return BinaryReader(data).read()
+
+    def testHeaderNodes(self):
+        nodes = self.readBinary()
+        names = [node.name for node in nodes]
+        for name in ('FBXHeaderExtension', 'FileId', 'CreationTime', 'Creator', 'Objects', 'Connections'):
+            self.assertEqual(names.count(name), 1, name)
+
+        fileId = nodes[names.index('FileId')]
+        self.assertEqual(fileId.properties, [('R', fbxBinary.FILE_ID)])
+        self.assertEqual(nodes[names.index('CreationTime')].properties[0][0], 'S')
+
+    def testObjectsAndConnections(self):
+        nodes = self.readBinary()
+        with open(self.asciiFile, 'r') as f:
+            text = f.read()
+        objects = [node for node in nodes if node.name == 'Objects'][0]
+        connections = [node for node in nodes if node.name == 'Connections'][0]
+
+        self.assertEqual(len(objects.children), len(re.findall(r'\n\t\w+: -?\d+, "', text.split('\nObjects:')[1].split('\n}')[0])))
+        self.assertEqual(len(connections.find('C')), len(re.findall(r'\n\tC: ', text)))
+
+        curve = objects.find('AnimationCurve')[0]
+        self.assertEqual(curve.properties[0][0], 'L')
+        self.assertEqual(curve.properties[1], ('S', b'\x00\x01AnimCurve'))
+
+    def testKeyArrays(self):
+        nodes = self.readBinary()
+        objects = [node for node in nodes if node.name == 'Objects'][0]
+        curves = objects.find('AnimationCurve')
+
+        keyTimes = [curve.find('KeyTime')[0].properties[0] for curve in curves]
+        self.assertEqual([typeCode for typeCode, _ in keyTimes], ['l'] * len(curves))
+        self.assertEqual([values for _, values in keyTimes], [[int(token) for token in tokens] for tokens in readAsciiArrays(self.asciiFile, 'KeyTime')])
+
+        asciiValues = readAsciiArrays(self.asciiFile, 'KeyValueFloat')
+        for curve, tokens in zip(curves, asciiValues):
+            typeCode, values = curve.find('KeyValueFloat')[0].properties[0]
+            self.assertEqual(typeCode, 'f')
+            for value, token in zip(values, tokens):
+                self.assertAlmostEqual(value, float(token), places=3)
+
+        typeCode, values = curves[0].find('KeyAttrDataFloat')[0].properties[0]
+        self.assertEqual(typeCode, 'f')
+        self.assertEqual(list(struct.unpack('<4i', struct.pack('<4f', *values))), [int(token) for token in fbxGenerator.CURVE_DATA.split(',')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Description: Splits synthetic bakes at whole and ntsc frame rates into clips and checks their keys, time spans and verification.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxClipper
+from takAniPublisher import fbxCurves
+from takAniPublisher import fbxEditor
+from takAniPublisher import fbxVerifier
+
+import fbxGenerator
+
+
+NUM_FRAMES = 60
+CLIPS = [(0, 14), (15, 40), (41, 59), (10, 20)]  # The last clip overlaps two others
+FRAME_RATES = [30, 30000 / 1001.0, 24000 / 1001.0]
+STOP_PATTERN = re.compile(r'P: "(?:TimeSpanStop|LocalStop|ReferenceStop)",.*,(-?\d+)\n')
+
+
+def readCurves(fbxFile):
+    with open(fbxFile, 'r') as f:
+        return [item for item in fbxCurves.iterCurves(f) if isinstance(item, fbxCurves.AnimationCurve)]
+
+
+class FBXClipperTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def split(self, fps):
+        fbxFile = os.path.join(self.tempDir, 'bake.fbx')
+        generator = fbxGenerator.FBXGenerator(4, NUM_FRAMES, 2, 'heroA', fps)
+        generator.write(fbxFile)
+        fbxEditor.FBXEditor(generator.rootJoint, 'heroA', 'world').edit(fbxFile)  # Clips are split after the edits
+        clips = [{'startFrame': startFrame, 'endFrame': endFrame, 'outFile': os.path.join(self.tempDir, 'clip{0}.fbx'.format(i))} for i, (startFrame, endFrame) in enumerate(CLIPS)]
+        fbxClipper.splitFile(fbxFile, clips)
+        return generator, fbxFile, clips
+
+    def testFrameRates(self):
+        for fps in FRAME_RATES:
+            generator, fbxFile, clips = self.split(fps)
+            self.assertAlmostEqual(fbxClipper.getFrameRate(fbxFile), fps)
+            numCurves = len(readCurves(fbxFile))
+
+            for clip in clips:
+                startFrame, endFrame = clip['startFrame'], clip['endFrame']
+                curves = readCurves(clip['outFile'])
+                self.assertEqual(len(curves), numCurves)
+                expectedTimes = [str(generator.getKTime(frame)) for frame in range(startFrame, endFrame + 1)]
+                for curve in curves:
+                    self.assertEqual(curve.keyTimes, expectedTimes, (fps, startFrame, endFrame))
+
+                with open(clip['outFile'], 'r') as f:
+                    stopTimes = set(int(stopTime) for stopTime in STOP_PATTERN.findall(f.read()))
+                self.assertEqual(stopTimes, set([fbxClipper.frameToKTime(endFrame, fbxClipper.getFrameRate(fbxFile))]))
+
+                report = fbxVerifier.FBXVerifier('Root', 'heroA', startFrame, endFrame, True).verify(clip['outFile'])
+                self.assertTrue(report['valid'], fbxVerifier.formatReport(report))
+
+    def testFrameToKTime(self):
+        self.assertEqual(fbxClipper.frameToKTime(1, 30.0), 1539538600)
+        self.assertEqual(fbxClipper.frameToKTime(1, 30000 / 1001.0), 1541078139)  # 1541078138.6 ticks
+        self.assertEqual(fbxClipper.frameToKTime(1, 24000 / 1001.0), 1926347673)  # 1926347673.25 ticks
+        self.assertEqual(fbxClipper.frameToKTime(-2, 24.0), -3848846500)
+
+    def testHeldValue(self):
+        generator, fbxFile, clips = self.split(30)
+        curve = readCurves(fbxFile)[0]
+        startTime = fbxClipper.frameToKTime(NUM_FRAMES + 10, 30.0)
+        clippedCurve = fbxClipper.clipCurve(curve, startTime, fbxClipper.frameToKTime(NUM_FRAMES + 20, 30.0))
+        self.assertEqual(clippedCurve.keyTimes, [str(startTime)])
+        self.assertEqual(clippedCurve.keyValues, curve.keyValues[-1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
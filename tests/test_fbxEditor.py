@@ -0,0 +1,107 @@
+"""
+Description: Edits synthetic exports with the streaming editor and compares them byte for byte to the legacy regular expression editor.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxEditor
+
+import fbxGenerator
+import legacyEditor
+
+
+NAMESPACE = 'heroA'
+SHOW_LINE_PATTERN = re.compile(r'(\tP: "Show", "bool", "", "",)0\n')
+NODE_ATTRIBUTE_PATTERN = re.compile(r'\tNodeAttribute: .*?\n\t}\n', re.DOTALL)
+JOINT_HEADER_PATTERN = re.compile(r'\tModel: \d+, "Model::[^"]*", "LimbNode" {\n')
+
+
+def showEveryOtherJoint(contents):
+    """Generated joints are all hidden, real scenes mix hidden and visible joints."""
+    count = [0]
+
+    def show(match):
+        count[0] += 1
+        return match.group(1) + ('1\n' if count[0] % 2 else '0\n')
+    return SHOW_LINE_PATTERN.sub(show, contents)
+
+
+def splitModelBlocks(contents):
+    """Move a NodeAttribute between the first two joint models so their Model blocks are not contiguous."""
+    attribute = NODE_ATTRIBUTE_PATTERN.search(contents).group()
+    contents = contents.replace(attribute, '', 1)
+    secondJoint = list(JOINT_HEADER_PATTERN.finditer(contents))[1].start()
+    return contents[:secondJoint] + attribute + contents[secondJoint:]
+
+
+class FBXEditorTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def assertMatchesLegacy(self, bakeSpace, namespace=NAMESPACE, transform=None, showAllJoints=False):
+        """showAllJoints expects every joint shown where the legacy editor misses joints."""
+        fbxFile = os.path.join(self.tempDir, 'export.fbx')
+        rootJoint = fbxGenerator.generate(fbxFile, 12, 30, 3, namespace)
+        with open(fbxFile, 'r') as f:
+            contents = f.read()
+        if transform:
+            contents = transform(contents)
+            with open(fbxFile, 'w') as f:
+                f.write(contents)
+
+        expected = legacyEditor.editContents(contents, rootJoint, NAMESPACE, bakeSpace)
+        if showAllJoints:
+            expected = SHOW_LINE_PATTERN.sub(r'\g<1>1\n', expected)
+        self.assertNotEqual(expected, contents)
+
+        fbxEditor.FBXEditor(rootJoint, NAMESPACE, bakeSpace).edit(fbxFile)
+        with open(fbxFile, 'r') as f:
+            self.assertEqual(f.read(), expected)
+
+    def testWorldSpace(self):
+        self.assertMatchesLegacy('world')
+
+    def testLocalSpace(self):
+        self.assertMatchesLegacy('local')
+
+    def testWithoutNamespace(self):
+        self.assertMatchesLegacy('world', namespace='')
+        self.assertMatchesLegacy('local', namespace='')
+
+    def testHiddenJoints(self):
+        self.assertMatchesLegacy('world', transform=showEveryOtherJoint)
+        self.assertMatchesLegacy('local', transform=showEveryOtherJoint)
+
+    def testSplitModelBlocks(self):
+        # The legacy editor replaces the joined Model blocks, it finds nothing to replace when they are not contiguous and leaves every joint hidden
+        self.assertMatchesLegacy('world', transform=splitModelBlocks, showAllJoints=True)
+        self.assertMatchesLegacy('local', transform=splitModelBlocks, showAllJoints=True)
+
+    def testStages(self):
+        fbxFile = os.path.join(self.tempDir, 'export.fbx')
+        rootJoint = fbxGenerator.generate(fbxFile, 6, 10, 0, NAMESPACE)
+        editor = fbxEditor.FBXEditor(rootJoint, NAMESPACE, 'local', stages=['showJoints'])
+        with open(fbxFile, 'r') as f:
+            lines = list(editor.editLines(f))
+
+        self.assertFalse(any(SHOW_LINE_PATTERN.search(line) for line in lines))
+        self.assertTrue(any(NAMESPACE + ':' in line for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Description: Indexes synthetic exports and checks object and connection ranges and lookups, also with windows line endings.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxIndex
+
+import fbxGenerator
+
+
+NUM_JOINTS = 6
+NUM_BLENDSHAPES = 2
+
+
+class FBXIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fbxFile = os.path.join(self.tempDir, 'export.fbx')
+        self.rootJoint = fbxGenerator.generate(self.fbxFile, NUM_JOINTS, 10, NUM_BLENDSHAPES, 'heroA')
+        with open(self.fbxFile, 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def toCRLF(self):
+        crlfFile = os.path.join(self.tempDir, 'crlf.fbx')
+        with open(crlfFile, 'wb') as f:
+            f.write(self.data.replace(b'\n', b'\r\n'))
+        with open(crlfFile, 'rb') as f:
+            return crlfFile, f.read()
+
+    def assertRanges(self, index, data, newline):
+        objectsStart, objectsEnd = index.sections['Objects']
+        self.assertTrue(data[objectsStart:objectsEnd].startswith(b'Objects:  {'))
+        self.assertTrue(data[objectsStart:objectsEnd].endswith(b'}' + newline))
+
+        numObjects = len(re.findall(br'\n\t\w+: -?\d+, "\w+::', data[objectsStart:objectsEnd]))
+        self.assertEqual(len(index.objects), numObjects)
+        for fbxObject in index.objects.values():
+            objectBytes = data[fbxObject.start:fbxObject.end]
+            self.assertTrue(objectBytes.startswith('\t{0}: {1}, '.format(fbxObject.nodeType, fbxObject.id).encode('utf-8')))
+            self.assertTrue(objectBytes.endswith(b'\t}' + newline))
+            self.assertEqual(objectBytes.count(b'\n\t}'), 1)  # Ends at its own closing brace
+
+        self.assertEqual(len(index.connections), data.count(b'\tC: '))
+        for connection in index.connections:
+            connectionBytes = data[connection.start:connection.end]
+            self.assertTrue(connectionBytes.startswith(b'\t;'))
+            self.assertTrue(connectionBytes.endswith(newline))
+            self.assertEqual(connectionBytes.count(b'\tC: '), 1)
+
+    def testRanges(self):
+        self.assertRanges(fbxIndex.FBXIndex(self.fbxFile), self.data, b'\n')
+
+    def testCRLF(self):
+        crlfFile, data = self.toCRLF()
+        index = fbxIndex.FBXIndex(crlfFile)
+        self.assertRanges(index, data, b'\r\n')
+
+        lfIndex = fbxIndex.FBXIndex(self.fbxFile)
+        self.assertEqual(list(index.objects), list(lfIndex.objects))
+        self.assertEqual([connection[:4] for connection in index.connections], [connection[:4] for connection in lfIndex.connections])
+
+    def testLookups(self):
+        index = fbxIndex.FBXIndex(self.fbxFile)
+        rootJoint = index.findObject(self.rootJoint, 'Model', 'LimbNode')
+        self.assertEqual((rootJoint.className, rootJoint.name), ('Model', self.rootJoint))
+        self.assertIsNone(index.findObject(self.rootJoint, 'Model', 'Mesh'))
+        self.assertIs(index.getObject(rootJoint.id), rootJoint)
+
+        parents = index.getParentConnections(rootJoint.id)
+        self.assertEqual([(connection.type, index.getObject(connection.parentId).name) for connection in parents], [('OO', 'heroA:Rig_GRP')])
+        self.assertFalse(index.isParentedToRoot(rootJoint.id))
+        self.assertTrue(index.isParentedToRoot(parents[0].parentId))
+
+        children = index.getChildConnections(rootJoint.id)
+        self.assertEqual(sorted(connection.property for connection in children if connection.type == 'OP'), ['Lcl Rotation', 'Lcl Scaling', 'Lcl Translation'])
+        self.assertEqual(len(index.getChildren(rootJoint.id, 'NodeAttribute')), 1)
+        self.assertEqual(len(index.getChildren(rootJoint.id, 'Model')), len(index.getChildren(rootJoint.id)) - 4)
+        self.assertEqual(index.getConnections(rootJoint.id), sorted(parents + children, key=lambda connection: connection.start))
+
+        curves = index.getAnimationCurves(rootJoint.id)
+        self.assertEqual(len(curves), 9)
+        channels = sorted(index.getCurveChannel(curve.id) for curve in curves)
+        self.assertEqual(channels[0], ('Model', self.rootJoint, 'Lcl Rotation', 'd|X'))
+
+        blendshapeCurves = [curve for curve in index.objects.values() if curve.nodeType == 'AnimationCurve' and index.getCurveChannel(curve.id)[0] == 'Deformer']
+        self.assertEqual(len(blendshapeCurves), NUM_BLENDSHAPES)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Description: Patches synthetic exports with the chunked copy that replaces sendfile where it is missing or fails, and compares them to the legacy editor.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import mmap
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxPatcher
+
+import fbxGenerator
+import legacyEditor
+
+
+def failingSendfile(outFd, inFd, offset, count):
+    raise OSError(45, 'Operation not supported')  # What macOS raises for a file destination
+
+
+class CopyRangeTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.useSendfile = fbxPatcher.USE_SENDFILE
+        self.sendfile = getattr(os, 'sendfile', None)
+        self.copyChunkSize = fbxPatcher.COPY_CHUNK_SIZE
+
+        # Forces the fallback even where sendfile works
+        fbxPatcher.USE_SENDFILE = True
+        os.sendfile = failingSendfile
+        fbxPatcher.COPY_CHUNK_SIZE = 1000
+
+    def tearDown(self):
+        fbxPatcher.USE_SENDFILE = self.useSendfile
+        fbxPatcher.COPY_CHUNK_SIZE = self.copyChunkSize
+        if self.sendfile is None:
+            del os.sendfile
+        else:
+            os.sendfile = self.sendfile
+        shutil.rmtree(self.tempDir)
+
+    def testCopyRange(self):
+        srcFile = os.path.join(self.tempDir, 'src.bin')
+        dstFile = os.path.join(self.tempDir, 'dst.bin')
+        data = bytes(bytearray(i % 251 for i in range(5000)))
+        with open(srcFile, 'wb') as f:
+            f.write(data)
+
+        with open(srcFile, 'rb') as src:
+            mm = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                with open(dstFile, 'wb') as f:
+                    f.write(b'head')
+                    fbxPatcher.copyRange(src, f, mm, 10, 3500)
+                    fbxPatcher.copyRange(src, f, mm, 4000, len(mm))
+            finally:
+                mm.close()
+
+        with open(dstFile, 'rb') as f:
+            self.assertEqual(f.read(), b'head' + data[10:3500] + data[4000:])
+
+    def testPatchMatchesLegacy(self):
+        fbxFile = os.path.join(self.tempDir, 'patch.fbx')
+        rootJoint = fbxGenerator.generate(fbxFile, 8, 20, 2, 'heroA')
+        with open(fbxFile, 'r') as f:
+            expected = legacyEditor.editContents(f.read(), rootJoint, 'heroA', 'local')
+
+        fbxPatcher.FBXPatcher(rootJoint, 'heroA', 'local').edit(fbxFile)
+        with open(fbxFile, 'r') as f:
+            self.assertEqual(f.read(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Description: Prunes synthetic exports and checks where static values are written, kept channels, removed objects and definitions, then verifies the result.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxEditor
+from takAniPublisher import fbxIndex
+from takAniPublisher import fbxPruner
+from takAniPublisher import fbxVerifier
+
+import fbxGenerator
+
+
+NUM_JOINTS = 5
+NUM_FRAMES = 20
+NUM_BLENDSHAPES = 8
+NAMESPACE = 'heroA'
+KEPT_NODE_TYPES = ['Model', 'NodeAttribute', 'Geometry', 'Deformer', 'AnimationStack', 'AnimationLayer']
+DEFORM_PERCENT_PATTERN = re.compile(r'\n\t\tDeformPercent: ([^\n]*)')
+DEFINITION_PATTERN = re.compile(r'\tObjectType: "(\w+)" \{\n\t\tCount: (\d+)')
+
+
+class FBXPrunerTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fbxFile = os.path.join(self.tempDir, 'export.fbx')
+        rootJoint = fbxGenerator.generate(self.fbxFile, NUM_JOINTS, NUM_FRAMES, NUM_BLENDSHAPES, NAMESPACE)
+        self.rootJoint = rootJoint[len(NAMESPACE) + 1:]
+
+        # Blendshape weights differ from the static curve values so the written value can be told apart
+        with open(self.fbxFile, 'r') as f:
+            contents = f.read()
+        with open(self.fbxFile, 'w') as f:
+            f.write(contents.replace('\t\tDeformPercent: 0\n', '\t\tDeformPercent: 55\n'))
+        fbxEditor.FBXEditor(rootJoint, NAMESPACE, 'world').edit(self.fbxFile)  # Files are pruned after they are edited
+        self.before = fbxIndex.FBXIndex(self.fbxFile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def prune(self, tolerance=fbxPruner.DEFAULT_TOLERANCE, keepChannels=None):
+        pruner = fbxPruner.FBXPruner(tolerance, keepChannels)
+        pruner.prune(self.fbxFile)
+
+        report = fbxVerifier.FBXVerifier(self.rootJoint, NAMESPACE, 0, NUM_FRAMES - 1).verify(self.fbxFile)
+        self.assertTrue(report['valid'], fbxVerifier.formatReport(report))
+
+        with open(self.fbxFile, 'r') as f:
+            self.contents = f.read()
+        self.index = fbxIndex.FBXIndex(self.fbxFile)
+        return pruner
+
+    def getObjectText(self, fbxObject):
+        with open(self.fbxFile, 'rb') as f:
+            f.seek(fbxObject.start)
+            return f.read(fbxObject.end - fbxObject.start).decode('utf-8')
+
+    def getStaticDeformers(self):
+        """Blendshape channels whose weight curve the generator wrote as constant."""
+        with open(self.fbxFile, 'rb') as f:
+            data = f.read()
+        deformerIds = []
+        for curve in self.before.objects.values():
+            if curve.nodeType == 'AnimationCurve' and fbxPruner.getStaticValue(data[curve.start:curve.end], fbxPruner.DEFAULT_TOLERANCE) is not None:
+                nodeType, name, propertyName, channel = self.before.getCurveChannel(curve.id)
+                if propertyName == 'DeformPercent':
+                    deformerIds.append(self.before.findObject(name, 'Deformer').id)
+        return deformerIds
+
+    def countObjects(self, index, nodeType):
+        return len([fbxObject for fbxObject in index.objects.values() if fbxObject.nodeType == nodeType])
+
+    def testStaticValues(self):
+        staticDeformerIds = self.getStaticDeformers()
+        self.assertTrue(staticDeformerIds)
+        self.assertLess(len(staticDeformerIds), NUM_BLENDSHAPES)
+
+        pruner = self.prune()
+        self.assertEqual(pruner.numPrunedCurves, NUM_JOINTS * 3 + len(staticDeformerIds))
+        self.assertEqual(self.countObjects(self.index, 'AnimationCurve'), NUM_JOINTS * 6 + NUM_BLENDSHAPES - len(staticDeformerIds))
+
+        joints = [fbxObject for fbxObject in self.index.objects.values() if fbxObject.nodeType == 'Model' and fbxObject.subClass == 'LimbNode']
+        self.assertEqual(len(joints), NUM_JOINTS)
+        for joint in joints:
+            self.assertIn('\t\t\tP: "Lcl Scaling", "Lcl Scaling", "", "A",1,1,1\n', self.getObjectText(joint))
+            self.assertEqual([curveNode.name for curveNode in self.index.getAnimationCurveNodes(joint.id)], ['T', 'R'])
+
+        for deformer in self.index.objects.values():
+            if deformer.subClass != 'BlendShapeChannel':
+                continue
+            weight = DEFORM_PERCENT_PATTERN.search(self.getObjectText(deformer)).group(1)
+            self.assertEqual(weight, '0' if deformer.id in staticDeformerIds else '55')
+            self.assertEqual(len(self.index.getAnimationCurveNodes(deformer.id)), 0 if deformer.id in staticDeformerIds else 1)
+
+    def testKeepChannels(self):
+        staticDeformerIds = self.getStaticDeformers()
+        pruner = self.prune(keepChannels=['Root.Lcl Scaling.*', '*.DeformPercent.*'])
+        self.assertEqual(pruner.numPrunedCurves, (NUM_JOINTS - 1) * 3)
+        self.assertEqual(len(self.index.getAnimationCurves(self.index.findObject(self.rootJoint, 'Model').id)), 9)
+        self.assertEqual(self.contents.count('\t\tDeformPercent: 55\n'), NUM_BLENDSHAPES)
+        self.assertTrue(staticDeformerIds)
+
+    def testOrphansStopAtModels(self):
+        pruner = self.prune(tolerance=1000000.0)  # Every curve is static
+        self.assertEqual(pruner.numPrunedCurves, NUM_JOINTS * 9 + NUM_BLENDSHAPES)
+        self.assertEqual(self.countObjects(self.index, 'AnimationCurve'), 0)
+        self.assertEqual(self.countObjects(self.index, 'AnimationCurveNode'), 0)
+        for nodeType in KEPT_NODE_TYPES:
+            self.assertEqual(self.countObjects(self.index, nodeType), self.countObjects(self.before, nodeType), nodeType)
+        numCurves = self.countObjects(self.before, 'AnimationCurve')
+        numCurveNodes = self.countObjects(self.before, 'AnimationCurveNode')
+        self.assertEqual(pruner.numRemovedObjects, numCurves + numCurveNodes)
+        self.assertEqual(len(self.index.connections), len(self.before.connections) - numCurves - numCurveNodes * 2)  # Curve nodes also hang off the layer
+
+    def testDefinitions(self):
+        self.prune()
+        definitions = dict((nodeType, int(count)) for nodeType, count in DEFINITION_PATTERN.findall(self.contents))
+        for nodeType, count in definitions.items():
+            if nodeType != 'GlobalSettings':
+                self.assertEqual(count, self.countObjects(self.index, nodeType), nodeType)
+        self.assertIn('\tCount: {0}\n'.format(sum(definitions.values())), self.contents)
+
+    def testNothingToPrune(self):
+        with open(self.fbxFile, 'rb') as f:
+            expected = f.read()
+        pruner = self.prune(keepChannels=['*'])
+        self.assertEqual((pruner.numPrunedCurves, pruner.numRemovedObjects), (0, 0))
+        with open(self.fbxFile, 'rb') as f:
+            self.assertEqual(f.read(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Description: Splits synthetic shared bakes of several characters by namespace, including a nested namespace, and verifies each file.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxEditor
+from takAniPublisher import fbxIndex
+from takAniPublisher import fbxSplitter
+from takAniPublisher import fbxVerifier
+
+import fbxGenerator
+
+
+NAMESPACES = ['heroA', 'heroB', 'heroA:props']
+NUM_JOINTS = 4
+NUM_FRAMES = 10
+NUM_BLENDSHAPES = 2
+SHARED_NODE_TYPES = ['AnimationStack', 'AnimationLayer', 'Pose']
+DEFINITION_PATTERN = re.compile(r'\tObjectType: "(\w+)" \{\n\t\tCount: (\d+)')
+POSE_NODE_PATTERN = re.compile(r'\n\t\t\tNode: (-?\d+)')
+
+
+class FBXSplitterTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fbxFile = os.path.join(self.tempDir, 'shared.fbx')
+        fbxGenerator.generate(self.fbxFile, NUM_JOINTS, NUM_FRAMES, NUM_BLENDSHAPES, NAMESPACES, bindPose=True)
+        self.index = fbxIndex.FBXIndex(self.fbxFile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def split(self, namespaces):
+        outFiles = dict((namespace, os.path.join(self.tempDir, '{0}.fbx'.format(namespace.replace(':', '_')))) for namespace in namespaces)
+        fbxSplitter.splitFile(self.fbxFile, outFiles)
+        return outFiles
+
+    def getOwnedIds(self, outFile):
+        """Ids of objects in outFile that are not shared by every file."""
+        index = fbxIndex.FBXIndex(outFile)
+        return set(fbxObject.id for fbxObject in index.objects.values() if fbxObject.nodeType not in SHARED_NODE_TYPES)
+
+    def assertValidFile(self, outFile, namespace):
+        index = fbxIndex.FBXIndex(outFile)
+        with open(outFile, 'r') as f:
+            contents = f.read()
+
+        names = [fbxObject.name for fbxObject in index.objects.values() if fbxSplitter.getNamespace(fbxObject.name)]
+        self.assertEqual(set(fbxSplitter.getNamespace(name) for name in names), set([namespace]))
+        self.assertEqual(len([fbxObject for fbxObject in index.objects.values() if fbxObject.nodeType == 'Model']), NUM_JOINTS + 2)
+        self.assertEqual(len([fbxObject for fbxObject in index.objects.values() if fbxObject.nodeType == 'AnimationCurve']), NUM_JOINTS * 9 + NUM_BLENDSHAPES)
+
+        # Connections of the source file between objects that were kept
+        keptIds = set(index.objects) | set([fbxIndex.ROOT_NODE_ID])
+        expected = [connection[:4] for connection in self.index.connections if connection.childId in keptIds and connection.parentId in keptIds]
+        self.assertEqual([connection[:4] for connection in index.connections], expected)
+
+        for nodeType, count in DEFINITION_PATTERN.findall(contents):
+            if nodeType != 'GlobalSettings':
+                self.assertEqual(int(count), len([fbxObject for fbxObject in index.objects.values() if fbxObject.nodeType == nodeType]), nodeType)
+
+        poseNodeIds = [int(nodeId) for nodeId in POSE_NODE_PATTERN.findall(contents)]
+        self.assertEqual(len(poseNodeIds), NUM_JOINTS + 1)
+        self.assertTrue(set(poseNodeIds) <= set(index.objects))
+        self.assertIn('\t\tNbPoseNodes: {0}\n'.format(len(poseNodeIds)), contents)
+
+        rootJoint = '{0}:Root'.format(namespace)
+        fbxEditor.FBXEditor(rootJoint, namespace, 'world').edit(outFile)
+        report = fbxVerifier.FBXVerifier('Root', namespace, 0, NUM_FRAMES - 1, True).verify(outFile)
+        self.assertTrue(report['valid'], fbxVerifier.formatReport(report))
+
+    def testSplit(self):
+        outFiles = self.split(NAMESPACES)
+        ownedIds = dict((namespace, self.getOwnedIds(outFile)) for namespace, outFile in outFiles.items())
+        for namespace, outFile in outFiles.items():
+            self.assertValidFile(outFile, namespace)
+
+        # Objects without a namespace, like attributes, geometry, deformers and curves, are only written to their owner
+        for namespace in NAMESPACES:
+            for otherNamespace in NAMESPACES:
+                if namespace != otherNamespace:
+                    self.assertFalse(ownedIds[namespace] & ownedIds[otherNamespace], (namespace, otherNamespace))
+        sharedIds = set(fbxObject.id for fbxObject in self.index.objects.values() if fbxObject.nodeType in SHARED_NODE_TYPES)
+        self.assertEqual(set.union(*ownedIds.values()), set(self.index.objects) - sharedIds)
+
+    def testNestedNamespaceAlone(self):
+        outFiles = self.split(['heroA:props', 'heroB'])
+        for namespace, outFile in outFiles.items():
+            self.assertValidFile(outFile, namespace)
+
+    def testMissingNamespace(self):
+        outFiles = dict((namespace, os.path.join(self.tempDir, namespace + '.fbx')) for namespace in ('heroA', 'heroC'))
+        self.assertRaises(RuntimeError, fbxSplitter.splitFile, self.fbxFile, outFiles)
+        self.assertFalse(any(os.path.exists(outFile) for outFile in outFiles.values()))
+
+    def testOwnerNamespace(self):
+        self.assertEqual(fbxSplitter.getOwnerNamespace('heroA:props:Root', NAMESPACES), 'heroA:props')
+        self.assertEqual(fbxSplitter.getOwnerNamespace('heroA:Root', NAMESPACES), 'heroA')
+        self.assertEqual(fbxSplitter.getOwnerNamespace('heroA:props:Root', ['heroA']), 'heroA')
+        self.assertIsNone(fbxSplitter.getOwnerNamespace('heroAB:Root', NAMESPACES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Description: Splits synthetic exports to segments that share their boundary frame like chunked exports and stitches them back.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxCurves
+from takAniPublisher import fbxStitcher
+
+import fbxGenerator
+
+
+NUM_FRAMES = 60
+
+
+def writeSegment(fbxFile, segmentFile, startFrame, endFrame, channelOffsets=None):
+    """Write keys of startFrame to endFrame, channelOffsets adds a value to curves by property name like a different bake would."""
+    channels = fbxStitcher.getCurveChannels(fbxFile)
+    channelOffsets = channelOffsets or {}
+    with open(fbxFile, 'r') as inFile:
+        with open(segmentFile, 'w') as f:
+            for item in fbxCurves.iterCurves(inFile):
+                if not isinstance(item, fbxCurves.AnimationCurve):
+                    f.write(item)
+                    continue
+                curve = item.sliceKeys(startFrame, endFrame + 1)
+                offset = channelOffsets.get(channels[item.id][2])
+                if offset:
+                    curve.setKeys(curve.keyTimes, fbxStitcher.offsetValues(curve.keyValues, offset))
+                f.writelines(curve.toLines())
+
+
+def readCurves(fbxFile):
+    channels = fbxStitcher.getCurveChannels(fbxFile)
+    with open(fbxFile, 'r') as f:
+        return dict((channels[item.id], item) for item in fbxCurves.iterCurves(f) if isinstance(item, fbxCurves.AnimationCurve))
+
+
+class FBXStitcherTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fbxFile = os.path.join(self.tempDir, 'full.fbx')
+        self.outFile = os.path.join(self.tempDir, 'stitched.fbx')
+        fbxGenerator.generate(self.fbxFile, 5, NUM_FRAMES, 2, 'chr')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def split(self, segments, channelOffsets=None):
+        segmentFiles = []
+        for i, (startFrame, endFrame) in enumerate(segments):
+            segmentFile = os.path.join(self.tempDir, 'segment_{0:03d}.fbx'.format(i))
+            writeSegment(self.fbxFile, segmentFile, startFrame, endFrame, channelOffsets if i else None)
+            segmentFiles.append(segmentFile)
+        return segmentFiles
+
+    def testRoundTrip(self):
+        segmentFiles = self.split([(0, 20), (20, 40), (40, NUM_FRAMES - 1)])
+        stitcher = fbxStitcher.stitchFiles(segmentFiles, self.outFile)
+
+        self.assertEqual(stitcher.missingChannels, [])
+        self.assertEqual(stitcher.discontinuities, [])
+        self.assertTrue(stitcher.numStitchedCurves)
+        with open(self.fbxFile, 'r') as f:
+            expected = f.read()
+        with open(self.outFile, 'r') as f:
+            self.assertEqual(f.read(), expected)
+
+    def testRotationUnwrap(self):
+        segmentFiles = self.split([(0, 30), (30, NUM_FRAMES - 1)], {'Lcl Rotation': 360.0})
+        stitcher = fbxStitcher.stitchFiles(segmentFiles, self.outFile)
+
+        self.assertEqual(stitcher.discontinuities, [])
+        expectedCurves = readCurves(self.fbxFile)
+        for channel, curve in readCurves(self.outFile).items():
+            self.assertEqual(curve.keyTimes, expectedCurves[channel].keyTimes)
+            for value, expectedValue in zip(curve.keyValues, expectedCurves[channel].keyValues):
+                self.assertAlmostEqual(float(value), float(expectedValue), places=4)
+
+    def testDiscontinuity(self):
+        segmentFiles = self.split([(0, 30), (30, NUM_FRAMES - 1)], {'Lcl Translation': 0.5})
+        stitcher = fbxStitcher.stitchFiles(segmentFiles, self.outFile)
+
+        self.assertEqual(len(stitcher.discontinuities), 5 * 3)
+        self.assertEqual(set(channel[2] for channel, keyTime, difference in stitcher.discontinuities), set(['Lcl Translation']))
+        for channel, keyTime, difference in stitcher.discontinuities:
+            self.assertAlmostEqual(difference, -0.5, places=4)
+        self.assertTrue(fbxStitcher.formatDiscontinuities(stitcher.discontinuities))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Description: Verifies edited synthetic exports, then breaks them one way at a time and checks that only the matching check fails.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxEditor
+from takAniPublisher import fbxIndex
+from takAniPublisher import fbxVerifier
+
+import fbxGenerator
+
+
+NAMESPACE = 'heroA'
+ROOT_JOINT = 'Root'
+NUM_FRAMES = 20
+
+
+class FBXVerifierTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fbxFile = os.path.join(self.tempDir, 'export.fbx')
+        rootJoint = fbxGenerator.generate(self.fbxFile, 6, NUM_FRAMES, 2, NAMESPACE)
+        fbxEditor.FBXEditor(rootJoint, NAMESPACE, 'world').edit(self.fbxFile)
+        with open(self.fbxFile, 'r') as f:
+            self.contents = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def verify(self, contents=None, startFrame=0, endFrame=NUM_FRAMES - 1, exactKeyCount=True, reportFile=None):
+        if contents is not None:
+            with open(self.fbxFile, 'w') as f:
+                f.write(contents)
+        verifier = fbxVerifier.FBXVerifier(ROOT_JOINT, NAMESPACE, startFrame, endFrame, exactKeyCount)
+        return verifier.verify(self.fbxFile, reportFile)
+
+    def assertFails(self, report, checkName):
+        failed = [name for name in fbxVerifier.CHECKS if report['checks'][name]['numErrors']]
+        self.assertEqual(failed, [checkName])
+        self.assertFalse(report['valid'])
+        self.assertIn('{0}: '.format(checkName), fbxVerifier.formatReport(report))
+
+    def replaceOnce(self, old, new):
+        self.assertIn(old, self.contents)
+        return self.contents.replace(old, new, 1)
+
+    def getRootJoint(self):
+        index = fbxIndex.FBXIndex(self.fbxFile)
+        return index, index.findObject(ROOT_JOINT, 'Model', 'LimbNode')
+
+    def testClean(self):
+        reportFile = os.path.join(self.tempDir, 'reports', 'export.json')
+        report = self.verify(reportFile=reportFile)
+        self.assertTrue(report['valid'], fbxVerifier.formatReport(report))
+        self.assertFalse(any(check['skipped'] for check in report['checks'].values()))
+        self.assertEqual(report['numCurves'], 6 * 9 + 2)
+        with open(reportFile, 'r') as f:
+            self.assertEqual(json.load(f)['checks'], report['checks'])
+
+    def testSkippedChecks(self):
+        report = fbxVerifier.FBXVerifier().verify(self.fbxFile)
+        self.assertTrue(report['valid'])
+        self.assertEqual([name for name in fbxVerifier.CHECKS if report['checks'][name]['skipped']], ['root', 'namespace', 'keys'])
+
+    def testMissingObject(self):
+        report = self.verify(self.replaceOnce('Connections:  {\n', 'Connections:  {\n\tC: "OO",123,456\n'))
+        self.assertFails(report, 'connections')
+        self.assertEqual(report['checks']['connections']['numErrors'], 2)
+
+    def testDuplicateId(self):
+        index, rootJoint = self.getRootJoint()
+        attributeId = re.search(r'\tNodeAttribute: (\d+), ', self.contents).group(1)
+        report = self.verify(self.replaceOnce('\tNodeAttribute: {0}, '.format(attributeId), '\tNodeAttribute: {0}, '.format(rootJoint.id)))
+        self.assertIn('used more than once', report['checks']['connections']['messages'][0])
+
+    def testRootNotParented(self):
+        index, rootJoint = self.getRootJoint()
+        group = index.findObject('Rig_GRP', 'Model')
+        report = self.verify(self.replaceOnce('\tC: "OO",{0},0\n'.format(rootJoint.id), '\tC: "OO",{0},{1}\n'.format(rootJoint.id, group.id)))
+        self.assertFails(report, 'root')
+        self.assertIn('not parented', report['checks']['root']['messages'][0])
+
+    def testRootMissing(self):
+        report = self.verify(self.contents.replace('Model::{0}"'.format(ROOT_JOINT), 'Model::Hips"'))
+        self.assertFails(report, 'root')
+        self.assertIn('missing', report['checks']['root']['messages'][0])
+
+    def testHiddenJoint(self):
+        report = self.verify(self.replaceOnce('\t\t\tP: "Show", "bool", "", "",1\n', '\t\t\tP: "Show", "bool", "", "",0\n'))
+        self.assertFails(report, 'show')
+        self.assertEqual(report['checks']['show']['numErrors'], 1)
+
+    def testNamespace(self):
+        report = self.verify(self.replaceOnce('"Model::Joint001"', '"Model::{0}:Joint001"'.format(NAMESPACE)))
+        self.assertFails(report, 'namespace')
+
+    def testKeyCount(self):
+        self.assertFails(self.verify(endFrame=NUM_FRAMES), 'keys')
+        self.assertTrue(self.verify(endFrame=NUM_FRAMES, exactKeyCount=False)['valid'])
+
+    def testKeysOutsideRange(self):
+        report = self.verify(startFrame=5, endFrame=NUM_FRAMES + 4)  # As many frames as keys, shifted
+        self.assertFails(report, 'keys')
+        self.assertIn('outside of frames', report['checks']['keys']['messages'][0])
+
+    def testCustomTimeMode(self):
+        timeMode = '\t\tP: "TimeMode", "enum", "", "",6\n'
+        customFrameRate = '\t\tP: "CustomFrameRate", "double", "Number", "",-1\n'
+
+        contents = self.replaceOnce(timeMode, timeMode.replace(',6', ',14')).replace(customFrameRate, customFrameRate.replace('-1', '30'))
+        self.assertTrue(self.verify(contents)['valid'])
+
+        contents = contents.replace(customFrameRate.replace('-1', '30'), customFrameRate.replace('-1', '60'))
+        self.assertFails(self.verify(contents), 'keys')  # Keys baked at 30 fps end past the last frame at 60 fps
+
+
+if __name__ == '__main__':
+    unittest.main()
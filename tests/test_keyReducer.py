@@ -0,0 +1,121 @@
+"""
+Description: Reduces keys of synthetic bakes with numpy and in pure python and checks both keep the same keys within the tolerance.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import math
+import shutil
+import random
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+from takAniPublisher import fbxCurves
+from takAniPublisher import keyReducer
+
+import fbxGenerator
+
+
+NUM_JOINTS = 4
+NUM_FRAMES = 60
+TOLERANCE = 0.01
+
+
+def readCurves(fbxFile):
+    with open(fbxFile, 'r') as f:
+        return [item for item in fbxCurves.iterCurves(f) if isinstance(item, fbxCurves.AnimationCurve)]
+
+
+def getCurves():
+    """Times and values of curves with ramps, holds, steps, noise and fewer than three keys."""
+    rand = random.Random(0)
+    curves = [
+        ([], []),
+        ([0.0], [1.0]),
+        ([0.0, 1.0], [1.0, 2.0]),
+        (list(range(20)), [0.5 * frame for frame in range(20)]),
+        (list(range(20)), [0.0 if frame < 10 else 5.0 for frame in range(20)]),
+        (list(range(30)), [min(frame, 15) * 0.2 for frame in range(30)]),
+    ]
+    for i in range(10):
+        period = rand.uniform(5, 60)
+        curves.append((list(range(50)), [math.sin(frame * 2 * math.pi / period) + rand.gauss(0, 0.002) for frame in range(50)]))
+    return curves
+
+
+class KeyReducerTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fbxFile = os.path.join(self.tempDir, 'bake.fbx')
+        fbxGenerator.generate(self.fbxFile, NUM_JOINTS, NUM_FRAMES, 2, 'heroA')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def reduce(self, useNumpy):
+        outFile = os.path.join(self.tempDir, 'numpy.fbx' if useNumpy else 'python.fbx')
+        reducer = keyReducer.KeyReducer(TOLERANCE, useNumpy=useNumpy)
+        self.assertEqual(reducer.useNumpy, useNumpy)
+        reducer.reduce(self.fbxFile, outFile)
+        return reducer, outFile
+
+    def assertWithinTolerance(self, times, values, kept):
+        self.assertEqual(kept, sorted(kept))
+        if len(times) > 1:
+            self.assertEqual([kept[0], kept[-1]], [0, len(times) - 1])
+        for left, right in zip(kept[:-1], kept[1:]):
+            for index in range(left + 1, right):
+                self.assertLessEqual(abs(values[index] - keyReducer.interpolate(times, values, left, right, times[index])), TOLERANCE + 1e-9)
+
+    def testPurePython(self):
+        for times, values in getCurves():
+            self.assertWithinTolerance(times, values, keyReducer.reduceCurve(times, values, TOLERANCE))
+
+    @unittest.skipUnless(keyReducer.importNumpy(), 'numpy is not available')
+    def testParity(self):
+        curves = getCurves()
+        keptLists = keyReducer.reduceCurvesNumpy([times for times, values in curves], [values for times, values in curves], TOLERANCE)
+        for (times, values), kept in zip(curves, keptLists):
+            self.assertEqual(kept, keyReducer.reduceCurve(times, values, TOLERANCE))
+            self.assertWithinTolerance(times, values, kept)
+
+        numpyReducer, numpyFile = self.reduce(True)
+        pythonReducer, pythonFile = self.reduce(False)
+        self.assertEqual((numpyReducer.numKeys, numpyReducer.numReducedKeys), (pythonReducer.numKeys, pythonReducer.numReducedKeys))
+        with open(numpyFile, 'r') as f:
+            numpyContents = f.read()
+        with open(pythonFile, 'r') as f:
+            self.assertEqual(numpyContents, f.read())
+
+    def testReducedCurves(self):
+        reducer, outFile = self.reduce(False)
+        self.assertLess(reducer.numReducedKeys, reducer.numKeys)
+
+        originalCurves = readCurves(self.fbxFile)
+        reducedCurves = readCurves(outFile)
+        self.assertEqual(len(reducedCurves), len(originalCurves))
+        for original, reduced in zip(originalCurves, reducedCurves):
+            times = [float(time) for time in original.keyTimes]
+            values = [float(value) for value in original.keyValues]
+            kept = [original.keyTimes.index(time) for time in reduced.keyTimes]
+            self.assertEqual(reduced.keyValues, [original.keyValues[index] for index in kept])
+            self.assertWithinTolerance(times, values, kept)
+
+            # Reduced curves are interpolated linearly between the kept keys, others keep their tangents
+            flags = int(reduced.arrays['KeyAttrFlags'][0])
+            if reduced.numKeys < original.numKeys:
+                self.assertEqual(flags & fbxCurves.INTERPOLATION_MASK, fbxCurves.INTERPOLATION_LINEAR)
+                self.assertEqual(reduced.arrays['KeyAttrRefCount'], [str(reduced.numKeys)])
+            else:
+                self.assertEqual(reduced.arrays['KeyAttrFlags'], original.arrays['KeyAttrFlags'])
+
+
+if __name__ == '__main__':
+    unittest.main()
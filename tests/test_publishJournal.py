@@ -0,0 +1,84 @@
+"""
+Description: Records publish items in a journal in a temp directory and checks checksums, resume states and dropping items left out of a publish.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+
+from takAniPublisher import publishJournal
+
+
+class PublishJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.journalFile = os.path.join(self.tempDir, 'journals', 'shot010.json')
+        self.journal = publishJournal.PublishJournal(self.journalFile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def addItem(self, name, fingerprint='a'):
+        fbxFile = os.path.join(self.tempDir, name + '.fbx')
+        exportFile, processedFile = publishJournal.getStagingFiles(fbxFile)
+        self.journal.begin(fbxFile, name, fingerprint, exportFile, processedFile, [(processedFile, fbxFile)])
+        return fbxFile, exportFile, processedFile
+
+    def write(self, path, data):
+        with open(path, 'w') as f:
+            f.write(data)
+
+    def testChecksums(self):
+        fbxFile, exportFile, processedFile = self.addItem('heroA')
+        self.write(exportFile, 'exported')
+        checksum = self.journal.setState(fbxFile, publishJournal.EXPORTED, exportFile)
+        self.assertEqual(checksum, publishJournal.getChecksum(exportFile))
+
+        self.write(fbxFile, 'published')
+        self.assertEqual(self.journal.setState(fbxFile, publishJournal.VERIFIED, fbxFile, 'known'), 'known')
+
+        journal = publishJournal.PublishJournal(self.journalFile)
+        self.assertEqual(journal.getChecksum(fbxFile, publishJournal.EXPORTED, exportFile), checksum)
+        self.assertEqual(journal.getState(fbxFile), publishJournal.VERIFIED)
+
+    def testResumeState(self):
+        fbxFile, exportFile, processedFile = self.addItem('heroA')
+        self.write(exportFile, 'exported')
+        self.journal.setState(fbxFile, publishJournal.EXPORTED, exportFile)
+        self.write(processedFile, 'processed')
+        self.journal.setState(fbxFile, publishJournal.POST_PROCESSED, processedFile)
+
+        self.assertEqual(self.journal.getResumeState(fbxFile, 'a'), publishJournal.POST_PROCESSED)
+        self.assertIsNone(self.journal.getResumeState(fbxFile, 'b'))
+
+        # Same size and modification time with other content is caught by the checksum
+        stat = os.stat(processedFile)
+        self.write(processedFile, 'PROCESSED')
+        os.utime(processedFile, (stat.st_atime, stat.st_mtime))
+        self.assertEqual(self.journal.getResumeState(fbxFile, 'a'), publishJournal.EXPORTED)
+
+    def testRetainItems(self):
+        heroA = self.addItem('heroA')[0]
+        heroB = self.addItem('heroB')[0]
+        self.assertFalse(self.journal.isComplete())
+
+        droppedEntries = self.journal.retainItems([heroA])
+        self.assertEqual([entry['namespace'] for entry in droppedEntries], ['heroB'])
+        self.assertEqual(list(publishJournal.PublishJournal(self.journalFile).entries), [publishJournal.PublishJournal.getKey(heroA)])
+        self.assertEqual(self.journal.retainItems([heroA, heroB]), [])
+
+        self.journal.retainItems([])
+        self.assertFalse(self.journal.exists())
+        self.assertTrue(self.journal.isComplete())
+
+
+if __name__ == '__main__':
+    unittest.main()
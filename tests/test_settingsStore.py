@@ -0,0 +1,97 @@
+"""
+Description: Loads settings from a default and a user setting file in a temp directory and checks they are reloaded only when either file changes.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'Contents', 'scripts'))
+
+from takAniPublisher import settingsStore
+
+
+class CountingStore(settingsStore.SettingsStore):
+    def __init__(self, *args):
+        super(CountingStore, self).__init__(*args)
+        self.numLoads = 0
+
+    def _load(self):
+        self.numLoads += 1
+        return super(CountingStore, self)._load()
+
+
+class SettingsStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.defaultSettingFile = os.path.join(self.tempDir, 'settings.json')
+        self.userSettingFile = os.path.join(self.tempDir, 'user', 'settings_user.json')
+        self.writeSettings(self.defaultSettingFile, {'keyReduction': False, 'chunkSize': 100})
+
+        self.store = CountingStore(self.defaultSettingFile, self.userSettingFile)
+        self.changes = []
+        self.store.addListener(self.onChanged)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def onChanged(self, settings):
+        self.changes.append(settings)
+
+    def writeSettings(self, path, settings, stat=None):
+        """Write settings and set the modification time of stat when it is given."""
+        with open(path, 'w') as f:
+            json.dump(settings, f)
+        if stat:
+            os.utime(path, (stat.st_atime, stat.st_mtime))
+
+    def assertReloaded(self, isReloaded):
+        numLoads = self.store.numLoads
+        self.store.get()
+        self.assertEqual(self.store.numLoads, numLoads + 1 if isReloaded else numLoads)
+
+    def testCached(self):
+        self.assertEqual(self.store.get(), {'keyReduction': False, 'chunkSize': 100})
+        self.assertReloaded(False)
+        self.assertEqual(self.store.numLoads, 1)
+
+    def testModificationTime(self):
+        self.store.save({'keyReduction': True, 'chunkSize': 100})
+        self.assertReloaded(False)
+
+        for path in (self.defaultSettingFile, self.userSettingFile):
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+            self.assertReloaded(True)
+            self.assertReloaded(False)
+
+    def testSize(self):
+        self.store.save({'keyReduction': True, 'chunkSize': 100})
+        self.assertReloaded(False)
+
+        # Same modification time with another size, like a quick write within the timestamp resolution
+        self.writeSettings(self.userSettingFile, {'keyReduction': True, 'chunkSize': 1000}, os.stat(self.userSettingFile))
+        self.assertReloaded(True)
+        self.assertEqual(self.store.get()['chunkSize'], 1000)
+
+        self.writeSettings(self.defaultSettingFile, {'keyReduction': False, 'chunkSize': 100, 'sharedBake': True}, os.stat(self.defaultSettingFile))
+        self.assertReloaded(True)
+        self.assertEqual(self.store.get(), {'keyReduction': True, 'chunkSize': 1000, 'sharedBake': True})
+        self.assertEqual(self.changes[-1], self.store.get())
+
+    def testRemovedUserFile(self):
+        self.store.save({'keyReduction': True, 'chunkSize': 100})
+        os.remove(self.userSettingFile)
+        self.assertReloaded(True)
+        self.assertEqual(self.store.get()['keyReduction'], False)
+
+
+if __name__ == '__main__':
+    unittest.main()